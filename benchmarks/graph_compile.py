@@ -0,0 +1,44 @@
+"""
+Compare compiling the game graph per session with sharing one cached compiled graph.
+
+Run from the repository root:
+
+    PYTHONPATH=src python benchmarks/graph_compile.py --sessions 200
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from core.graph import build_graph, get_graph
+
+
+def measure(setup, sessions: int) -> tuple[float, float]:
+    """Return the total time [ms] and retained memory [MiB] of preparing a graph for every session."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    graphs = [setup() for _ in range(sessions)]
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del graphs
+    return elapsed * 1000, retained / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200, help="number of sessions hosted by one worker")
+    args = parser.parse_args()
+
+    build_graph()  # warm up imports so both runs measure compilation only
+    get_graph.cache_clear()
+    for label, setup in (("compile per session", build_graph), ("shared graph", get_graph)):
+        total_ms, memory_mib = measure(setup, args.sessions)
+        print(
+            f"{label:>20}: {total_ms:9.1f} ms total, {total_ms / args.sessions:7.3f} ms/session, "
+            f"{memory_mib:7.2f} MiB retained"
+        )
+
+
+if __name__ == "__main__":
+    main()
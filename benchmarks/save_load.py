@@ -0,0 +1,90 @@
+"""
+Compare loading large saves through pydantic validation and without validation.
+
+The benchmark builds the state without any validation via 'model_construct' for
+reference, which in pure Python is slower than pydantic-core's validation, and
+measures decrypting an encrypted save on top of validating it.
+
+Run from the repository root:
+
+    PYTHONPATH=src python benchmarks/save_load.py --items 400
+"""
+
+import argparse
+import json
+import timeit
+
+from cryptography.fernet import Fernet
+
+from core import GameState
+from core.entities import Armor, Inventory, Item, Origin, Player, PlayerClass, Potion, Race, Weapon, World
+from core.entities.constants import HISTORY_LENGTH, MAX_CHAPTERS
+from core.entities.history import HistoryBuffer
+from core.entities.level import Level
+from core.save import ENCRYPTED_FILE_HEADER, load_save
+
+POCKETS = {"items": Item, "weapons": Weapon, "armors": Armor, "potions": Potion}
+
+
+def large_state(items: int) -> GameState:
+    player = Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    for i in range(items // 2):
+        player.add_item(Weapon(name=f"Blade {i}", description="A sharp, well-balanced blade.", weapon_type="sword"))
+        player.add_item(Potion(name=f"Potion {i}", description="Restores health."))
+    history = [
+        f"player action: Turn {i}, the party presses on through the misty forest." for i in range(HISTORY_LENGTH)
+    ]
+    chapters = ["The party crossed the forest and fought the wolves. " * 10] * MAX_CHAPTERS
+    world = World(location="Emerald Forest", quest="Find the lost relic")
+    return GameState(player=player, world=world, history=history, chapters=chapters, lore="Ancient lore. " * 200)
+
+
+def construct_unvalidated(data: bytes) -> GameState:
+    """Build the state with 'model_construct', skipping validation entirely."""
+    state = json.loads(data)
+    fields = state["player"]
+    inventory = Inventory.model_construct(
+        **{
+            pocket: [POCKETS[pocket].model_construct(**item) for item in items]
+            for pocket, items in fields["inventory"].items()
+        }
+    )
+    player = Player(
+        name=fields["name"],
+        player_class=PlayerClass(fields["player_class"]),
+        race=Race(fields["race"]),
+        origin=Origin(fields["origin"]),
+        hp=fields["hp"],
+        max_hp=fields["max_hp"],
+        level=Level.model_construct(**fields["level"]),
+        inventory=inventory,
+    )
+    return GameState.model_construct(
+        **{**state, "player": player, "world": World(**state["world"]), "history": HistoryBuffer(state["history"])}
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=400, help="number of inventory items in the save")
+    parser.add_argument("--loads", type=int, default=300, help="number of loads per measurement")
+    args = parser.parse_args()
+
+    fernet = Fernet(Fernet.generate_key())
+    state = large_state(args.items)
+    payload = state.model_dump_json(indent=2).encode("utf-8")
+    encrypted = ENCRYPTED_FILE_HEADER + fernet.encrypt(payload)
+    assert load_save(encrypted, fernet) == state == construct_unvalidated(payload)
+    print(f"save: {len(payload) / 1024:.0f} KiB JSON, {len(encrypted) / 1024:.0f} KiB encrypted")
+
+    for label, load in (
+        ("validation", lambda: GameState.model_validate_json(payload)),
+        ("model_construct", lambda: construct_unvalidated(payload)),
+        ("decrypt + validation", lambda: load_save(encrypted, fernet)),
+    ):
+        seconds = min(timeit.repeat(load, number=args.loads, repeat=5)) / args.loads
+        print(f"{label:>20}: {seconds * 1000:7.3f} ms/load")
+
+
+if __name__ == "__main__":
+    main()
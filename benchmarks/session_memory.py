@@ -0,0 +1,71 @@
+"""
+Measure the memory held by idle game sessions.
+
+Every session is a full 'GameState' with a full history, a small inventory and a
+level, as a session waiting for player input would be. The history is also measured
+on its own against the plain 'deque' of strings it replaced.
+
+Run from the repository root:
+
+    PYTHONPATH=src python benchmarks/session_memory.py --sessions 10000
+"""
+
+import argparse
+import gc
+import tracemalloc
+from collections import deque
+
+from core import GameState
+from core.entities import Armor, Origin, Player, PlayerClass, Potion, Race, Weapon, World
+from core.entities.constants import HISTORY_LENGTH
+from core.entities.history import HistoryBuffer
+
+PREFIXES = ("dungeon master: ", "player action: ", "exploration: ", "player reply: ")
+
+
+def history_entries(session: int) -> list[str]:
+    return [
+        f"{PREFIXES[i % len(PREFIXES)]}Session {session} turn {i}: the party presses on through the misty forest."
+        for i in range(HISTORY_LENGTH)
+    ]
+
+
+def idle_session(session: int) -> GameState:
+    player = Player(name=f"player {session}", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    player.add_item(Weapon(name="Knife", damage=2, weapon_type="dagger"))
+    player.add_item(Armor(name="Leather Armor", defense=1))
+    player.add_item(Potion(name="Health Potion"))
+    world = World(location="Emerald Forest", quest="Find the lost relic")
+    return GameState(player=player, world=world, history=history_entries(session), chapters=["The journey began."])
+
+
+def bytes_per_item(build, count: int) -> float:
+    """Return the memory retained per built object [bytes]."""
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    items = [build(i) for i in range(count)]
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10_000, help="number of idle sessions held by one worker")
+    args = parser.parse_args()
+
+    idle_session(0)  # warm up shared tables and caches so only per-session memory is measured
+    session = bytes_per_item(idle_session, args.sessions)
+    print(f"{'idle session':>24}: {session:9.0f} B/session ({session * args.sessions / 2**20:.1f} MiB in total)")
+    for label, build in (
+        ("history (deque of str)", lambda i: deque(history_entries(i), maxlen=HISTORY_LENGTH)),
+        ("history (HistoryBuffer)", lambda i: HistoryBuffer(history_entries(i))),
+    ):
+        print(f"{label:>24}: {bytes_per_item(build, args.sessions):9.0f} B/session")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.serde.base import SerializerProtocol
+
+from core import GameState
+
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
+    from langgraph.types import StateSnapshot
+
+CHECKPOINT_FILE = "checkpoints.sqlite"
+CHECKPOINT_BATCH_SIZE = 16
+CHECKPOINT_MAX_DELAY = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+_COLUMNS = "thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+
+_STATE_FIELD = "game_state_field"
+_GAME_STATE = "game_state"
+
+
+def session_config(thread_id: str, checkpoint_id: str | None = None, checkpoint_ns: str = "") -> RunnableConfig:
+    """Return the graph config of a game session, optionally pinned to one of its checkpoints."""
+    configurable = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}
+    if checkpoint_id is not None:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+def list_turns(graph: "CompiledStateGraph", config: RunnableConfig) -> list["StateSnapshot"]:
+    """
+    Return the checkpoints of a session the game can be resumed from, newest first.
+
+    A turn is a checkpoint taken between two scenes, i.e. one with a scene left to run.
+
+    Parameters
+    ----------
+    graph: CompiledStateGraph
+        Game graph compiled with a checkpointer.
+    config: RunnableConfig
+        Session config, see 'session_config'.
+
+    Returns
+    -------
+    list[StateSnapshot]
+        Resumable snapshots of the session, newest first.
+    """
+    return [snapshot for snapshot in graph.get_state_history(config) if snapshot.next]
+
+
+def rewind_config(graph: "CompiledStateGraph", config: RunnableConfig, turns: int) -> RunnableConfig:
+    """
+    Return the config of the checkpoint 'turns' scenes before the latest one of a session.
+
+    Invoking the graph with the returned config replays the session from that turn; the
+    previous continuation stays in the history as a separate branch.
+
+    Parameters
+    ----------
+    graph: CompiledStateGraph
+        Game graph compiled with a checkpointer.
+    config: RunnableConfig
+        Session config, see 'session_config'.
+    turns: int
+        Number of turns to go back. 0 is the latest resumable turn.
+
+    Returns
+    -------
+    RunnableConfig
+        Config pinned to the requested checkpoint.
+
+    Raises
+    ------
+    ValueError
+        If the session does not have that many turns.
+    """
+    history = list_turns(graph, config)
+    if not 0 <= turns < len(history):
+        raise ValueError(f"Cannot rewind {turns} turns, session has {len(history)} resumable turns.")
+    return history[turns].config
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer persisting game sessions in a local SQLite database.
+
+    Every graph step stores a checkpoint keyed by (thread_id, checkpoint_id), so
+    resuming a session and rewinding or branching from any earlier turn are
+    primary key lookups instead of save directory scans. The database runs in
+    WAL mode and commits in batches to keep per-turn write cost low; batches are
+    committed once 'batch_size' writes are pending, once the oldest pending write
+    is 'max_delay' seconds old, when a session moves to another scene type, and on
+    'flush' / 'close'.
+
+    Game state channels are serialized through the 'GameState' pydantic schema,
+    the same way as save files, so entities round-trip exactly.
+
+    Parameters
+    ----------
+    path: str or Path
+        Database file. Parent directories are created when missing.
+    batch_size: int, optional
+        Number of pending writes that triggers a commit, 1 to commit every write.
+    max_delay: float, optional
+        Maximum age of pending writes (in seconds) before the next write commits them.
+    serde: SerializerProtocol or None, optional
+        Serializer for checkpoint bookkeeping and non-state channels.
+
+    Notes
+    -----
+    Batching trades durability for write cost: a crash (not a normal exit) loses the
+    uncommitted writes, i.e. the turns since the last scene-type change, at most
+    'batch_size' - 1 writes. 'durability="sync"' only orders writes before the next
+    step, it does not commit them. Use 'batch_size=1' to commit every write.
+
+    Scene nodes update the state in place, so the graph has to be invoked with
+    'durability="sync"'; otherwise a checkpoint may be serialized after the next
+    scene already changed the shared objects.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        batch_size: int = CHECKPOINT_BATCH_SIZE,
+        max_delay: float = CHECKPOINT_MAX_DELAY,
+        serde: SerializerProtocol | None = None,
+    ):
+        if batch_size < 1:
+            raise ValueError(f"Checkpoint batch size must be at least 1, got {batch_size}.")
+        super().__init__(serde=serde)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self._pending = 0
+        self._first_pending = 0.0
+        self._scene_types: dict[str, str] = {}
+
+    def __enter__(self) -> "SQLiteCheckpointer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def flush(self) -> None:
+        """Commit all pending writes."""
+        with self.lock:
+            self._commit()
+
+    def close(self) -> None:
+        """Commit pending writes and close the database."""
+        with self.lock:
+            self._commit()
+            self.conn.close()
+
+    def _commit(self) -> None:
+        self.conn.commit()
+        self._pending = 0
+
+    def _written(self, scene_changed: bool = False) -> None:
+        if self._pending == 0:
+            self._first_pending = time.monotonic()
+        self._pending += 1
+        if (
+            scene_changed
+            or self._pending >= self.batch_size
+            or time.monotonic() - self._first_pending >= self.max_delay
+        ):
+            self._commit()
+
+    def _scene_changed(self, thread_id: str, writes: Sequence[tuple[str, Any]]) -> bool:
+        """Return whether writes move a session to another scene type than its previous writes."""
+        scene_types = [value for channel, value in writes if channel == "scene_type"]
+        if not scene_types:
+            return False
+        previous = self._scene_types.get(thread_id)
+        self._scene_types[thread_id] = scene_types[-1]
+        return previous is not None and previous != scene_types[-1]
+
+    def _dump_value(self, channel: str, value: Any) -> tuple[str, bytes]:
+        if channel in GameState.model_fields:
+            state = GameState.model_construct(**{channel: value})
+            return _STATE_FIELD, state.model_dump_json(include={channel}).encode("utf-8")
+        if isinstance(value, GameState):
+            return _GAME_STATE, value.model_dump_json().encode("utf-8")
+        return self.serde.dumps_typed(value)
+
+    def _load_value(self, channel: str, type_: str, data: bytes) -> Any:
+        if type_ == _STATE_FIELD:
+            state = GameState.model_construct()
+            GameState.__pydantic_validator__.validate_assignment(state, channel, json.loads(data)[channel])
+            return getattr(state, channel)
+        if type_ == _GAME_STATE:
+            return GameState.model_validate_json(data)
+        return self.serde.loads_typed((type_, data))
+
+    def _dump_checkpoint(self, checkpoint: Checkpoint) -> tuple[str, bytes]:
+        values = {channel: self._dump_value(channel, value) for channel, value in checkpoint["channel_values"].items()}
+        return self.serde.dumps_typed({**checkpoint, "channel_values": values})
+
+    def _load_checkpoint(self, type_: str, data: bytes) -> Checkpoint:
+        checkpoint = self.serde.loads_typed((type_, data))
+        values = checkpoint["channel_values"]
+        checkpoint["channel_values"] = {
+            channel: self._load_value(channel, value_type, value) for channel, (value_type, value) in values.items()
+        }
+        return checkpoint
+
+    def _to_tuple(self, row: tuple) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata_type, metadata = row
+        writes = self.conn.execute(
+            "SELECT task_id, channel, type, value, task_path, idx FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        writes.sort(key=lambda write: writes_sort_key(write[4], write[0], write[5]))
+        return CheckpointTuple(
+            config=session_config(thread_id, checkpoint_id, checkpoint_ns),
+            checkpoint=self._load_checkpoint(type_, checkpoint),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            pending_writes=[
+                (task_id, channel, self._load_value(channel, value_type, value))
+                for task_id, channel, value_type, value, _, _ in writes
+            ],
+            parent_config=(
+                session_config(thread_id, parent_checkpoint_id, checkpoint_ns) if parent_checkpoint_id else None
+            ),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """Return the requested checkpoint of a thread, or its latest checkpoint if no id is given."""
+        configurable = config["configurable"]
+        query = f"SELECT {_COLUMNS} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        params: tuple = (configurable["thread_id"], configurable.get("checkpoint_ns", ""))
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self.lock:
+            row = self.conn.execute(query, params).fetchone()
+            return self._to_tuple(row) if row is not None else None
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints newest first, optionally filtered by thread, metadata and checkpoint id."""
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"SELECT {_COLUMNS} FROM checkpoints {where} ORDER BY checkpoint_id DESC"
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        found = 0
+        for row in rows:
+            if limit is not None and found >= limit:
+                return
+            with self.lock:
+                checkpoint_tuple = self._to_tuple(row)
+            if filter and any(checkpoint_tuple.metadata.get(key) != value for key, value in filter.items()):
+                continue
+            found += 1
+            yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint and return the config pointing at it."""
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        type_, data = self._dump_checkpoint(checkpoint)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    configurable.get("checkpoint_id"),
+                    type_,
+                    data,
+                    metadata_type,
+                    metadata_data,
+                ),
+            )
+            self._written()
+        return session_config(thread_id, checkpoint["id"], checkpoint_ns)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store the writes of a task linked to a checkpoint."""
+        configurable = config["configurable"]
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        rows = [
+            (
+                configurable["thread_id"],
+                configurable.get("checkpoint_ns", ""),
+                configurable["checkpoint_id"],
+                task_id,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self._dump_value(channel, value),
+                task_path,
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        with self.lock:
+            self.conn.executemany(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._written(self._scene_changed(configurable["thread_id"], writes))
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes of a thread."""
+        with self.lock:
+            self.conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            self.conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            self._scene_types.pop(thread_id, None)
+            self._commit()
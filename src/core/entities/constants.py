@@ -1 +1,5 @@
 HISTORY_LENGTH = 100
+HISTORY_VERBATIM_LENGTH = 30
+CHAPTER_LENGTH = 20
+MAX_CHAPTERS = 10
+CHAPTERS_PER_ARC = 5
@@ -0,0 +1,141 @@
+from array import array
+from collections import deque
+from enum import IntEnum
+from typing import Any, Iterable, Iterator
+
+from pydantic_core import core_schema
+
+from core.entities.constants import HISTORY_LENGTH
+
+
+class HistoryKind(IntEnum):
+    """Speaker of a history entry, stored instead of the entry's text prefix."""
+
+    TEXT = 0
+    DUNGEON_MASTER = 1
+    PLAYER_ACTION = 2
+    PLAYER_REPLY = 3
+    EXPLORATION = 4
+    PUZZLE = 5
+
+
+HISTORY_PREFIXES = ("", "dungeon master: ", "player action: ", "player reply: ", "exploration: ", "puzzle: ")
+_KINDS = {prefix[:-2]: HistoryKind(kind) for kind, prefix in enumerate(HISTORY_PREFIXES) if prefix}
+
+
+def split_entry(entry: str) -> tuple[HistoryKind, str]:
+    """Split a history entry into its kind and its text without the kind prefix."""
+    head, separator, text = entry.partition(": ")
+    kind = _KINDS.get(head) if separator else None
+    return (kind, text) if kind is not None else (HistoryKind.TEXT, entry)
+
+
+class HistoryBuffer:
+    """
+    Bounded ring buffer of history entries stored as (kind, text) pairs.
+
+    Entries are appended and read as plain strings such as "player action: Run", but
+    the well-known prefixes are stored as one byte per entry in an array (see
+    'HistoryKind'), so every entry keeps only its own text. Storage grows with the
+    number of entries up to 'maxlen'; once full, appending overwrites the oldest entry
+    like a 'deque' with a 'maxlen'.
+
+    Parameters
+    ----------
+    entries: Iterable[str], optional
+        Initial entries, oldest first. Only the last 'maxlen' are kept.
+    maxlen: int, optional
+        Maximum number of entries.
+
+    Notes
+    -----
+    The buffer supports the 'deque' operations the game uses ('append', 'popleft',
+    'len', iteration, 'reversed', indexing and 'in') and is serialized by Pydantic as
+    a list of strings, so saves are unchanged.
+    """
+
+    __slots__ = ("maxlen", "_kinds", "_texts", "_start", "_size")
+
+    def __init__(self, entries: Iterable[str] = (), maxlen: int = HISTORY_LENGTH):
+        self.maxlen = maxlen
+        self._start = 0
+        # Entries are split in bulk into storage sized for them, as loading a save fills the whole buffer at once.
+        pairs = [split_entry(entry) for entry in deque(entries, maxlen=maxlen)] if maxlen else []
+        self._size = len(pairs)
+        self._kinds = array("B", [kind for kind, _ in pairs])
+        self._texts: list[str] = [text for _, text in pairs]
+
+    def _grow(self) -> None:
+        """Move the entries to the front of larger storage, at most 'maxlen' entries."""
+        capacity = min(self.maxlen, max(8, 2 * len(self._texts)))
+        order = [(self._start + i) % len(self._texts) for i in range(self._size)] if self._texts else []
+        self._kinds = array("B", [self._kinds[i] for i in order]) + array("B", bytes(capacity - self._size))
+        self._texts = [self._texts[i] for i in order] + [""] * (capacity - self._size)
+        self._start = 0
+
+    def append(self, entry: str) -> None:
+        """Append an entry, dropping the oldest one when the buffer is full."""
+        if self.maxlen == 0:
+            return
+        if self._size == self.maxlen:
+            self.popleft()
+        if self._size == len(self._texts):
+            self._grow()
+        kind, text = split_entry(entry)
+        index = (self._start + self._size) % len(self._texts)
+        self._kinds[index], self._texts[index] = kind, text
+        self._size += 1
+
+    def popleft(self) -> str:
+        """Remove and return the oldest entry."""
+        if not self._size:
+            raise IndexError("pop from an empty history")
+        entry = self._entry(self._start)
+        self._texts[self._start] = ""
+        self._start = (self._start + 1) % len(self._texts)
+        self._size -= 1
+        return entry
+
+    def clear(self) -> None:
+        self._kinds, self._texts, self._start, self._size = array("B"), [], 0, 0
+
+    def _entry(self, index: int) -> str:
+        return HISTORY_PREFIXES[self._kinds[index]] + self._texts[index]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, i: int) -> str:
+        if not -self._size <= i < self._size:
+            raise IndexError("history index out of range")
+        return self._entry((self._start + i % self._size) % len(self._texts))
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[i] for i in range(self._size))
+
+    def __reversed__(self) -> Iterator[str]:
+        return (self[i] for i in range(self._size - 1, -1, -1))
+
+    def __contains__(self, entry: object) -> bool:
+        if not isinstance(entry, str):
+            return False
+        kind, text = split_entry(entry)
+        slots = ((self._start + i) % len(self._texts) for i in range(self._size))
+        return any(self._kinds[index] == kind and self._texts[index] == text for index in slots)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, HistoryBuffer):
+            return NotImplemented
+        return self._size == other._size and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"HistoryBuffer({list(self)!r}, maxlen={self.maxlen})"
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: Any) -> core_schema.CoreSchema:
+        from_list = core_schema.no_info_after_validator_function(cls, core_schema.list_schema(core_schema.str_schema()))
+        return core_schema.json_or_python_schema(
+            json_schema=from_list,
+            python_schema=core_schema.union_schema([core_schema.is_instance_schema(cls), from_list]),
+            serialization=core_schema.plain_serializer_function_ser_schema(list),
+        )
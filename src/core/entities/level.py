@@ -1,10 +1,11 @@
+import threading
 from abc import ABC, abstractmethod
+from bisect import bisect_right
 
 from pydantic import BaseModel, PrivateAttr
 from rich.console import Console
 from typing import Callable
 
-
 console = Console()
 
 
@@ -13,9 +14,16 @@ class ExperienceCurve(ABC):
     Abstract base class representing an experience (XP) progression curve.
 
     Subclasses define how much experience is required to reach the next level
-    based on the current level.
+    based on the current level. Curves compare equal when they are of the same
+    type and have the same parameters, which lets equal curves share one 'XPTable'.
     """
 
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and vars(self) == vars(other)
+
+    def __hash__(self) -> int:
+        return hash((type(self), tuple(sorted(vars(self).items()))))
+
     @abstractmethod
     def xp_for_next_level(self, level: int) -> int:
         """
@@ -107,20 +115,114 @@ class ExponentialCurve(ExperienceCurve):
         return int(self.base_xp * (self.multiplier ** (level - 1)))
 
 
-def level_up_message_callback(level: int) -> None:
+class XPTable:
+    """
+    Cumulative experience table of an experience curve.
+
+    Entry 'L' of the table holds the total experience needed to reach level 'L'
+    from level 1. The table is extended lazily and shared by all 'Level' instances
+    using an equal curve, so each level threshold is computed once per process.
+    """
+
+    _tables: dict[ExperienceCurve, "XPTable"] = {}
+    _tables_lock = threading.Lock()
+
+    def __init__(self, curve: ExperienceCurve):
+        self.curve = curve
+        self._cumulative = [0, 0]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_curve(cls, curve: ExperienceCurve) -> "XPTable":
+        """
+        Return the shared table for a curve, creating it on first use.
+
+        Parameters
+        ----------
+        curve: ExperienceCurve
+            Experience curve the table is built from.
+
+        Returns
+        -------
+        XPTable
+            Table shared by every equal curve.
+        """
+        table = cls._tables.get(curve)
+        if table is None:
+            with cls._tables_lock:
+                table = cls._tables.setdefault(curve, cls(curve))
+        return table
+
+    def _extend(self, level: int | None = None, total_xp: int | None = None) -> None:
+        """Extend the table until it covers 'level' and exceeds 'total_xp'."""
+        with self._lock:
+            cumulative = self._cumulative
+            while (level is not None and len(cumulative) <= level) or (
+                total_xp is not None and cumulative[-1] <= total_xp
+            ):
+                current = len(cumulative) - 1
+                step = self.curve.xp_for_next_level(current)
+                if step <= 0:
+                    raise ValueError(f"Experience curve must require positive XP per level, got {step}.")
+                cumulative.append(cumulative[-1] + step)
+
+    def total_xp(self, level: int) -> int:
+        """
+        Return the total experience needed to reach a level from level 1.
+
+        Parameters
+        ----------
+        level: int
+            Target level (1 or higher).
+
+        Returns
+        -------
+        int
+            Cumulative experience threshold of the level.
+        """
+        if len(self._cumulative) <= level:
+            self._extend(level=level)
+        return self._cumulative[level]
+
+    def resolve(self, total_xp: int) -> tuple[int, int]:
+        """
+        Resolve a total amount of experience into a level and the remaining experience.
+
+        Parameters
+        ----------
+        total_xp: int
+            Total experience accumulated since level 1.
+
+        Returns
+        -------
+        tuple[int, int]
+            The reached level and the experience collected towards the next one.
+        """
+        if self._cumulative[-1] <= total_xp:
+            self._extend(total_xp=total_xp)
+        level = bisect_right(self._cumulative, total_xp, lo=1) - 1
+        return level, total_xp - self._cumulative[level]
+
+
+def level_up_message_callback(levels: range) -> None:
     """
     Display a level-up message in the console.
 
     This callback function is intended to be triggered when a player
-    advances to a new level. It prints a formatted message to the console
-    indicating the achieved level.
+    advances to one or more new levels at once. It prints a single formatted
+    message to the console indicating the highest achieved level.
 
     Parameters
     ----------
-    level: int
-        The new level reached by the player.
+    levels: range
+        The new levels reached by the player, in ascending order.
     """
-    console.print(f"[bold green]Level up! Player reached level {level}![/bold green]")
+    gained = f" (+{len(levels)} levels)" if len(levels) > 1 else ""
+    console.print(f"[bold green]Level up! Player reached level {levels[-1]}!{gained}[/bold green]")
+
+
+DEFAULT_CURVE = ExponentialCurve()
+DEFAULT_LEVELS_GAINED_CALLBACKS: tuple[Callable[[range], None], ...] = (level_up_message_callback,)
 
 
 class Level(BaseModel):
@@ -128,27 +230,40 @@ class Level(BaseModel):
     Model representing a leveling system with experience accumulation.
 
     The 'Level' class tracks the current level and experience points of an entity.
-    It supports configurable experience curves and level-up callbacks that are
-    triggered whenever a new level is reached.
+    It supports configurable experience curves and level-up callbacks. Callbacks in
+    '_on_level_up' are called once per reached level with that level, callbacks in
+    '_on_levels_gained' are called once per experience gain with the whole range of
+    reached levels.
+
+    Notes
+    -----
+    Levels share the default curve ('DEFAULT_CURVE') and default callback tuples
+    instead of holding their own copies. Register callbacks with 'add_level_up_callback'
+    and 'add_levels_gained_callback', which replace the shared tuple of one level only.
     """
 
     level: int = 1
     experience: int = 0
 
-    _curve: ExperienceCurve = PrivateAttr(default_factory=ExponentialCurve)
-    _on_level_up: list[Callable] = PrivateAttr(default_factory=list)
+    _curve: ExperienceCurve = PrivateAttr(default_factory=lambda: DEFAULT_CURVE)
+    _on_level_up: tuple[Callable[[int], None], ...] = PrivateAttr(default=())
+    _on_levels_gained: tuple[Callable[[range], None], ...] = PrivateAttr(default=DEFAULT_LEVELS_GAINED_CALLBACKS)
 
     def __eq__(self, other) -> bool:
         return isinstance(other, Level) and self.level == other.level and self.experience == other.experience
 
-    def model_post_init(self, __context) -> None:
-        """
-        Perform post-initialization setup for the model.
+    def add_level_up_callback(self, callback: Callable[[int], None]) -> None:
+        """Register a callback called with each level reached by this level."""
+        self._on_level_up = (*self._on_level_up, callback)
 
-        This method registers default level-up callbacks after the Pydantic
-        model has been fully initialized.
-        """
-        self._on_level_up.append(level_up_message_callback)
+    def add_levels_gained_callback(self, callback: Callable[[range], None]) -> None:
+        """Register a callback called with the range of levels reached by each experience gain."""
+        self._on_levels_gained = (*self._on_levels_gained, callback)
+
+    @property
+    def total_experience(self) -> int:
+        """Total experience accumulated since level 1."""
+        return XPTable.for_curve(self._curve).total_xp(self.level) + self.experience
 
     def gain_experience(self, amount: int) -> None:
         """
@@ -169,14 +284,14 @@ class Level(BaseModel):
         """
         Process all level-ups resulting from accumulated experience.
 
-        This method repeatedly checks whether the current experience exceeds
-        the threshold for the next level and applies level increases until
-        the experience is below the required amount.
+        The accumulated experience is resolved against the curve's cumulative
+        'XPTable' with a binary search, so large grants cost the same as small ones.
         """
-        while self.experience >= self._xp_needed():
-            self.experience -= self._xp_needed()
-            self.level += 1
-            self._emit_level_up()
+        new_level, experience = XPTable.for_curve(self._curve).resolve(self.total_experience)
+        if new_level > self.level:
+            levels = range(self.level + 1, new_level + 1)
+            self.level, self.experience = new_level, experience
+            self._emit_level_up(levels)
 
     def _xp_needed(self) -> int:
         """
@@ -187,13 +302,23 @@ class Level(BaseModel):
         int
             Experience points required for the next level.
         """
-        return self._curve.xp_for_next_level(self.level)
+        table = XPTable.for_curve(self._curve)
+        return table.total_xp(self.level + 1) - table.total_xp(self.level)
 
-    def _emit_level_up(self) -> None:
+    def _emit_level_up(self, levels: range) -> None:
         """
         Invoke all registered level-up callbacks.
 
-        Each callback is called with the newly reached level as its argument.
+        Batch callbacks are called once with the whole range of reached levels,
+        per-level callbacks are called for each reached level in ascending order.
+
+        Parameters
+        ----------
+        levels: range
+            Newly reached levels.
         """
-        for callback in self._on_level_up:
-            callback(self.level)
+        for batch_callback in self._on_levels_gained:
+            batch_callback(levels)
+        for level in levels:
+            for callback in self._on_level_up:
+                callback(level)
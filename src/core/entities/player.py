@@ -9,7 +9,7 @@ from core.entities.race import Race
 from core.entities.player_class import PlayerClass, get_class_modifiers
 
 
-@dataclass
+@dataclass(slots=True)
 class Player:
     """
     Represents the player-controlled character in the game world.
@@ -18,6 +18,7 @@ class Player:
     inventory, and class-based skill modifiers.
     The Player class also provides derived combat-related calculations such as attack, defense, and escape chance,
     based on class modifiers, equipment, and random variation.
+    Instances are slotted and share their class modifiers, so idle sessions stay small.
     """
 
     name: str
@@ -1,9 +1,14 @@
-from collections import deque
 from itertools import islice
-from typing import Literal, Any
-from pydantic import BaseModel, field_serializer, field_validator, Field
-
-from core.entities.constants import HISTORY_LENGTH
+from typing import Literal
+from pydantic import BaseModel, Field
+
+from core.entities.constants import (
+    CHAPTER_LENGTH,
+    CHAPTERS_PER_ARC,
+    HISTORY_VERBATIM_LENGTH,
+    MAX_CHAPTERS,
+)
+from core.entities.history import HistoryBuffer
 from core.entities.player import Player
 from core.entities.world import World
 
@@ -15,8 +20,8 @@ class GameState(BaseModel):
     This object is stored and transferred between nodes in the state graph.
     It holds information about the player, the world, and the current
     storytelling context (scene type). The 'history' field maintains a
-    limited-length queue of recent narration strings which can be serialized
-    and deserialized transparently using Pydantic field hooks.
+    limited-length queue of recent narration strings which is serialized as a
+    plain list of strings.
 
     Parameters
     ----------
@@ -24,10 +29,18 @@ class GameState(BaseModel):
         The current player instance including stats and attributes.
     world: World
         The representation of the game world, map, flags and persistent data.
-    history: deque[str]
-        A deque storing textual narration history. The number of elements is
-        limited by 'HISTORY_LENGTH'. During serialization it is converted to
-        a list, and recreated back into a deque on load.
+    history: HistoryBuffer
+        A ring buffer storing textual narration history. The number of elements
+        is limited by 'HISTORY_LENGTH'. Entry prefixes such as "player action: "
+        are stored compactly as entry kinds (see 'HistoryBuffer').
+    chapters: list[str]
+        Summaries of older history, oldest first. Entries are moved from
+        'history' into chapters by 'fold_history' so the verbatim history stays
+        short while older story facts remain available.
+    provisional_chapters: list[str]
+        Chapters still holding raw text because their summary has not been merged
+        yet. They are saved with the state so a restarted game summarizes them
+        (see 'nodes.summarization.compact_history').
     scene_type: {"narration", "exploration", "combat", "dialogue", "camp", "puzzle"}, default="narration"
         Identifies the active scene type. Used by the state graph to route the
         next node execution.
@@ -39,30 +52,22 @@ class GameState(BaseModel):
 
     Notes
     -----
-    The history field uses '@field_serializer' to export deque as a list
-    and '@field_validator' to convert incoming list-like objects into
-    'deque(maxlen=HISTORY_LENGTH)'.
+    The history field accepts any list-like of strings (e.g. a 'deque') and
+    converts it into a 'HistoryBuffer' keeping the last 'HISTORY_LENGTH' entries.
     """
 
     player: Player
     world: World
-    history: deque[str] = Field(default_factory=lambda: deque(maxlen=HISTORY_LENGTH))
+    history: HistoryBuffer = Field(default_factory=HistoryBuffer)
+    chapters: list[str] = Field(default_factory=list)
+    provisional_chapters: list[str] = Field(default_factory=list)
     scene_type: Literal["narration", "exploration", "combat", "dialogue", "camp", "puzzle"] = "narration"
     lore: str | None = None
     exit: bool = False
 
-    @field_serializer("history")
-    def serialize_deque(self, value: deque):
-        return list(value)
-
-    @field_validator("history", mode="before")
-    @classmethod
-    def deserialize_deque(cls, value: Any) -> deque:
-        return deque(value, maxlen=HISTORY_LENGTH)
-
     def append_history(self, s: str) -> None:
         """
-        Append a new narration entry to the history deque.
+        Append a new narration entry to the history.
 
         Parameters
         ----------
@@ -79,7 +84,7 @@ class GameState(BaseModel):
         ----------
         limit: int, optional
             Maximum number of history records to return from the right side
-            of the deque. Default is 10.
+            of the history. Default is 10.
 
         Returns
         -------
@@ -100,9 +105,93 @@ class GameState(BaseModel):
 
         Notes
         -----
-        This operation modifies the internal `history` deque in place by
-        removing entries from the left side of the deque.
+        This operation modifies the internal `history` buffer in place by
+        removing entries from its oldest end.
         """
         for _ in range(records):
             if self.history:
                 self.history.popleft()
+
+    def fold_history(
+        self, keep: int = HISTORY_VERBATIM_LENGTH, chapter_length: int = CHAPTER_LENGTH
+    ) -> tuple[str, list[str]] | None:
+        """
+        Move the oldest history entries into a new chapter once the history grows too long.
+
+        The chapter initially holds the raw entries joined together (a provisional
+        chapter) so no story facts are lost; callers are expected to replace it with
+        a summary via 'replace_chapter'.
+
+        Parameters
+        ----------
+        keep: int, optional
+            Number of most recent entries always kept verbatim.
+        chapter_length: int, optional
+            Number of entries folded into a single chapter.
+
+        Returns
+        -------
+        tuple[str, list[str]] or None
+            The provisional chapter text and the folded entries, or None if the
+            history is not long enough to fold.
+        """
+        if len(self.history) < keep + chapter_length:
+            return None
+        entries = [self.history.popleft() for _ in range(chapter_length)]
+        provisional = " | ".join(entries)
+        self.chapters.append(provisional)
+        self.provisional_chapters.append(provisional)
+        return provisional, entries
+
+    def fold_chapters(
+        self, max_chapters: int = MAX_CHAPTERS, chapters_per_arc: int = CHAPTERS_PER_ARC
+    ) -> tuple[str, list[str]] | None:
+        """
+        Merge the oldest chapters into a single provisional arc once there are too many.
+
+        Parameters
+        ----------
+        max_chapters: int, optional
+            Maximum number of chapters kept before merging.
+        chapters_per_arc: int, optional
+            Number of oldest chapters merged into one.
+
+        Returns
+        -------
+        tuple[str, list[str]] or None
+            The provisional merged chapter and the merged chapters, or None if
+            there are not enough chapters to merge.
+        """
+        if len(self.chapters) <= max_chapters:
+            return None
+        merged = self.chapters[:chapters_per_arc]
+        provisional = "\n".join(merged)
+        self.chapters[:chapters_per_arc] = [provisional]
+        self.provisional_chapters = [chapter for chapter in self.provisional_chapters if chapter not in merged]
+        self.provisional_chapters.append(provisional)
+        return provisional, merged
+
+    def replace_chapter(self, provisional: str, summary: str) -> bool:
+        """
+        Replace a provisional chapter with its summary.
+
+        Parameters
+        ----------
+        provisional: str
+            Provisional chapter text returned by 'fold_history' or 'fold_chapters'.
+        summary: str
+            Summary replacing it.
+
+        Returns
+        -------
+        bool
+            False if the provisional chapter no longer exists (e.g. it was merged in the meantime).
+        """
+        try:
+            index = self.chapters.index(provisional)
+        except ValueError:
+            return False
+        self.chapters[index] = summary
+        if provisional in self.provisional_chapters:
+            self.provisional_chapters.remove(provisional)
+        return True
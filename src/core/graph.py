@@ -1,33 +1,86 @@
-from langgraph.graph import StateGraph, END
-from langgraph.graph.state import CompiledStateGraph
+import importlib
+from functools import cache
+from typing import TYPE_CHECKING, Callable
 
 from core import GameState
-from nodes import narration, combat, dialogue, exploration, camp, puzzle
 
+if TYPE_CHECKING:
+    from langgraph.checkpoint.base import BaseCheckpointSaver
+    from langgraph.graph.state import CompiledStateGraph
 
-NODE_MAP = {
-    "narration": narration,
-    "exploration": exploration,
-    "combat": combat,
-    "dialogue": dialogue,
-    "camp": camp,
-    "puzzle": puzzle,
-}
+    from core.profiling import TurnProfiler
 
 
-def build_graph(start_node: str = "narration") -> CompiledStateGraph:
+def lazy_node(name: str) -> Callable[[GameState], GameState]:
+    """
+    Return a graph node that imports its implementation from 'nodes' on first call.
+
+    Scene nodes pull in the LLM clients, prompt tooling and lore store, so they
+    are only loaded once the game actually enters the scene.
+
+    Parameters
+    ----------
+    name: str
+        Scene node name, also the name of its module and function in 'nodes'.
+
+    Returns
+    -------
+    Callable[[GameState], GameState]
+        Graph node delegating to 'nodes.<name>.<name>'.
+    """
+
+    def node(state: GameState) -> GameState:
+        return getattr(importlib.import_module(f"nodes.{name}"), name)(state)
+
+    node.__name__ = name
+    return node
+
+
+NODE_MAP = {name: lazy_node(name) for name in ("narration", "exploration", "combat", "dialogue", "camp", "puzzle")}
+
+
+def route_scene(state: GameState) -> str:
+    """
+    Return the graph node that plays the next scene of 'state'.
+
+    Parameters
+    ----------
+    state: GameState
+        Current game state.
+
+    Returns
+    -------
+    str
+        "END" if the player quit, otherwise the node matching 'state.scene_type'.
+        Unknown scene types are corrected to "narration".
+    """
+    if state.exit is True:
+        return "END"
+    if state.scene_type not in NODE_MAP:
+        state.scene_type = "narration"
+    return state.scene_type
+
+
+def build_graph(
+    checkpointer: "BaseCheckpointSaver | None" = None, profiler: "TurnProfiler | None" = None
+) -> "CompiledStateGraph":
     """
     Build and compile the game's state graph (StateGraph) based on 'GameState'.
 
     This function registers all scene nodes, defines transition rules using the
-    'next_from_scene' dispatcher, sets the entry point, and compiles the graph into
-    a 'CompiledStateGraph' instance ready to be executed by LangGraph.
+    'route_scene' dispatcher, routes the entry point to the scene of the input state,
+    and compiles the graph into a 'CompiledStateGraph' instance ready to be executed by LangGraph.
+
+    Use 'get_graph' to share one compiled graph between sessions; compiling is only
+    needed once per checkpointer.
 
     Parameters
     ----------
-    start_node: str, optional
-        Name of the initial graph node to be used as the entry point.
-        Defaults to "narration". Must match one of the registered nodes.
+    checkpointer: BaseCheckpointSaver or None, optional
+        Saver persisting a checkpoint after every scene, e.g. 'core.checkpoint.SQLiteCheckpointer'.
+        Required to resume or rewind sessions through the graph's thread config.
+    profiler: TurnProfiler or None, optional
+        Profiler wrapping every scene node (see 'core.profiling'). Nodes are not wrapped if None.
 
     Returns
     -------
@@ -36,26 +89,25 @@ def build_graph(start_node: str = "narration") -> CompiledStateGraph:
 
     Notes
     -----
-    - The transition logic is centralized in the internal 'next_from_scene' function,
+    - The transition logic is centralized in the 'route_scene' function,
       which evaluates 'state.exit' and 'state.scene_type'.
+    - The entry point dispatches on 'state.scene_type' as well, so a game resumed from a save
+      starts in its saved scene without recompiling the graph.
     - If 'state.exit' is 'True', the graph transitions to 'END'.
     - If 'state.scene_type' does not match any known scene, it is automatically corrected to "narration".
     - Conditional edges for each scene define which scenes can follow, including transitions to 'END' when allowed.
     """
+    from langgraph.graph import StateGraph, END
+
     graph = StateGraph(GameState)
-    for name, fn in NODE_MAP.items():
+    nodes = profiler.wrap_nodes(NODE_MAP) if profiler is not None else NODE_MAP
+    for name, fn in nodes.items():
         graph.add_node(name, fn)
 
-    def next_from_scene(state: GameState):
-        if state.exit is True:
-            return "END"
-        if state.scene_type not in ("narration", "exploration", "combat", "dialogue", "camp", "puzzle"):
-            state.scene_type = "narration"
-        return state.scene_type
-
+    graph.set_conditional_entry_point(route_scene, {**{name: name for name in NODE_MAP}, "END": END})
     graph.add_conditional_edges(
         "narration",
-        next_from_scene,
+        route_scene,
         {
             "narration": "narration",
             "combat": "combat",
@@ -67,7 +119,7 @@ def build_graph(start_node: str = "narration") -> CompiledStateGraph:
     )
     graph.add_conditional_edges(
         "exploration",
-        next_from_scene,
+        route_scene,
         {
             "narration": "narration",
             "combat": "combat",
@@ -78,12 +130,12 @@ def build_graph(start_node: str = "narration") -> CompiledStateGraph:
     )
     graph.add_conditional_edges(
         "dialogue",
-        next_from_scene,
+        route_scene,
         {"combat": "combat", "narration": "narration", "dialogue": "dialogue", "puzzle": "puzzle"},
     )
     graph.add_conditional_edges(
         "camp",
-        next_from_scene,
+        route_scene,
         {
             "narration": "narration",
             "dialogue": "dialogue",
@@ -91,10 +143,34 @@ def build_graph(start_node: str = "narration") -> CompiledStateGraph:
     )
     graph.add_conditional_edges(
         "puzzle",
-        next_from_scene,
+        route_scene,
         {"narration": "narration", "dialogue": "dialogue", "combat": "combat"},
     )
     graph.add_edge("combat", "narration")
 
-    graph.set_entry_point(start_node)
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
+
+
+@cache
+def get_graph(
+    checkpointer: "BaseCheckpointSaver | None" = None, profiler: "TurnProfiler | None" = None
+) -> "CompiledStateGraph":
+    """
+    Return the compiled game graph for a checkpointer, compiling it on first use.
+
+    A compiled graph holds no session state (sessions are separated by the thread id in
+    the invocation config), so every session hosted by the process shares it.
+
+    Parameters
+    ----------
+    checkpointer: BaseCheckpointSaver or None, optional
+        Saver the graph persists checkpoints to.
+    profiler: TurnProfiler or None, optional
+        Profiler wrapping every scene node.
+
+    Returns
+    -------
+    CompiledStateGraph
+        Shared compiled game graph.
+    """
+    return build_graph(checkpointer, profiler)
@@ -0,0 +1,173 @@
+import argparse
+import hashlib
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import chain
+from pathlib import Path
+
+from core.save import load_key_ring, make_fernet
+from core.save_scanner import chunked, iter_save_paths
+from core.save_store import OBJECTS_DIR, ObjectStore, split_encrypted
+
+PROGRESS_FILE = ".key_rotation.progress"
+
+
+@dataclass
+class RotationReport:
+    """
+    Summary of a save directory key rotation.
+
+    Attributes
+    ----------
+    rotated: int
+        Number of saves re-encrypted with the current key.
+    skipped: int
+        Number of saves left untouched (plain JSON saves, or saves already rotated by an interrupted run).
+    errors: list[tuple[str, str]]
+        Saves that could not be rotated, as (path, error message) pairs.
+    """
+
+    rotated: int = 0
+    skipped: int = 0
+    errors: list[tuple[str, str]] = field(default_factory=list)
+
+
+def key_fingerprint(key: bytes) -> str:
+    """Return a short, non-reversible identifier of a key, safe to store on disk."""
+    return hashlib.sha256(key).hexdigest()[:16]
+
+
+def _replace_atomically(path: Path, data: bytes) -> None:
+    """Write 'data' next to 'path' and atomically swap it in, so a crash never leaves a torn save."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _rotate_chunk(paths: list[str], keys: list[bytes]) -> list[tuple[str, str, str | None]]:
+    """Re-encrypt a chunk of saves in a worker process. Returns (path, status, error) triples."""
+    fernet = make_fernet(keys)
+    results = []
+    for path in paths:
+        try:
+            encrypted = split_encrypted(Path(path).read_bytes())
+            if encrypted is None:
+                results.append((path, "skipped", None))
+                continue
+            framing, token = encrypted
+            _replace_atomically(Path(path), framing + fernet.rotate(token))
+            results.append((path, "rotated", None))
+        except Exception as e:
+            results.append((path, "error", f"{type(e).__name__}: {e}"))
+    return results
+
+
+def _read_progress(progress_path: Path, fingerprint: str) -> set[str]:
+    """Return the saves already rotated to the given key by an interrupted run."""
+    if not progress_path.exists():
+        return set()
+    lines = progress_path.read_text(encoding="utf-8").splitlines()
+    if not lines or lines[0] != fingerprint:
+        return set()
+    return set(lines[1:])
+
+
+def rotate_saves(
+    save_dir: str | Path,
+    encryption_key: bytes | list[bytes] | None = None,
+    workers: int | None = None,
+    chunk_size: int = 64,
+    pattern: str = "*.sav",
+) -> RotationReport:
+    """
+    Re-encrypt every save in a directory with the current key of the key ring.
+
+    Saves are rotated in parallel worker processes. Each file is replaced atomically,
+    and completed files are recorded in a progress file so an interrupted rotation
+    can be resumed without redoing finished work. The progress file is removed once
+    every save has been rotated successfully. Snapshots and the objects they share
+    (see 'core.save_store') are rotated too; objects keep their addresses.
+
+    Parameters
+    ----------
+    save_dir: str or Path
+        Directory containing save files.
+    encryption_key: bytes, list[bytes] or None, optional
+        Key ring with the new key first, followed by the retired keys. Defaults to
+        the environment key ring (see 'load_key_ring').
+    workers: int or None, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    chunk_size: int, optional
+        Number of saves rotated per task.
+    pattern: str, optional
+        Glob pattern selecting save files.
+
+    Returns
+    -------
+    RotationReport
+        Number of rotated and skipped saves and the saves that failed.
+    """
+    save_dir = Path(save_dir)
+    keys = load_key_ring(encryption_key)
+    workers = workers or os.cpu_count() or 1
+    progress_path = save_dir / PROGRESS_FILE
+    fingerprint = key_fingerprint(keys[0])
+
+    done_before = _read_progress(progress_path, fingerprint)
+    report = RotationReport(skipped=len(done_before))
+    if not done_before:
+        progress_path.write_text(f"{fingerprint}\n", encoding="utf-8")
+
+    paths = chain(iter_save_paths(save_dir, pattern), map(str, ObjectStore(save_dir / OBJECTS_DIR)))
+    remaining = (path for path in paths if Path(path).name not in done_before)
+    with open(progress_path, "a", encoding="utf-8") as progress, ProcessPoolExecutor(max_workers=workers) as executor:
+
+        def record(futures) -> None:
+            for future in futures:
+                for path, status, error in future.result():
+                    if status == "error":
+                        report.errors.append((path, error))
+                        continue
+                    if status == "rotated":
+                        report.rotated += 1
+                    else:
+                        report.skipped += 1
+                    progress.write(f"{Path(path).name}\n")
+            progress.flush()
+
+        pending = set()
+        for chunk in chunked(remaining, chunk_size):
+            pending.add(executor.submit(_rotate_chunk, chunk, keys))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                record(done)
+        record(pending)
+
+    if not report.errors:
+        progress_path.unlink()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Re-encrypt all saves with the current key. The new key is read from SAVE_AES_KEY, "
+            "retired keys from the comma-separated SAVE_AES_OLD_KEYS."
+        )
+    )
+    parser.add_argument("save_dir")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    report = rotate_saves(args.save_dir, workers=args.workers)
+    print(f"Rotated: {report.rotated}, skipped: {report.skipped}, failed: {len(report.errors)}")
+    for path, message in report.errors:
+        print(f"Could not rotate {path}: {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+import argparse
+import cProfile
+import functools
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from core import GameState
+
+PROFILE_DIR = "profiles"
+PROFILE_KEEP_TURNS = 200
+PROFILE_ALLOCATION_SITES = 50
+TRACEMALLOC_FRAMES = 1
+
+# Where a turn's time goes, by the source path of the functions it spends its own time in.
+CATEGORIES = {
+    "llm": ("langchain", "openai", "httpx", "httpcore", "tiktoken", "/nodes/llm.py", "/nodes/streaming.py"),
+    "lore": ("chromadb", "/data/lore/", "/nodes/lore_search.py"),
+    "pydantic": ("pydantic",),
+    "rendering": ("rich",),
+    "disk": ("/core/save", "/core/checkpoint.py", "sqlite3", "zlib", "cryptography"),
+    "graph": ("langgraph",),
+}
+
+
+def profiling_from_env() -> "TurnProfiler | None":
+    """
+    Return a turn profiler configured by the environment, None unless 'PROFILE' is set.
+
+    'PROFILE' is the number of turns between profiled turns ("1" profiles every turn),
+    'PROFILE_DIR' the profile directory.
+    """
+    every = os.getenv("PROFILE")
+    if not every:
+        return None
+    return TurnProfiler(os.getenv("PROFILE_DIR", PROFILE_DIR), every=int(every))
+
+
+def categorize(filename: str, function: str = "") -> str:
+    """
+    Return the 'CATEGORIES' entry of a function, "other" if it matches none.
+
+    Built-in functions have no source file; they are matched by their name, which names
+    their module (e.g. "<method 'validate_json' of 'pydantic_core...' objects>").
+    """
+    path = filename.replace(os.sep, "/") + ":" + function
+    for category, patterns in CATEGORIES.items():
+        if any(pattern in path for pattern in patterns):
+            return category
+    return "other"
+
+
+class TurnProfiler:
+    """
+    Opt-in per-turn capture of cProfile statistics and tracemalloc allocations.
+
+    Each call of a wrapped graph node is a turn. Every 'every'-th turn runs under
+    cProfile and tracemalloc and writes two files to 'directory', named after the
+    session (the profiler's start time), turn and node: a ".prof" file with the
+    'pstats' statistics and a ".json" file with the wall time, the peak traced memory
+    and the largest allocation sites still alive at the end of the turn. Only the files
+    of the last 'keep' profiled turns are kept. See 'summarize' for the aggregate over
+    a session.
+
+    Parameters
+    ----------
+    directory: Path or str
+        Profile directory, created on the first profiled turn.
+    every: int, optional
+        Number of turns between profiled turns.
+    keep: int, optional
+        Number of profiled turns kept in the directory.
+    frames: int, optional
+        Frames stored by tracemalloc per allocation.
+
+    Notes
+    -----
+    Nothing is wrapped unless a profiler is passed to 'core.graph.build_graph', so
+    disabled profiling costs nothing. cProfile only sees the thread running the node:
+    work in other threads (e.g. parallel lore searches) shows up as the time the node
+    waited for it.
+    """
+
+    def __init__(
+        self, directory: Path | str, every: int = 1, keep: int = PROFILE_KEEP_TURNS, frames: int = TRACEMALLOC_FRAMES
+    ):
+        if every < 1:
+            raise ValueError(f"Profiling interval must be at least 1 turn, got {every}.")
+        self.directory = Path(directory)
+        self.every = every
+        self.keep = keep
+        self.frames = frames
+        self.turns = 0
+        self.session = time.strftime("%Y%m%d-%H%M%S")
+        self._lock = threading.Lock()
+
+    def wrap(self, name: str, node: Callable[[GameState], GameState]) -> Callable[[GameState], GameState]:
+        """Return a graph node running 'node' and profiling every 'every'-th call."""
+
+        @functools.wraps(node)
+        def profiled(state: GameState) -> GameState:
+            with self._lock:
+                self.turns += 1
+                turn = self.turns
+            if turn % self.every:
+                return node(state)
+            return self._profile(name, turn, node, state)
+
+        return profiled
+
+    def wrap_nodes(self, nodes: dict[str, Callable[[GameState], GameState]]) -> dict:
+        return {name: self.wrap(name, node) for name, node in nodes.items()}
+
+    def _profile(self, name: str, turn: int, node: Callable[[GameState], GameState], state: GameState) -> GameState:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(self.frames)
+        tracemalloc.reset_peak()
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            return profile.runcall(node, state)
+        finally:
+            wall = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+            peak = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
+            self._write(name, turn, profile, snapshot, wall, peak)
+
+    def _write(
+        self, name: str, turn: int, profile: cProfile.Profile, snapshot: tracemalloc.Snapshot, wall: float, peak: int
+    ) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = self.directory / f"{self.session}_turn{turn:06d}_{name}"
+        profile.dump_stats(stem.with_suffix(".prof"))
+        allocations = [
+            {"site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", "size": stat.size, "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:PROFILE_ALLOCATION_SITES]
+        ]
+        record = {"node": name, "turn": turn, "wall": wall, "peak": peak, "allocations": allocations}
+        stem.with_suffix(".json").write_text(json.dumps(record), encoding="utf-8")
+
+        records = sorted(self.directory.glob("*_turn*.json"))
+        for old in records[: max(0, len(records) - self.keep)]:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".prof").unlink(missing_ok=True)
+
+
+@dataclass
+class ProfileSummary:
+    """
+    Aggregate of the profiled turns in a profile directory.
+
+    Attributes
+    ----------
+    turns: int
+        Number of profiled turns.
+    node_time: dict[str, float]
+        Wall time [s] per node.
+    category_time: dict[str, float]
+        Own time [s] of the functions per 'CATEGORIES' entry.
+    functions: list[tuple[str, int, float, float]]
+        Hottest functions as (function, calls, own time [s], cumulative time [s]), by cumulative time.
+    allocations: list[tuple[str, int, int]]
+        Largest allocation sites as (site, size [bytes], count), summed over turns.
+    peak: int
+        Largest peak traced memory of a turn [bytes].
+    """
+
+    turns: int = 0
+    node_time: dict[str, float] = field(default_factory=dict)
+    category_time: dict[str, float] = field(default_factory=dict)
+    functions: list[tuple[str, int, float, float]] = field(default_factory=list)
+    allocations: list[tuple[str, int, int]] = field(default_factory=list)
+    peak: int = 0
+
+    def report(self) -> str:
+        """Return the summary as text."""
+        lines = [f"profiled turns: {self.turns}, peak traced memory {self.peak / 2**20:.1f} MiB"]
+        lines.append("node time: " + ", ".join(f"{node} {t:.2f}s" for node, t in self.node_time.items()))
+        lines.append("own time: " + ", ".join(f"{category} {t:.2f}s" for category, t in self.category_time.items()))
+        lines.append("hottest functions (cumulative, own, calls):")
+        lines += [f"  {cum:8.3f}s {own:8.3f}s {calls:8d}  {fn}" for fn, calls, own, cum in self.functions]
+        lines.append("allocation sites (retained size, count):")
+        lines += [f"  {size / 1024:8.1f} KiB {count:8d}  {site}" for site, size, count in self.allocations]
+        return "\n".join(lines)
+
+
+def summarize(directory: Path | str, top: int = 20, session: str | None = None) -> ProfileSummary:
+    """
+    Aggregate the hottest functions and allocation sites of the profiled turns in a directory.
+
+    Parameters
+    ----------
+    directory: Path or str
+        Profile directory written by 'TurnProfiler'.
+    top: int, optional
+        Number of functions and allocation sites listed.
+    session: str or None, optional
+        Session ('TurnProfiler.session') to summarize, all sessions in the directory if None.
+
+    Returns
+    -------
+    ProfileSummary
+        The aggregate, empty if the directory holds no profiled turns.
+    """
+    summary = ProfileSummary()
+    records = sorted(Path(directory).glob(f"{session or '*'}_turn*.json"))
+    node_time, sizes, counts = Counter(), Counter(), Counter()
+    for path in records:
+        record = json.loads(path.read_text(encoding="utf-8"))
+        node_time[record["node"]] += record["wall"]
+        summary.peak = max(summary.peak, record["peak"])
+        for allocation in record["allocations"]:
+            sizes[allocation["site"]] += allocation["size"]
+            counts[allocation["site"]] += allocation["count"]
+    summary.turns = len(records)
+    summary.node_time = dict(node_time.most_common())
+    summary.allocations = [(site, size, counts[site]) for site, size in sizes.most_common(top)]
+
+    profiles = [str(path.with_suffix(".prof")) for path in records if path.with_suffix(".prof").exists()]
+    if profiles:
+        stats = pstats.Stats(*profiles).stats
+        category_time = Counter()
+        for (filename, _, function), (_, _, own, _, _) in stats.items():
+            category_time[categorize(filename, function)] += own
+        summary.category_time = dict(category_time.most_common())
+        hottest = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+        summary.functions = [
+            (pstats.func_std_string(function), calls, own, cumulative)
+            for function, (_, calls, own, cumulative, _) in hottest
+        ]
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Summarize the profiled turns of a profile directory.")
+    parser.add_argument("directory", nargs="?", default=PROFILE_DIR)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--session", default=None, help="session to summarize, e.g. 20250131-180405")
+    args = parser.parse_args()
+    print(summarize(args.directory, args.top, args.session).report())
+
+
+if __name__ == "__main__":
+    main()
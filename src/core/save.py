@@ -1,15 +1,218 @@
 import json
 import os
+import re
 import threading
 from pathlib import Path
-from datetime import datetime
-from typing import Literal
-from cryptography.fernet import Fernet
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Literal
+from cryptography.fernet import Fernet, MultiFernet
 
 from core import GameState
 
+if TYPE_CHECKING:
+    from core.save_store import ObjectStore
 
 ENCRYPTED_FILE_HEADER = b"ENCSAVEv1\n"
+TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M-%S"
+SAVE_NAME_RE = re.compile(
+    r"^(?P<prefix>.+)_(?P<timestamp>\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})(?:_(?P<microsecond>\d{6}))?"
+    r"(?:\.(?P<milestone>[a-z]+))?\.sav$"
+)
+DEFAULT_SESSION = "default"
+
+
+def load_key_ring(encryption_key: bytes | list[bytes] | None = None) -> list[bytes]:
+    """
+    Return the save encryption key ring, current key first.
+
+    Parameters
+    ----------
+    encryption_key: bytes, list[bytes] or None, optional
+        A single key or a key ring with the current key first. If None, the current key is
+        read from 'SAVE_AES_KEY' and retired keys from the comma-separated 'SAVE_AES_OLD_KEYS'.
+
+    Returns
+    -------
+    list[bytes]
+        Keys used for decryption, in order. The first key is used for encryption.
+
+    Raises
+    ------
+    ValueError
+        If no key is provided and 'SAVE_AES_KEY' is not set.
+    """
+    if isinstance(encryption_key, bytes):
+        return [encryption_key]
+    if encryption_key is not None:
+        return list(encryption_key)
+
+    current = os.getenv("SAVE_AES_KEY")
+    if current is None:
+        raise ValueError("No encryption key provided and SAVE_AES_KEY is not set.")
+    old_keys = [key.strip() for key in os.getenv("SAVE_AES_OLD_KEYS", "").split(",") if key.strip()]
+    return [key.encode("utf-8") for key in [current, *old_keys]]
+
+
+def make_fernet(keys: list[bytes]) -> MultiFernet:
+    """Build a key-ring Fernet that encrypts with the first key and decrypts with any of them."""
+    return MultiFernet([Fernet(key) for key in keys])
+
+
+def save_name(prefix: str, timestamp: datetime, milestone: str | None = None) -> str:
+    """
+    Return the file name of a save.
+
+    Names sort in the order the saves were written: the timestamp has microsecond
+    resolution, and an optional milestone tag (e.g. "level") is appended after it.
+
+    Parameters
+    ----------
+    prefix: str
+        Prefix of the save, shared by all saves of a session.
+    timestamp: datetime
+        Time the save was written.
+    milestone: str or None, optional
+        Lower-case tag marking a save that retention keeps (see 'core.save_retention').
+
+    Returns
+    -------
+    str
+        File name such as "save_2025-01-31_18-04-05_123456.level.sav".
+    """
+    name = f"{prefix}_{timestamp.strftime(TIMESTAMP_FORMAT)}_{timestamp.microsecond:06d}"
+    return f"{name}.{milestone}.sav" if milestone else f"{name}.sav"
+
+
+def session_prefix(session: str) -> str:
+    """
+    Return the save name prefix of a session.
+
+    Saves of the default session keep the plain "save" prefix, so saves written before
+    sessions were named stay with it. Other sessions get "save-<session>", with every
+    character other than letters, digits and '-' replaced by '-' so the prefix never
+    contains the '_' separating it from the timestamp.
+
+    Parameters
+    ----------
+    session: str
+        Session (checkpoint thread) id.
+
+    Returns
+    -------
+    str
+        Prefix such as "save-alice", shared by all saves of the session.
+    """
+    if session == DEFAULT_SESSION:
+        return "save"
+    return "save-" + re.sub(r"[^A-Za-z0-9-]", "-", session)
+
+
+def parse_save_name(name: str) -> tuple[str, datetime, str | None] | None:
+    """
+    Parse a save file name written by 'save_name', or by older versions without microseconds.
+
+    Returns
+    -------
+    tuple[str, datetime, str | None] or None
+        The prefix, timestamp and milestone tag of the save, None if the name is not a save name.
+    """
+    match = SAVE_NAME_RE.match(name)
+    if match is None:
+        return None
+    timestamp = datetime.strptime(match.group("timestamp"), TIMESTAMP_FORMAT)
+    timestamp = timestamp.replace(microsecond=int(match.group("microsecond") or 0))
+    return match.group("prefix"), timestamp, match.group("milestone")
+
+
+def decrypt_save(data: bytes, fernet: Fernet | MultiFernet | None) -> bytes:
+    """
+    Return the JSON payload of a save file or snapshot payload, decrypting it if it is encrypted.
+
+    Parameters
+    ----------
+    data: bytes
+        Plain JSON, or 'ENCRYPTED_FILE_HEADER' followed by a Fernet token.
+    fernet: Fernet, MultiFernet or None
+        Fernet instance (or key ring) used to decrypt encrypted saves.
+
+    Returns
+    -------
+    bytes
+        The JSON payload.
+
+    Raises
+    ------
+    ValueError
+        If the save is encrypted and no Fernet instance is provided.
+    cryptography.fernet.InvalidToken
+        If the encrypted payload cannot be authenticated with the given key.
+    """
+    if data.startswith(ENCRYPTED_FILE_HEADER):
+        if fernet is None:
+            raise ValueError("Save is encrypted but no encryption key is available.")
+        return fernet.decrypt(data[len(ENCRYPTED_FILE_HEADER) :])
+    return data
+
+
+def _decode(data: bytes, fernet: Fernet | MultiFernet | None, store: "ObjectStore | None") -> bytes:
+    """Return the JSON payload of a save or snapshot."""
+    from core.save_store import SNAPSHOT_FILE_HEADER, decode_snapshot
+
+    if data.startswith(SNAPSHOT_FILE_HEADER):
+        if store is None:
+            raise ValueError("Save is a snapshot but no object store is available.")
+        return decode_snapshot(data, fernet, store)
+    return decrypt_save(data, fernet)
+
+
+def load_save(data: bytes, fernet: Fernet | MultiFernet | None, store: "ObjectStore | None" = None) -> GameState:
+    """
+    Parse raw save file content into a game state.
+
+    Parameters
+    ----------
+    data: bytes
+        Raw content of a save file.
+    fernet: Fernet, MultiFernet or None
+        Fernet instance (or key ring) used to decrypt encrypted saves.
+    store: ObjectStore or None, optional
+        Object store of the save directory, needed to load snapshots (see 'core.save_store').
+
+    Returns
+    -------
+    GameState
+        The saved game state.
+    """
+    return GameState.model_validate_json(_decode(data, fernet, store))
+
+
+def decode_save(data: bytes, fernet: Fernet | MultiFernet | None, store: "ObjectStore | None" = None) -> str:
+    """
+    Decode raw save file content into its JSON text.
+
+    Parameters
+    ----------
+    data: bytes
+        Raw content of a save file.
+    fernet: Fernet, MultiFernet or None
+        Fernet instance (or key ring) used to decrypt encrypted saves.
+    store: ObjectStore or None, optional
+        Object store of the save directory, needed to decode snapshots.
+
+    Returns
+    -------
+    str
+        JSON representation of the saved 'GameState'.
+
+    Raises
+    ------
+    ValueError
+        If the save is encrypted and no Fernet instance is provided, or it is a snapshot
+        and no object store is provided.
+    cryptography.fernet.InvalidToken
+        If the encrypted payload cannot be authenticated with the given key.
+    """
+    return _decode(data, fernet, store).decode("utf-8")
 
 
 class SaveManager:
@@ -19,7 +222,7 @@ class SaveManager:
 
     This class ensures that only one instance exists (thread-safe) and manages
     save files in a specified directory. It can encrypt saves using Fernet
-    symmetric encryption and provides utility methods to list, save, and load
+    symmetric encryption with a key ring (see 'load_key_ring') and provides utility methods to list, save, and load
     game states.
 
     Attributes
@@ -30,20 +233,38 @@ class SaveManager:
     save_dir: Path
         Directory where save files are stored.
     prefix: str
-        Prefix for save filenames.
-    fernet: Fernet
-        Fernet encryption object used for encrypting and decrypting saves.
+        Prefix for save filenames, one per session (see 'session_prefix'). Retention
+        thins the saves of each prefix separately.
+    fernet: MultiFernet
+        Key-ring encryption object. Saves are encrypted with the current key and
+        can be decrypted with the current or any retired key.
+    last_level: int or None
+        Player level of the last save written or loaded, used to tag level-ups.
+    deduplicate: bool
+        Whether saves are written as snapshots sharing their large parts through the
+        object store of the save directory (see 'core.save_store').
+    store: ObjectStore
+        Object store of the save directory, encrypted in "production" mode. Snapshots
+        are loaded from it whether or not 'deduplicate' is set.
 
     Methods
     -------
     list_saves() -> list[Path]
         Returns a list of save files sorted by newest first.
-    save(state: GameState) -> Path
-        Saves the provided GameState instance to a file.
+    save(state: GameState, milestone: str | None = None) -> Path
+        Saves the provided GameState instance to a new file.
     load(file_path: Path | None = None) -> GameState | None
         Loads the newest or specified save file and returns the GameState instance.
-    _timestamp() -> str
-        Generates a timestamp string for save filenames.
+    _timestamp() -> datetime
+        Generates a unique, increasing timestamp for save filenames.
+
+    Notes
+    -----
+    Every save is a new file that is never overwritten: two saves within the same
+    microsecond (or after the clock moved back) get increasing timestamps. Saves of a
+    level-up, and saves the caller marks as a milestone, are tagged in the file name
+    so 'core.save_retention' keeps them without decrypting. Each snapshot is a complete
+    save referencing shared objects, so any one of them loads on its own.
     """
 
     _instance = None
@@ -62,49 +283,87 @@ class SaveManager:
         mode: Literal["development", "production"] = "development",
         save_dir: str = "saves",
         prefix: str = "save",
-        encryption_key: bytes | None = None,
+        encryption_key: bytes | list[bytes] | None = None,
+        deduplicate: bool = False,
     ):
         if not self._initialized:
+            from core.save_store import open_store
+
             self.mode = mode
             self.save_dir = Path(save_dir)
             self.save_dir.mkdir(parents=True, exist_ok=True)
             self.prefix = prefix
 
-            if encryption_key is None:
-                encryption_key = os.getenv("SAVE_AES_KEY")
-                if encryption_key is None:
-                    raise ValueError("No encryption key provided and SAVE_AES_KEY is not set.")
-                encryption_key = encryption_key.encode("utf-8")
-
-            self.fernet = Fernet(encryption_key)
+            keys = load_key_ring(encryption_key)
+            self.fernet = make_fernet(keys)
+            self.deduplicate = deduplicate
+            self.store = open_store(self.save_dir, keys if mode == "production" else None)
+            self.last_level: int | None = None
+            self._last_timestamp: datetime | None = None
 
             self._initialized = True
 
-    @staticmethod
-    def _timestamp() -> str:
-        return datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    def _timestamp(self) -> datetime:
+        timestamp = datetime.now()
+        if self._last_timestamp is not None and timestamp <= self._last_timestamp:
+            timestamp = self._last_timestamp + timedelta(microseconds=1)
+        self._last_timestamp = timestamp
+        return timestamp
 
     def list_saves(self) -> list[Path]:
         """Returns save files sorted newest-first."""
         saves = list(self.save_dir.glob(f"{self.prefix}_*"))
         return sorted(saves, reverse=True)
 
-    def save(self, state: GameState) -> Path:
-        """Saves game state depending on mode (encrypted or raw JSON)."""
-        timestamp = self._timestamp()
-        file_path = self.save_dir / f"{self.prefix}_{timestamp}.sav"
+    def save(self, state: GameState, milestone: str | None = None) -> Path:
+        """
+        Saves game state depending on mode (encrypted or raw JSON) to a new file.
 
-        json_data = state.model_dump_json(indent=2)
+        Parameters
+        ----------
+        state: GameState
+            Game state to save.
+        milestone: str or None, optional
+            Milestone tag of the save (e.g. "boss"). Saves where the player gained a level
+            are tagged "level" unless another milestone is given.
+
+        Returns
+        -------
+        Path
+            Path of the new save file.
+        """
+        if self.deduplicate:
+            from core.save_store import split_state, write_snapshot
+
+            snapshot, addresses = split_state(state.model_dump(mode="json"), self.store)
+            json_data = json.dumps(snapshot, ensure_ascii=False, indent=2)
+        else:
+            json_data = state.model_dump_json(indent=2)
 
         if self.mode == "production":
-            encrypted = self.fernet.encrypt(json_data.encode("utf-8"))
-            file_path.write_bytes(ENCRYPTED_FILE_HEADER + encrypted)
+            data = ENCRYPTED_FILE_HEADER + self.fernet.encrypt(json_data.encode("utf-8"))
         elif self.mode == "development":
-            file_path.write_text(json_data, encoding="utf-8")
+            data = json_data.encode("utf-8")
         else:
             raise RuntimeError(f"Unknown save mode. Got: {self.mode}, Available options: 'production', 'development'.")
+        if self.deduplicate:
+            data = write_snapshot(data, addresses)
+
+        level = state.player.level.level
+        if milestone is None and self.last_level is not None and level > self.last_level:
+            milestone = "level"
+        self.last_level = level
 
-        return file_path
+        with self._lock:
+            while True:
+                # Exclusive creation never overwrites a save, even one written by another process.
+                file_path = self.save_dir / save_name(self.prefix, self._timestamp(), milestone)
+                try:
+                    with open(file_path, "xb") as f:
+                        f.write(data)
+                    return file_path
+                except FileExistsError:
+                    continue
 
     def load(self, file_path: Path | None = None) -> GameState | None:
         """Loads the newest save or a specific one depending on mode."""
@@ -116,14 +375,9 @@ class SaveManager:
                 file_path = saves[0]
 
             data = file_path.read_bytes()
-
-            if data.startswith(ENCRYPTED_FILE_HEADER):
-                encrypted_payload = data[len(ENCRYPTED_FILE_HEADER) :]
-                decrypted = self.fernet.decrypt(encrypted_payload).decode("utf-8")
-                return GameState.model_validate_json(decrypted)
-
-            text = data.decode("utf-8")
-            return GameState.model_validate_json(text)
+            state = load_save(data, self.fernet, self.store)
+            self.last_level = state.player.level.level
+            return state
 
         except json.JSONDecodeError as e:
             print(f"Invalid save format: {e}")
@@ -0,0 +1,285 @@
+import argparse
+import os
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+
+from core.save import parse_save_name
+from core.save_store import OBJECTS_DIR, ObjectStore, referenced_objects
+
+RETENTION_INTERVAL = 300.0
+RETENTION_DELETES_PER_SECOND = 20.0
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """
+    Which saves of a session are kept.
+
+    A save is kept if it is one of the 'keep_last' newest saves, the newest save of one
+    of the 'hourly' most recent hours or 'daily' most recent days with saves, or tagged
+    as a milestone (a level-up or a boss win, see 'SaveManager.save').
+
+    Attributes
+    ----------
+    keep_last: int
+        Number of newest saves always kept, at least 1.
+    hourly: int
+        Number of most recent hours keeping their newest save.
+    daily: int
+        Number of most recent days keeping their newest save.
+    keep_milestones: bool
+        Whether milestone saves are kept regardless of their age.
+    """
+
+    keep_last: int = 20
+    hourly: int = 24
+    daily: int = 30
+    keep_milestones: bool = True
+
+    def __post_init__(self):
+        if self.keep_last < 1:
+            raise ValueError(f"keep_last must be at least 1, got {self.keep_last}.")
+
+
+@dataclass(frozen=True)
+class SaveFile:
+    """
+    A save file identified by its name.
+
+    Attributes
+    ----------
+    path: Path
+        Path of the save.
+    session: str
+        Prefix of the save name, shared by the saves of a session.
+    timestamp: datetime
+        Time the save was written.
+    milestone: str or None
+        Milestone tag of the save, e.g. "level" or "boss".
+    size: int
+        Size of the file [bytes].
+    """
+
+    path: Path
+    session: str
+    timestamp: datetime
+    milestone: str | None = None
+    size: int = 0
+
+
+@dataclass
+class RetentionReport:
+    """
+    Summary of a retention pass.
+
+    Attributes
+    ----------
+    kept: int
+        Number of saves kept.
+    deleted: int
+        Number of saves deleted.
+    collected: int
+        Number of deleted objects no snapshot referenced anymore.
+    freed: int
+        Size of the deleted saves and objects [bytes].
+    errors: list[tuple[str, str]]
+        Saves that could not be deleted, as (path, error message) pairs.
+    """
+
+    kept: int = 0
+    deleted: int = 0
+    collected: int = 0
+    freed: int = 0
+    errors: list[tuple[str, str]] = field(default_factory=list)
+
+
+def list_save_files(save_dir: str | Path) -> list[SaveFile]:
+    """Return the saves of a directory whose names follow 'save_name', in no particular order."""
+    saves = []
+    with os.scandir(save_dir) as entries:
+        for entry in entries:
+            parsed = parse_save_name(entry.name) if entry.is_file() else None
+            if parsed is not None:
+                saves.append(SaveFile(Path(entry.path), *parsed, size=entry.stat().st_size))
+    return saves
+
+
+def select_expired(saves: Iterable[SaveFile], policy: RetentionPolicy) -> list[SaveFile]:
+    """
+    Select the saves a retention policy no longer keeps.
+
+    Sessions are thinned independently. Only the save times matter, not the current
+    time, so a player returning after a break still has their last saves of every
+    recent day.
+
+    Parameters
+    ----------
+    saves: Iterable[SaveFile]
+        Saves of one or more sessions.
+    policy: RetentionPolicy
+        Retention policy.
+
+    Returns
+    -------
+    list[SaveFile]
+        The saves to delete, oldest first within each session.
+    """
+    sessions: dict[str, list[SaveFile]] = defaultdict(list)
+    for save in saves:
+        sessions[save.session].append(save)
+
+    expired = []
+    for session_saves in sessions.values():
+        session_saves.sort(key=lambda save: save.timestamp, reverse=True)
+        keep = set(range(policy.keep_last))
+        for bucket_format, count in (("%Y-%m-%d %H", policy.hourly), ("%Y-%m-%d", policy.daily)):
+            newest: dict[str, int] = {}
+            for i, save in enumerate(session_saves):
+                bucket = save.timestamp.strftime(bucket_format)
+                if bucket not in newest:
+                    if len(newest) == count:
+                        break
+                    newest[bucket] = i
+            keep.update(newest.values())
+        if policy.keep_milestones:
+            keep.update(i for i, save in enumerate(session_saves) if save.milestone)
+        expired.extend(save for i, save in reversed(list(enumerate(session_saves))) if i not in keep)
+    return expired
+
+
+class SaveRetention:
+    """
+    Background thread applying a retention policy to a save directory.
+
+    Every 'interval' seconds (or when triggered) the directory is listed once and the
+    saves the policy no longer keeps are deleted, at most 'max_deletes_per_second', so
+    thinning a large backlog does not compete with the game for disk I/O.
+
+    Parameters
+    ----------
+    save_dir: str or Path
+        Directory containing save files.
+    policy: RetentionPolicy, optional
+        Retention policy.
+    interval: float, optional
+        Time [s] between retention passes.
+    max_deletes_per_second: float, optional
+        Maximum rate of file deletions.
+
+    Notes
+    -----
+    Files whose names are not save names (checkpoints, progress files, temporary
+    files) are never touched, nor are objects modified within the garbage collection
+    grace period. 'stop' interrupts a pass between two deletions.
+    """
+
+    def __init__(
+        self,
+        save_dir: str | Path,
+        policy: RetentionPolicy = RetentionPolicy(),
+        interval: float = RETENTION_INTERVAL,
+        max_deletes_per_second: float = RETENTION_DELETES_PER_SECOND,
+    ):
+        self.save_dir = Path(save_dir)
+        self.policy = policy
+        self.interval = interval
+        self.max_deletes_per_second = max_deletes_per_second
+        self.last_report: RetentionReport | None = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _delete(self, path: Path, report: RetentionReport) -> bool:
+        """Delete a file at the bounded rate, returning False if it could not be deleted."""
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError as e:
+            report.errors.append((str(path), f"{type(e).__name__}: {e}"))
+            return False
+        report.freed += size
+        self._stop.wait(1 / self.max_deletes_per_second)
+        return True
+
+    def run_once(self) -> RetentionReport:
+        """
+        Apply the policy to the save directory once, returning what was kept and deleted.
+
+        Objects of deleted snapshots that no other snapshot references are collected
+        afterwards (see 'core.save_store.collect_garbage').
+        """
+        saves = list_save_files(self.save_dir)
+        report = RetentionReport(kept=len(saves))
+        for save in select_expired(saves, self.policy):
+            if self._stop.is_set():
+                break
+            if self._delete(save.path, report):
+                report.kept -= 1
+                report.deleted += 1
+        else:
+            store = ObjectStore(self.save_dir / OBJECTS_DIR)
+            for path in store.unreferenced(referenced_objects(self.save_dir)):
+                if self._stop.is_set():
+                    break
+                report.collected += self._delete(path, report)
+        self.last_report = report
+        return report
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except OSError as e:
+                self.last_report = RetentionReport(errors=[(str(self.save_dir), f"{type(e).__name__}: {e}")])
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self) -> None:
+        """Start the background thread, which runs a first pass immediately."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="save-retention", daemon=True)
+            self._thread.start()
+
+    def trigger(self) -> None:
+        """Run the next pass now instead of after the interval."""
+        self._wake.set()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop the background thread, interrupting a running pass between two deletions."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete the saves a retention policy no longer keeps.")
+    parser.add_argument("save_dir")
+    parser.add_argument("--keep-last", type=int, default=RetentionPolicy.keep_last)
+    parser.add_argument("--hourly", type=int, default=RetentionPolicy.hourly)
+    parser.add_argument("--daily", type=int, default=RetentionPolicy.daily)
+    parser.add_argument("--dry-run", action="store_true", help="list the saves that would be deleted")
+    args = parser.parse_args()
+
+    policy = RetentionPolicy(keep_last=args.keep_last, hourly=args.hourly, daily=args.daily)
+    if args.dry_run:
+        for save in select_expired(list_save_files(args.save_dir), policy):
+            print(save.path)
+        return
+    report = SaveRetention(args.save_dir, policy, max_deletes_per_second=float("inf")).run_once()
+    print(
+        f"Kept: {report.kept}, deleted: {report.deleted} saves and {report.collected} objects "
+        f"({report.freed / 2**20:.1f} MiB), failed: {len(report.errors)}"
+    )
+    for path, message in report.errors:
+        print(f"Could not delete {path}: {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from core import GameState
+from core.save import decode_save, load_key_ring, make_fernet
+from core.save_store import open_store
+
+DEFAULT_FIELDS = ("scene_type", "player.level.level", "player.hp", "world.location", "history")
+
+
+@dataclass
+class ScanResult:
+    """
+    Columnar result of a save directory scan.
+
+    Attributes
+    ----------
+    files: list[str]
+        Path of the save each row was read from.
+    columns: dict[str, list]
+        One list of values per scanned field, aligned with 'files'.
+    errors: list[tuple[str, str]]
+        Saves that could not be decoded, as (path, error message) pairs.
+    """
+
+    files: list[str] = field(default_factory=list)
+    columns: dict[str, list] = field(default_factory=dict)
+    errors: list[tuple[str, str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def extend(self, fields: tuple[str, ...], rows: list[tuple[str, list]]) -> None:
+        for path, values in rows:
+            self.files.append(path)
+            for name, value in zip(fields, values):
+                self.columns.setdefault(name, []).append(value)
+
+    def to_numpy(self) -> dict[str, Any]:
+        """
+        Convert the columns into NumPy arrays.
+
+        Returns
+        -------
+        dict[str, numpy.ndarray]
+            One array per column. Numeric columns get a numeric dtype, other columns an object dtype.
+
+        Raises
+        ------
+        ImportError
+            If NumPy is not installed.
+        """
+        import numpy as np
+
+        return {"file": np.array(self.files, dtype=object)} | {
+            name: np.array(values) if all(isinstance(v, (int, float)) for v in values) else np.array(values, object)
+            for name, values in self.columns.items()
+        }
+
+    def to_csv(self, path: str | Path) -> None:
+        """Write the columns to a CSV file with a header row."""
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["file", *self.columns])
+            writer.writerows(zip(self.files, *self.columns.values()))
+
+
+def extract_field(data: dict, path: str) -> Any:
+    """
+    Extract a value from a decoded save using a dotted path.
+
+    Parameters
+    ----------
+    data: dict
+        Decoded save JSON.
+    path: str
+        Dotted path, e.g. "player.level.level". List values are reduced to their
+        length, so "history" yields the number of history entries (turn count).
+
+    Returns
+    -------
+    Any
+        The extracted value, or None if the path does not exist.
+    """
+    value: Any = data
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    if isinstance(value, list):
+        return len(value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
+
+
+def _scan_chunk(
+    paths: list[str], fields: tuple[str, ...], keys: list[bytes], validate: bool
+) -> tuple[list[tuple[str, list]], list[tuple[str, str]]]:
+    """Decode a chunk of saves in a worker process and extract the requested fields."""
+    fernet = make_fernet(keys) if keys else None
+    store = open_store(Path(paths[0]).parent, keys)
+    rows, errors = [], []
+    for path in paths:
+        try:
+            text = decode_save(Path(path).read_bytes(), fernet, store)
+            if validate:
+                GameState.model_validate_json(text)
+            data = json.loads(text)
+            rows.append((path, [extract_field(data, name) for name in fields]))
+        except Exception as e:
+            errors.append((path, f"{type(e).__name__}: {e}"))
+    return rows, errors
+
+
+def iter_save_paths(save_dir: Path, pattern: str) -> Iterator[str]:
+    with os.scandir(save_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and Path(entry.name).match(pattern):
+                yield entry.path
+
+
+def chunked(iterable: Iterable[str], size: int) -> Iterator[list[str]]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def iter_scan(
+    save_dir: str | Path,
+    fields: tuple[str, ...] = DEFAULT_FIELDS,
+    encryption_key: bytes | list[bytes] | None = None,
+    workers: int | None = None,
+    chunk_size: int = 256,
+    pattern: str = "*.sav",
+    validate: bool = False,
+) -> Iterator[tuple[list[tuple[str, list]], list[tuple[str, str]]]]:
+    """
+    Scan a save directory in parallel and yield results chunk by chunk.
+
+    The directory is listed lazily and at most two chunks per worker are in flight,
+    so memory use stays bounded regardless of the number of saves.
+
+    Parameters
+    ----------
+    save_dir: str or Path
+        Directory containing save files.
+    fields: tuple[str, ...], optional
+        Dotted paths of the fields to extract (see 'extract_field').
+    encryption_key: bytes, list[bytes] or None, optional
+        Fernet key or key ring for encrypted saves. Defaults to the environment key ring (see 'load_key_ring').
+    workers: int or None, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    chunk_size: int, optional
+        Number of saves decoded per task.
+    pattern: str, optional
+        Glob pattern selecting save files.
+    validate: bool, optional
+        Run full 'GameState' validation on each save, reporting saves that decode but do not validate.
+
+    Yields
+    ------
+    tuple[list[tuple[str, list]], list[tuple[str, str]]]
+        Extracted rows as (path, values) pairs and errors as (path, message) pairs.
+    """
+    keys = load_key_ring(encryption_key) if encryption_key is not None or os.getenv("SAVE_AES_KEY") else []
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for chunk in chunked(iter_save_paths(Path(save_dir), pattern), chunk_size):
+            pending.add(executor.submit(_scan_chunk, chunk, fields, keys, validate))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from (future.result() for future in done)
+        for future in pending:
+            yield future.result()
+
+
+def scan_saves(save_dir: str | Path, fields: tuple[str, ...] = DEFAULT_FIELDS, **kwargs) -> ScanResult:
+    """
+    Scan a save directory in parallel and collect the requested fields into columns.
+
+    Parameters
+    ----------
+    save_dir: str or Path
+        Directory containing save files.
+    fields: tuple[str, ...], optional
+        Dotted paths of the fields to extract.
+    **kwargs
+        Passed to 'iter_scan'.
+
+    Returns
+    -------
+    ScanResult
+        Columnar scan result including the list of corrupt saves.
+    """
+    result = ScanResult(columns={name: [] for name in fields})
+    for rows, errors in iter_scan(save_dir, fields, **kwargs):
+        result.extend(fields, rows)
+        result.errors.extend(errors)
+    return result
+
+
+def write_csv(save_dir: str | Path, out_path: str | Path, fields: tuple[str, ...] = DEFAULT_FIELDS, **kwargs) -> list:
+    """
+    Stream scanned fields straight into a CSV file without keeping them in memory.
+
+    Parameters
+    ----------
+    save_dir: str or Path
+        Directory containing save files.
+    out_path: str or Path
+        Destination CSV file.
+    fields: tuple[str, ...], optional
+        Dotted paths of the fields to extract.
+    **kwargs
+        Passed to 'iter_scan'.
+
+    Returns
+    -------
+    list[tuple[str, str]]
+        Saves that could not be decoded, as (path, error message) pairs.
+    """
+    all_errors = []
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["file", *fields])
+        for rows, errors in iter_scan(save_dir, fields, **kwargs):
+            writer.writerows([path, *values] for path, values in rows)
+            all_errors.extend(errors)
+    return all_errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Extract fields from every save in a directory into a CSV file.")
+    parser.add_argument("save_dir")
+    parser.add_argument("out_csv")
+    parser.add_argument("--fields", nargs="+", default=list(DEFAULT_FIELDS))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--validate", action="store_true")
+    args = parser.parse_args()
+
+    errors = write_csv(args.save_dir, args.out_csv, tuple(args.fields), workers=args.workers, validate=args.validate)
+    for path, message in errors:
+        print(f"Corrupt save {path}: {message}")
+
+
+if __name__ == "__main__":
+    main()
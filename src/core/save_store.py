@@ -0,0 +1,310 @@
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from cryptography.fernet import Fernet, MultiFernet
+
+from core.save import ENCRYPTED_FILE_HEADER, decrypt_save, make_fernet
+
+OBJECTS_DIR = "objects"
+SNAPSHOT_FILE_HEADER = b"SNAPv1\n"
+OBJECT_HEADER = b"OBJv1\n"
+ENCRYPTED_OBJECT_HEADER = b"OBJv1E\n"
+
+MIN_OBJECT_SIZE = 256
+SEGMENT_BOUNDARY = 16
+MAX_SEGMENT_LENGTH = 64
+GC_GRACE_PERIOD = 3600.0
+
+REF = "$ref"
+SEGMENTS = "$segments"
+
+
+def object_address_key(key: bytes) -> bytes:
+    """Derive the key addressing encrypted objects from a save encryption key."""
+    return hashlib.sha256(b"save object address\n" + key).digest()
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ObjectStore:
+    """
+    Content-addressed store of save sub-objects, each stored once however many snapshots use it.
+
+    Objects are compressed JSON files under 'directory', named by their address and
+    fanned out into subdirectories by the first two characters. Without a key an
+    address is the SHA-256 of the content, and content is checked against it on read.
+    With a key objects are encrypted, and addresses are an HMAC of the content, so
+    they do not reveal the content of an object to someone guessing it.
+
+    Parameters
+    ----------
+    directory: Path or str
+        Directory of the objects, usually 'OBJECTS_DIR' in the save directory.
+    fernet: Fernet, MultiFernet or None, optional
+        Key (ring) used to encrypt and decrypt objects.
+    address_key: bytes or None, optional
+        Key of the object addresses, see 'object_address_key'. Required with 'fernet'.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str,
+        fernet: Fernet | MultiFernet | None = None,
+        address_key: bytes | None = None,
+    ):
+        if fernet is not None and address_key is None:
+            raise ValueError("Encrypted object stores need an address key.")
+        self.directory = Path(directory)
+        self.fernet = fernet
+        self.address_key = address_key
+
+    def address(self, data: bytes) -> str:
+        if self.address_key is None:
+            return hashlib.sha256(data).hexdigest()
+        return hmac.new(self.address_key, data, hashlib.sha256).hexdigest()
+
+    def path(self, address: str) -> Path:
+        return self.directory / address[:2] / address[2:]
+
+    def __contains__(self, address: str) -> bool:
+        return self.path(address).exists()
+
+    def __iter__(self) -> Iterator[Path]:
+        """Iterate over the object files."""
+        if self.directory.is_dir():
+            for subdirectory in self.directory.iterdir():
+                if subdirectory.is_dir():
+                    yield from (path for path in subdirectory.iterdir() if not path.name.endswith(".tmp"))
+
+    def put(self, data: bytes) -> str:
+        """Store an object unless it is stored already, returning its address."""
+        address = self.address(data)
+        path = self.path(address)
+        try:
+            os.utime(path)  # a recently used object is not collected before the snapshot using it is written
+        except FileNotFoundError:
+            content = zlib.compress(data, 1)
+            if self.fernet is None:
+                content = OBJECT_HEADER + content
+            else:
+                content = ENCRYPTED_OBJECT_HEADER + self.fernet.encrypt(content)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            temporary.write_bytes(content)
+            temporary.replace(path)
+        return address
+
+    def get(self, address: str) -> bytes:
+        """
+        Return the content of an object.
+
+        Raises
+        ------
+        ValueError
+            If the object is encrypted and the store has no key, or its content does not match its address.
+        FileNotFoundError
+            If the object does not exist.
+        """
+        content = self.path(address).read_bytes()
+        if content.startswith(ENCRYPTED_OBJECT_HEADER):
+            if self.fernet is None:
+                raise ValueError("Object is encrypted but no encryption key is available.")
+            return zlib.decompress(self.fernet.decrypt(content[len(ENCRYPTED_OBJECT_HEADER) :]))
+        data = zlib.decompress(content.removeprefix(OBJECT_HEADER))
+        if not hmac.compare_digest(hashlib.sha256(data).hexdigest(), address):
+            raise ValueError(f"Object {address} is corrupted.")
+        return data
+
+    def unreferenced(self, referenced: set[str], grace: float = GC_GRACE_PERIOD) -> list[Path]:
+        """
+        Return the objects no snapshot references.
+
+        Objects modified within 'grace' seconds are never returned, as a snapshot using
+        them may be being written.
+        """
+        deadline = time.time() - grace
+        return [
+            path for path in self if path.parent.name + path.name not in referenced and path.stat().st_mtime < deadline
+        ]
+
+
+def split_segments(entries: list) -> list[list]:
+    """
+    Split a list into content-defined segments.
+
+    A segment ends after an entry whose checksum is a multiple of 'SEGMENT_BOUNDARY'
+    (or after 'MAX_SEGMENT_LENGTH' entries), so boundaries depend only on nearby entries:
+    dropping the oldest history entries or appending new ones changes the first and last
+    segments, while the segments in between stay identical and are stored once.
+    """
+    segments, segment = [], []
+    for entry in entries:
+        segment.append(entry)
+        if zlib.crc32(_dumps(entry)) % SEGMENT_BOUNDARY == 0 or len(segment) == MAX_SEGMENT_LENGTH:
+            segments.append(segment)
+            segment = []
+    return segments + [segment] if segment else segments
+
+
+def split_state(data: dict, store: ObjectStore) -> tuple[dict, set[str]]:
+    """
+    Move the large parts of a serialized game state into an object store.
+
+    Inventory pockets and the lore text become '{"$ref": address}' references, the
+    history and chapters lists become '{"$segments": [address, ...]}'. Values smaller
+    than 'MIN_OBJECT_SIZE' bytes stay inline.
+
+    Parameters
+    ----------
+    data: dict
+        JSON-compatible 'GameState' dump.
+    store: ObjectStore
+        Store receiving the objects.
+
+    Returns
+    -------
+    tuple[dict, set[str]]
+        The state with references, and the addresses it references.
+    """
+    addresses = set()
+
+    def put(value: Any) -> str:
+        address = store.put(_dumps(value))
+        addresses.add(address)
+        return address
+
+    def ref(value: Any) -> Any:
+        return {REF: put(value)} if len(_dumps(value)) >= MIN_OBJECT_SIZE else value
+
+    def segments(entries: list) -> Any:
+        if len(_dumps(entries)) < MIN_OBJECT_SIZE:
+            return entries
+        return {SEGMENTS: [put(segment) for segment in split_segments(entries)]}
+
+    data = dict(data)
+    player = data["player"] = dict(data["player"])
+    player["inventory"] = {pocket: ref(items) for pocket, items in player["inventory"].items()}
+    data["history"] = segments(data["history"])
+    data["chapters"] = segments(data["chapters"])
+    if data.get("lore") is not None:
+        data["lore"] = ref(data["lore"])
+    return data, addresses
+
+
+def resolve_state(value: Any, store: ObjectStore) -> Any:
+    """Replace the references of a state written by 'split_state' with the stored objects."""
+    if isinstance(value, dict):
+        if REF in value:
+            return json.loads(store.get(value[REF]))
+        if SEGMENTS in value:
+            return [entry for address in value[SEGMENTS] for entry in json.loads(store.get(address))]
+        return {key: resolve_state(item, store) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_state(item, store) for item in value]
+    return value
+
+
+def write_snapshot(payload: bytes, addresses: Iterable[str]) -> bytes:
+    """
+    Frame a snapshot: its header, the addresses it references and its payload.
+
+    The payload is the state with references, as plain JSON or an encrypted save. The
+    addresses are stored in plain text, so garbage collection and retention can read
+    them without a key.
+    """
+    return SNAPSHOT_FILE_HEADER + " ".join(sorted(addresses)).encode("ascii") + b"\n" + payload
+
+
+def read_snapshot(data: bytes) -> tuple[list[str], bytes]:
+    """Return the referenced addresses and the payload of a snapshot framed by 'write_snapshot'."""
+    addresses, _, payload = data[len(SNAPSHOT_FILE_HEADER) :].partition(b"\n")
+    return addresses.decode("ascii").split(), payload
+
+
+def decode_snapshot(data: bytes, fernet: Fernet | MultiFernet | None, store: ObjectStore) -> bytes:
+    """Decode a snapshot into the JSON of the full game state."""
+    _, payload = read_snapshot(data)
+    return _dumps(resolve_state(json.loads(decrypt_save(payload, fernet)), store))
+
+
+def split_encrypted(data: bytes) -> tuple[bytes, bytes] | None:
+    """
+    Split the content of an encrypted save, snapshot or object into its framing and its Fernet token.
+
+    Returns
+    -------
+    tuple[bytes, bytes] or None
+        The bytes before the token and the token, None if the content is not encrypted.
+    """
+    if data.startswith(SNAPSHOT_FILE_HEADER):
+        addresses, _, payload = data[len(SNAPSHOT_FILE_HEADER) :].partition(b"\n")
+        split = split_encrypted(payload)
+        return (SNAPSHOT_FILE_HEADER + addresses + b"\n" + split[0], split[1]) if split else None
+    for header in (ENCRYPTED_FILE_HEADER, ENCRYPTED_OBJECT_HEADER):
+        if data.startswith(header):
+            return header, data[len(header) :]
+    return None
+
+
+def referenced_objects(save_dir: str | Path) -> set[str]:
+    """Return the addresses referenced by the snapshots of a save directory."""
+    referenced = set()
+    for path in Path(save_dir).glob("*.sav"):
+        with open(path, "rb") as f:
+            if f.read(len(SNAPSHOT_FILE_HEADER)) == SNAPSHOT_FILE_HEADER:
+                referenced.update(f.readline().decode("ascii").split())
+    return referenced
+
+
+def collect_garbage(save_dir: str | Path, grace: float = GC_GRACE_PERIOD) -> tuple[int, int]:
+    """
+    Delete the objects of a save directory that no snapshot references.
+
+    Parameters
+    ----------
+    save_dir: str or Path
+        Directory containing save files and their 'OBJECTS_DIR'.
+    grace: float, optional
+        Objects modified within this time [s] are kept, see 'ObjectStore.unreferenced'.
+
+    Returns
+    -------
+    tuple[int, int]
+        Number of deleted objects and their size [bytes].
+    """
+    deleted = freed = 0
+    for path in ObjectStore(Path(save_dir) / OBJECTS_DIR).unreferenced(referenced_objects(save_dir), grace):
+        size = path.stat().st_size
+        path.unlink(missing_ok=True)
+        deleted, freed = deleted + 1, freed + size
+    return deleted, freed
+
+
+def open_store(save_dir: str | Path, keys: list[bytes] | None = None) -> ObjectStore:
+    """Return the object store of a save directory, encrypted with a key ring (current key first) if given."""
+    if not keys:
+        return ObjectStore(Path(save_dir) / OBJECTS_DIR)
+    return ObjectStore(Path(save_dir) / OBJECTS_DIR, make_fernet(keys), object_address_key(keys[0]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete the save objects no snapshot references.")
+    parser.add_argument("save_dir")
+    parser.add_argument("--grace", type=float, default=GC_GRACE_PERIOD, help="keep objects newer than this [s]")
+    args = parser.parse_args()
+
+    deleted, freed = collect_garbage(args.save_dir, args.grace)
+    print(f"Deleted {deleted} objects ({freed / 2**20:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+import hashlib
+import math
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from cryptography.fernet import Fernet, MultiFernet
+
+from core import GameState
+
+SESSION_CACHE_SIZE = 1000
+SESSION_IDLE_TTL = 15 * 60.0
+PRESSURE_EVICT_FRACTION = 0.25
+
+HIBERNATED_HEADER = b"HIBv1\n"
+ENCRYPTED_HIBERNATED_HEADER = b"HIBv1E\n"
+
+
+def resident_memory() -> int | None:
+    """Return the resident set size of the process [bytes], None where it cannot be read cheaply."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def encode_hibernated(state: GameState, fernet: Fernet | MultiFernet | None = None) -> bytes:
+    """Encode a game state into the compact hibernation form: compressed JSON, encrypted if a key is given."""
+    data = zlib.compress(state.model_dump_json().encode("utf-8"), 1)
+    if fernet is None:
+        return HIBERNATED_HEADER + data
+    return ENCRYPTED_HIBERNATED_HEADER + fernet.encrypt(data)
+
+
+def decode_hibernated(data: bytes, fernet: Fernet | MultiFernet | None = None) -> GameState:
+    """
+    Decode a game state written by 'encode_hibernated'.
+
+    Raises
+    ------
+    ValueError
+        If the data is not a hibernated session, or it is encrypted and no key is given.
+    """
+    if data.startswith(ENCRYPTED_HIBERNATED_HEADER):
+        if fernet is None:
+            raise ValueError("Hibernated session is encrypted but no encryption key is available.")
+        return GameState.model_validate_json(zlib.decompress(fernet.decrypt(data[len(ENCRYPTED_HIBERNATED_HEADER) :])))
+    if data.startswith(HIBERNATED_HEADER):
+        return GameState.model_validate_json(zlib.decompress(data[len(HIBERNATED_HEADER) :]))
+    raise ValueError("Not a hibernated session.")
+
+
+@dataclass
+class SessionCacheStats:
+    """
+    Counters of a 'SessionCache'.
+
+    Attributes
+    ----------
+    hits: int
+        Lookups served by a resident session.
+    misses: int
+        Lookups of unknown sessions.
+    rehydrations: int
+        Lookups served by loading a hibernated session.
+    hibernations: dict[str, int]
+        Hibernated sessions per reason ("lru", "ttl", "pressure" or "close").
+    rehydration_latencies: deque[float]
+        Recent rehydration latencies [s].
+    """
+
+    hits: int = 0
+    misses: int = 0
+    rehydrations: int = 0
+    hibernations: dict[str, int] = field(default_factory=dict)
+    rehydration_latencies: deque = field(default_factory=lambda: deque(maxlen=1000))
+
+    def rehydration_latency(self, quantile: float) -> float | None:
+        """Return a quantile of the recent rehydration latencies [s], None before the first rehydration."""
+        if not self.rehydration_latencies:
+            return None
+        latencies = sorted(self.rehydration_latencies)
+        return latencies[min(len(latencies) - 1, math.ceil(quantile * len(latencies)) - 1)]
+
+
+class SessionCache:
+    """
+    Resident game sessions with LRU/TTL eviction to a compact on-disk form.
+
+    Sessions are kept in memory while they are played. The least recently used session
+    is hibernated once more than 'max_sessions' are resident, sessions idle for longer
+    than 'ttl' are hibernated by 'sweep', and so are the least recently used quarter
+    of the sessions while the process uses more than 'max_memory'. A hibernated session
+    is one compressed (and, with a key, encrypted) file that 'get' loads back
+    transparently on the next player input.
+
+    Parameters
+    ----------
+    directory: Path or str
+        Directory of the hibernated sessions.
+    max_sessions: int, optional
+        Maximum number of resident sessions.
+    ttl: float, optional
+        Idle time [s] after which 'sweep' hibernates a session.
+    max_memory: int or None, optional
+        Resident memory [bytes] of the process above which 'sweep' hibernates sessions.
+        None disables memory pressure eviction.
+    fernet: Fernet, MultiFernet or None, optional
+        Key used to encrypt hibernated sessions.
+    clock: Callable[[], float], optional
+        Time source, 'time.monotonic' by default.
+    memory_usage: Callable[[], int | None], optional
+        Source of the resident memory of the process, 'resident_memory' by default.
+
+    Notes
+    -----
+    Hibernation is not a save: a hibernated file is deleted when the session is loaded
+    back, and saves are still written by 'SaveManager'. All operations hold one lock,
+    so a session is never loaded twice concurrently.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str,
+        max_sessions: int = SESSION_CACHE_SIZE,
+        ttl: float = SESSION_IDLE_TTL,
+        max_memory: int | None = None,
+        fernet: Fernet | MultiFernet | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        memory_usage: Callable[[], int | None] = resident_memory,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self.fernet = fernet
+        self.clock = clock
+        self.memory_usage = memory_usage
+        self.stats = SessionCacheStats()
+        self._resident: OrderedDict[str, tuple[GameState, float]] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _path(self, session_id: str) -> Path:
+        return self.directory / f"{hashlib.sha256(session_id.encode('utf-8')).hexdigest()[:32]}.hib"
+
+    def __len__(self) -> int:
+        return len(self._resident)
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._resident or self._path(session_id).exists()
+
+    def get(self, session_id: str) -> GameState | None:
+        """
+        Return a session, loading it back if it was hibernated.
+
+        Parameters
+        ----------
+        session_id: str
+            Session identifier.
+
+        Returns
+        -------
+        GameState or None
+            The session's state, None for an unknown session.
+        """
+        with self._lock:
+            if session_id in self._resident:
+                self.stats.hits += 1
+                state, _ = self._resident.pop(session_id)
+                self._resident[session_id] = (state, self.clock())
+                return state
+            path = self._path(session_id)
+            if not path.exists():
+                self.stats.misses += 1
+                return None
+            start = time.perf_counter()
+            state = decode_hibernated(path.read_bytes(), self.fernet)
+            path.unlink()
+            self.stats.rehydrations += 1
+            self.stats.rehydration_latencies.append(time.perf_counter() - start)
+            self.put(session_id, state)
+            return state
+
+    def put(self, session_id: str, state: GameState) -> None:
+        """Make a session resident (or mark it as used), hibernating the least recently used beyond the limit."""
+        with self._lock:
+            self._resident.pop(session_id, None)
+            self._resident[session_id] = (state, self.clock())
+            while len(self._resident) > self.max_sessions:
+                self.hibernate(next(iter(self._resident)), "lru")
+
+    def hibernate(self, session_id: str, reason: str = "manual") -> bool:
+        """
+        Write a resident session to disk and drop it from memory.
+
+        Parameters
+        ----------
+        session_id: str
+            Session identifier.
+        reason: str, optional
+            Reason counted in 'stats.hibernations'.
+
+        Returns
+        -------
+        bool
+            False if the session is not resident.
+        """
+        with self._lock:
+            if session_id not in self._resident:
+                return False
+            state, _ = self._resident[session_id]
+            path = self._path(session_id)
+            temporary = path.with_suffix(".tmp")
+            temporary.write_bytes(encode_hibernated(state, self.fernet))
+            temporary.replace(path)
+            del self._resident[session_id]
+            self.stats.hibernations[reason] = self.stats.hibernations.get(reason, 0) + 1
+            return True
+
+    def memory_pressure(self) -> float | None:
+        """Return the resident memory of the process relative to 'max_memory', None if it is not tracked."""
+        usage = self.memory_usage() if self.max_memory else None
+        return usage / self.max_memory if usage is not None else None
+
+    def sweep(self) -> int:
+        """
+        Hibernate idle sessions and, under memory pressure, the least recently used ones.
+
+        Returns
+        -------
+        int
+            Number of hibernated sessions.
+        """
+        with self._lock:
+            hibernated = 0
+            now = self.clock()
+            for session_id, (_, last_used) in list(self._resident.items()):
+                if now - last_used <= self.ttl:
+                    break  # sessions are ordered by last use
+                hibernated += self.hibernate(session_id, "ttl")
+            pressure = self.memory_pressure()
+            if pressure is not None and pressure > 1:
+                for session_id in list(self._resident)[: math.ceil(len(self._resident) * PRESSURE_EVICT_FRACTION)]:
+                    hibernated += self.hibernate(session_id, "pressure")
+            return hibernated
+
+    def close(self) -> None:
+        """Hibernate every resident session, e.g. before the server shuts down."""
+        with self._lock:
+            for session_id in list(self._resident):
+                self.hibernate(session_id, "close")
+
+    def report(self) -> str:
+        """Return a summary of the resident sessions, hit rates, rehydration latency and memory pressure."""
+        with self._lock:
+            stats = self.stats
+            lookups = stats.hits + stats.misses + stats.rehydrations
+            lines = [
+                f"resident sessions: {len(self._resident)}/{self.max_sessions}",
+                f"lookups: {lookups} ({stats.hits} hits, {stats.rehydrations} rehydrated, {stats.misses} misses)",
+            ]
+            if stats.hibernations:
+                reasons = ", ".join(f"{count} {reason}" for reason, count in sorted(stats.hibernations.items()))
+                lines.append(f"hibernated: {reasons}")
+            p50, p95 = stats.rehydration_latency(0.5), stats.rehydration_latency(0.95)
+            if p50 is not None:
+                lines.append(f"rehydration latency: p50 {p50 * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms")
+            pressure = self.memory_pressure()
+            if pressure is not None:
+                lines.append(f"memory pressure: {pressure:.0%} of {self.max_memory / 2**20:.0f} MiB")
+            return "\n".join(lines)
@@ -0,0 +1,550 @@
+import contextlib
+import hashlib
+import json
+import math
+import os
+import random
+import re
+from bisect import bisect_right
+from dataclasses import asdict, dataclass, field
+from functools import cache
+from pathlib import Path
+
+from core.entities import Armor, Enemy, Item, Potion, Weapon
+from core.entities.enemy import SpecialAttack
+
+LORE_DOCUMENTS_DIR = Path(__file__).parent / "lore_documents"
+BESTIARY_FILE = LORE_DOCUMENTS_DIR / "bestiary.txt"
+ITEMS_FILE = LORE_DOCUMENTS_DIR / "items.txt"
+CACHE_DIR = Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "neurons-and-dragons"
+CACHE_FILE = CACHE_DIR / "catalogue_cache.json"
+CACHE_VERSION = 2
+
+THREAT_TIERS = {
+    "low": 1,
+    "low–medium": 2,
+    "medium": 3,
+    "medium–high": 4,
+    "high": 5,
+    "very high": 6,
+    "extreme": 7,
+    "catastrophic": 8,
+}
+RARITIES = ("common", "uncommon", "rare", "epic", "legendary")
+# Lore rarities beyond the game's, mapped onto the nearest game rarity.
+RARITY_ALIASES = {"mythic": "legendary"}
+# The lore spans rats to world-ending titans; the player has 100 HP and hits for 1d20 + attack.
+LORE_HP_RANGE = (30, 3000)
+GAME_HP_RANGE = (20, 150)
+ITEM_SECTIONS = {"Weapons": "weapon", "Armors": "armor", "Potions": "potion", "Artifacts": "artifact"}
+WEAPON_TYPES = {
+    "sword": "sword",
+    "rapier": "sword",
+    "axe": "axe",
+    "bow": "bow",
+    "crossbow": "bow",
+    "staff": "staff",
+    "wand": "staff",
+    "dagger": "dagger",
+    "daggers": "dagger",
+    # Lore weapon types without a game counterpart, mapped onto the nearest game type.
+    "sabre": "sword",
+    "blade": "sword",
+    "whip": "dagger",
+    "thrown": "dagger",
+    "javelin": "bow",
+    "harpoon": "bow",
+    "spear": "staff",
+    "pike": "staff",
+    "lance": "staff",
+    "rod": "staff",
+    "scepter": "staff",
+    "thrown axe": "axe",
+    "halberd": "axe",
+    "glaive": "axe",
+    "scythe": "axe",
+    "hammer": "axe",
+    "warhammer": "axe",
+    "maul": "axe",
+    "club": "axe",
+    "flail": "axe",
+    "pick": "axe",
+}
+
+_ENTRY_RE = re.compile(r"^\d+\.\s+(?P<name>.+)$")
+_FIELD_RE = re.compile(r"^(?P<key>[A-Z][A-Za-z ]*):\s*(?P<value>.*)$")
+_HP_RE = re.compile(r"(\d+)\D+(\d+)")
+_NOTE_RE = re.compile(r"\s*\([^)]*\)")
+_WORD_RE = re.compile(r"[a-z]+")
+_STOP_WORDS = {"the", "of", "and", "a", "an", "in", "to"}
+
+
+@dataclass
+class BestiaryEntry:
+    """
+    A creature parsed from the bestiary lore document.
+
+    Attributes
+    ----------
+    name: str
+        Creature name.
+    origin: str
+        Where the creature comes from, as written in the lore.
+    hp_min: int
+        Lower bound of the creature's hit points, as written in the lore.
+    hp_max: int
+        Upper bound of the creature's hit points, as written in the lore.
+    threat: str
+        Threat label as written in the lore (e.g. "Medium–High").
+    threat_tier: int
+        Threat label mapped to an ordinal tier (1 = low, 8 = catastrophic).
+    abilities: list[str]
+        Abilities in "Name: effect" form.
+    behavior, weakness, combat_style: str
+        Free-form descriptions.
+    drops: list[str]
+        Items the creature may drop.
+    """
+
+    name: str
+    origin: str = ""
+    hp_min: int = 0
+    hp_max: int = 0
+    threat: str = ""
+    threat_tier: int = 0
+    abilities: list[str] = field(default_factory=list)
+    behavior: str = ""
+    weakness: str = ""
+    combat_style: str = ""
+    drops: list[str] = field(default_factory=list)
+
+    def game_hp(self) -> tuple[int, int]:
+        """Return the creature's HP range on the game's scale (see 'scale_hp')."""
+        return scale_hp(self.hp_min), scale_hp(self.hp_max)
+
+    def stat_block(self) -> str:
+        """Return a compact single-line stat block suitable for a prompt, with HP on the game's scale."""
+        abilities = "; ".join(self.abilities)
+        hp_min, hp_max = self.game_hp()
+        return (
+            f"{self.name} | HP {hp_min}-{hp_max} | Threat {self.threat} | Abilities: {abilities} | "
+            f"Weakness: {self.weakness} | Drops: {', '.join(self.drops)}"
+        )
+
+    def to_enemy(self, rng: random.Random | None = None) -> Enemy:
+        """
+        Build an 'Enemy' with stats taken from the lore, without calling the model.
+
+        Parameters
+        ----------
+        rng: random.Random, optional
+            Random generator used to roll the HP within the lore range.
+
+        Returns
+        -------
+        Enemy
+            Enemy with HP within the game-scale lore range and attack stats derived from the threat tier.
+        """
+        rng = rng or random.Random()
+        special_attacks = [
+            SpecialAttack(name=name.strip(), description=(effect or name).strip(), chance=20)
+            for name, _, effect in (ability.partition(":") for ability in self.abilities[:3])
+        ]
+        return Enemy(
+            name=self.name,
+            description=f"{self.behavior}. {self.combat_style}.".strip(". "),
+            hp=rng.randint(*self.game_hp()),
+            attack_max=2 + 2 * self.threat_tier,
+            critical_hit_chance=5 + 2 * self.threat_tier,
+            escape_difficulty=min(20, 4 + 2 * self.threat_tier),
+            special_attacks=special_attacks,
+        )
+
+
+@dataclass
+class ItemEntry:
+    """
+    An item parsed from the item compendium lore document.
+
+    Attributes
+    ----------
+    name: str
+        Item name.
+    category: str
+        Compendium section: "weapon", "armor", "potion" or "artifact".
+    rarity: str
+        Lower-cased rarity, one of 'RARITIES' ('RARITY_ALIASES' are mapped onto them).
+    item_type: str
+        Item type as written in the lore (e.g. "Sword", "Heavy Armor").
+    attack: int | None
+        Attack value for weapons.
+    defense: int | None
+        Defense value for armors.
+    lore, effect: str
+        Free-form descriptions.
+    extra: dict[str, str]
+        Any other fields (e.g. "Curse", "Risk", "Description").
+    """
+
+    name: str
+    category: str
+    rarity: str = "common"
+    item_type: str = ""
+    attack: int | None = None
+    defense: int | None = None
+    lore: str = ""
+    effect: str = ""
+    extra: dict[str, str] = field(default_factory=dict)
+
+    def stat_block(self) -> str:
+        """Return a compact single-line description suitable for a prompt."""
+        stats = [self.category, self.item_type.lower(), self.rarity]
+        if self.attack is not None:
+            stats.append(f"attack {self.attack}")
+        if self.defense is not None:
+            stats.append(f"defense {self.defense}")
+        return f"{self.name} ({', '.join(s for s in stats if s)}): {self.effect}"
+
+    def to_item(self) -> Item:
+        """
+        Build the matching game item model.
+
+        Returns
+        -------
+        Item
+            A 'Weapon', 'Armor' or 'Potion' when the entry maps onto one, otherwise a plain 'Item'.
+        """
+        description = self.effect or self.extra.get("Description", "") or self.lore
+        weapon_type = weapon_type_of(self.item_type)
+        if self.category == "weapon" and weapon_type is not None:
+            return Weapon(
+                name=self.name,
+                description=description,
+                rarity=self.rarity,
+                damage=self.attack or 1,
+                weapon_type=weapon_type,
+            )
+        if self.category == "armor":
+            return Armor(name=self.name, description=description, rarity=self.rarity, defense=self.defense or 1)
+        if self.category == "potion" and "heal" in self.effect.lower():
+            return Potion(name=self.name, description=description, rarity=self.rarity)
+        return Item(name=self.name, description=description, rarity=self.rarity)
+
+
+def scale_hp(hp: int) -> int:
+    """
+    Map a lore HP value onto the game's HP scale.
+
+    'LORE_HP_RANGE' is mapped logarithmically onto 'GAME_HP_RANGE', so creatures keep their
+    order and a titan is a long fight instead of an unwinnable one.
+    """
+    (lore_min, lore_max), (game_min, game_max) = LORE_HP_RANGE, GAME_HP_RANGE
+    position = math.log(max(hp, lore_min) / lore_min) / math.log(lore_max / lore_min)
+    return round(game_min + min(1.0, position) * (game_max - game_min))
+
+
+def weapon_type_of(item_type: str) -> str | None:
+    """Return the game weapon type of a lore item type (e.g. "Warhammer" -> "axe"), None if it is not a weapon."""
+    item_type = item_type.lower()
+    if item_type in WEAPON_TYPES:
+        return WEAPON_TYPES[item_type]
+    return next((WEAPON_TYPES[word] for word in _WORD_RE.findall(item_type) if word in WEAPON_TYPES), None)
+
+
+def _clean(line: str) -> str:
+    return line.strip().lstrip("•").strip()
+
+
+def _iter_blocks(text: str):
+    """Yield (section, name, lines) for every numbered entry of a lore document."""
+    section, name, lines = None, None, []
+    for raw in text.splitlines():
+        line = raw.strip()
+        if line in ITEM_SECTIONS:
+            if name is not None:
+                yield section, name, lines
+            section, name, lines = line, None, []
+            continue
+        match = _ENTRY_RE.match(line)
+        if match:
+            if name is not None:
+                yield section, name, lines
+            name, lines = match.group("name").strip(), []
+        elif name is not None and line:
+            lines.append(raw)
+    if name is not None:
+        yield section, name, lines
+
+
+def parse_bestiary(text: str) -> list[BestiaryEntry]:
+    """
+    Parse the bestiary lore document into typed entries.
+
+    Parameters
+    ----------
+    text: str
+        Content of the bestiary document.
+
+    Returns
+    -------
+    list[BestiaryEntry]
+        Creatures in document order.
+    """
+    entries = []
+    for _, name, lines in _iter_blocks(text):
+        entry = BestiaryEntry(name=name)
+        current = None
+        for raw in lines:
+            line = _clean(raw)
+            if current == "Abilities" and raw.lstrip().startswith("•"):
+                entry.abilities.append(line)
+                continue
+            match = _FIELD_RE.match(line)
+            if not match:
+                continue
+            current, value = match.group("key"), match.group("value").strip()
+            if current == "Origin":
+                entry.origin = value
+            elif current == "HP":
+                hp = _HP_RE.search(value)
+                entry.hp_min, entry.hp_max = (int(hp.group(1)), int(hp.group(2))) if hp else (0, 0)
+            elif current == "Threat":
+                entry.threat = value
+                entry.threat_tier = THREAT_TIERS.get(value.lower(), 0)
+            elif current == "Behavior":
+                entry.behavior = value
+            elif current == "Weakness":
+                entry.weakness = value
+            elif current == "Combat Style":
+                entry.combat_style = value
+            elif current == "Drops":
+                drops = [drop.strip() for drop in value.split(",")]
+                entry.drops = [drop for drop in drops if drop and _NOTE_RE.sub("", drop).lower() != "none"]
+        entries.append(entry)
+    return entries
+
+
+def parse_items(text: str) -> list[ItemEntry]:
+    """
+    Parse the item compendium lore document into typed entries.
+
+    Parameters
+    ----------
+    text: str
+        Content of the item compendium document.
+
+    Returns
+    -------
+    list[ItemEntry]
+        Items in document order.
+    """
+    entries = []
+    for section, name, lines in _iter_blocks(text):
+        entry = ItemEntry(name=name, category=ITEM_SECTIONS.get(section, "artifact"))
+        current = None
+        for raw in lines:
+            line = _clean(raw)
+            match = _FIELD_RE.match(line)
+            if not match:
+                if current is not None:
+                    entry.extra[current] = f"{entry.extra.get(current, '')} {line}".strip()
+                continue
+            current, value = match.group("key"), match.group("value").strip()
+            if current == "Type":
+                entry.item_type = value
+            elif current == "Rarity":
+                rarity = RARITY_ALIASES.get(value.lower(), value.lower())
+                entry.rarity = rarity if rarity in RARITIES else "common"
+            elif current == "Attack":
+                entry.attack = int(value) if value.isdigit() else None
+            elif current == "Defense":
+                entry.defense = int(value) if value.isdigit() else None
+            elif current == "Lore":
+                entry.lore = value
+            elif current == "Effect":
+                entry.effect = value
+            else:
+                entry.extra[current] = value
+        entries.append(entry)
+    return entries
+
+
+def _keywords(text: str) -> set[str]:
+    return {word.rstrip("s") for word in _WORD_RE.findall(text.lower()) if word not in _STOP_WORDS}
+
+
+class LoreCatalogue:
+    """
+    Typed, indexed catalogue of the creatures and items described in the lore documents.
+
+    Parameters
+    ----------
+    creatures: list[BestiaryEntry]
+        Parsed bestiary entries.
+    items: list[ItemEntry]
+        Parsed item compendium entries.
+
+    Notes
+    -----
+    Lookups by name are case-insensitive. Creatures are additionally indexed by threat
+    tier, origin keyword and HP (sorted by 'hp_max' for range queries), items by rarity
+    and category.
+    """
+
+    def __init__(self, creatures: list[BestiaryEntry], items: list[ItemEntry]):
+        self.creatures = {creature.name.lower(): creature for creature in creatures}
+        self.items = {item.name.lower(): item for item in items}
+
+        self.by_threat: dict[int, list[BestiaryEntry]] = {}
+        self.by_origin: dict[str, list[BestiaryEntry]] = {}
+        for creature in creatures:
+            self.by_threat.setdefault(creature.threat_tier, []).append(creature)
+            for keyword in _keywords(creature.origin):
+                self.by_origin.setdefault(keyword, []).append(creature)
+
+        self._by_hp = sorted(creatures, key=lambda c: c.hp_max)
+        self._hp_keys = [creature.hp_max for creature in self._by_hp]
+
+        self.by_rarity: dict[str, list[ItemEntry]] = {}
+        self.by_category: dict[str, list[ItemEntry]] = {}
+        for item in items:
+            self.by_rarity.setdefault(item.rarity, []).append(item)
+            self.by_category.setdefault(item.category, []).append(item)
+
+    def creature(self, name: str) -> BestiaryEntry | None:
+        return self.creatures.get(name.lower())
+
+    def item(self, name: str) -> ItemEntry | None:
+        """Return an item by name, ignoring parenthetical notes (e.g. "Siren Pearl (cursed)")."""
+        return self.items.get(_NOTE_RE.sub("", name).strip().lower())
+
+    def creatures_in_hp_range(self, hp_min: int, hp_max: int) -> list[BestiaryEntry]:
+        """Return creatures whose whole lore HP range lies within [hp_min, hp_max]."""
+        upper = bisect_right(self._hp_keys, hp_max)
+        return [creature for creature in self._by_hp[:upper] if creature.hp_min >= hp_min]
+
+    def creatures_for(self, location: str, max_tier: int, max_hp: int | None = None) -> list[BestiaryEntry]:
+        """
+        Return creatures fitting a location, a maximum threat tier and a maximum HP.
+
+        Creatures whose origin shares a keyword with the location are returned first;
+        if none match, every creature up to 'max_tier' and 'max_hp' is returned.
+
+        Parameters
+        ----------
+        location: str
+            Current world location.
+        max_tier: int
+            Highest allowed threat tier.
+        max_hp: int or None, optional
+            Highest allowed HP on the game's scale (see 'BestiaryEntry.game_hp'), unbounded if None.
+
+        Returns
+        -------
+        list[BestiaryEntry]
+            Matching creatures.
+        """
+
+        def fits(creature: BestiaryEntry) -> bool:
+            return max_hp is None or creature.game_hp()[1] <= max_hp
+
+        local = {
+            creature.name: creature
+            for keyword in _keywords(location)
+            for creature in self.by_origin.get(keyword, [])
+            if creature.threat_tier <= max_tier and fits(creature)
+        }
+        if local:
+            return list(local.values())
+        return [
+            creature for tier in range(1, max_tier + 1) for creature in self.by_threat.get(tier, []) if fits(creature)
+        ]
+
+    def items_up_to(self, rarity: str) -> list[ItemEntry]:
+        """Return all items whose rarity is not above the given one."""
+        allowed = RARITIES[: RARITIES.index(rarity) + 1]
+        return [item for r in allowed for item in self.by_rarity.get(r, [])]
+
+    def to_dict(self) -> dict:
+        return {
+            "creatures": [asdict(creature) for creature in self.creatures.values()],
+            "items": [asdict(item) for item in self.items.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LoreCatalogue":
+        return cls(
+            creatures=[BestiaryEntry(**creature) for creature in data["creatures"]],
+            items=[ItemEntry(**item) for item in data["items"]],
+        )
+
+
+def _fingerprint(*paths: Path) -> str:
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    for path in paths:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def load_catalogue(
+    bestiary_path: Path = BESTIARY_FILE, items_path: Path = ITEMS_FILE, cache_path: Path | None = CACHE_FILE
+) -> LoreCatalogue:
+    """
+    Load the lore catalogue, reusing the compiled form cached on disk when it is up to date.
+
+    Parameters
+    ----------
+    bestiary_path: Path, optional
+        Bestiary lore document.
+    items_path: Path, optional
+        Item compendium lore document.
+    cache_path: Path or None, optional
+        Location of the compiled JSON cache. 'None' disables caching.
+
+    Returns
+    -------
+    LoreCatalogue
+        Parsed and indexed catalogue.
+
+    Notes
+    -----
+    The cache is keyed by a hash of both source documents, so editing the lore
+    invalidates it automatically. It lives in the user cache directory (see 'CACHE_DIR'),
+    not the package, and is replaced atomically so concurrent loads never read half a
+    file. Failing to write it (e.g. a read-only home directory) only costs the next
+    start a re-parse.
+    """
+    fingerprint = _fingerprint(bestiary_path, items_path)
+    if cache_path is not None and cache_path.exists():
+        try:
+            cached = json.loads(cache_path.read_text(encoding="utf-8"))
+            if cached.get("fingerprint") == fingerprint:
+                return LoreCatalogue.from_dict(cached)
+        except (json.JSONDecodeError, KeyError, TypeError):
+            pass
+
+    catalogue = LoreCatalogue(
+        creatures=parse_bestiary(bestiary_path.read_text(encoding="utf-8")),
+        items=parse_items(items_path.read_text(encoding="utf-8")),
+    )
+    if cache_path is not None:
+        _write_cache(cache_path, {"fingerprint": fingerprint, **catalogue.to_dict()})
+    return catalogue
+
+
+def _write_cache(path: Path, data: dict) -> None:
+    """Write the compiled catalogue through a temporary file, ignoring failures."""
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary.write_text(json.dumps(data), encoding="utf-8")
+        temporary.replace(path)
+    except OSError:
+        with contextlib.suppress(OSError):
+            temporary.unlink(missing_ok=True)
+
+
+@cache
+def get_catalogue() -> LoreCatalogue:
+    """Return the process-wide lore catalogue."""
+    return load_catalogue()
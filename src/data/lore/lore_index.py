@@ -0,0 +1,214 @@
+import os
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from data.lore.catalogue import LORE_DOCUMENTS_DIR
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 150
+ENTITY_SEPARATOR = "|"
+
+DOCUMENT_KINDS = {"locations.txt": "location", "bestiary.txt": "creature", "items.txt": "item"}
+CHAPTER_KINDS = {
+    "THE GODS": "deity",
+    "THE WORLD OF AERATHYS": "location",
+    "THE MORTAL RACES": "race",
+    "THE FACTIONS": "faction",
+    "THE MAIN REGIONS OF INTEREST": "location",
+    "THE GREAT THREATS": "threat",
+}
+
+_HEADING_RE = re.compile(r"^\d+(?:\.\d+)*[.)]?\s+(?P<name>\S.*)$")
+_NAME_END_RE = re.compile(r"\s+[—–-]\s+|:|\(")
+
+
+@dataclass(frozen=True)
+class LoreEntity:
+    """
+    A named entity (location, creature, faction, ...) with its own heading in the lore documents.
+
+    Attributes
+    ----------
+    name: str
+        Entity name as written in the heading, without epithets.
+    kind: str
+        "location", "creature", "item", "deity", "race", "faction", "threat" or "topic".
+    source: str
+        File name of the lore document.
+    """
+
+    name: str
+    kind: str
+    source: str
+
+
+def normalize(name: str) -> str:
+    """Return the lookup key of an entity name: lower-cased, without a leading article and curly apostrophes."""
+    key = " ".join(name.replace("’", "'").casefold().split())
+    return key[4:] if key.startswith("the ") else key
+
+
+def parse_headings(text: str, source: str) -> list[tuple[int, LoreEntity]]:
+    """
+    Extract the entities named by the numbered headings of a lore document.
+
+    Upper-case headings are chapters; in the world bible they select the kind of the
+    entities below them (see 'CHAPTER_KINDS'), other documents have a single kind.
+
+    Parameters
+    ----------
+    text: str
+        Content of the lore document.
+    source: str
+        File name of the document.
+
+    Returns
+    -------
+    list[tuple[int, LoreEntity]]
+        Character offset of each heading with its entity, in document order.
+    """
+    headings = []
+    kind = DOCUMENT_KINDS.get(source, "topic")
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        match = _HEADING_RE.match(line.strip())
+        if match:
+            name = _NAME_END_RE.split(match.group("name"), maxsplit=1)[0].strip()
+            if name.isupper():
+                kind = DOCUMENT_KINDS.get(source) or CHAPTER_KINDS.get(name, "topic")
+            elif name:
+                headings.append((offset, LoreEntity(name, kind, source)))
+        offset += len(line)
+    return headings
+
+
+def _entity_pattern(names) -> re.Pattern | None:
+    """Compile a pattern matching any of the normalized names as whole words, longest names first."""
+    keys = sorted({normalize(name) for name in names}, key=len, reverse=True)
+    return re.compile(r"\b(" + "|".join(re.escape(key) for key in keys) + r")\b") if keys else None
+
+
+def load_lore_chunks(documents_dir: Path = LORE_DOCUMENTS_DIR) -> tuple[list["Document"], list[LoreEntity]]:
+    """
+    Split the lore documents into chunks tagged with the entities they are about.
+
+    A chunk is tagged with every entity of any document whose name it mentions and
+    with the entity of the heading it starts under, so chunks in the middle of a long
+    entry still belong to it. Tags are stored as an 'ENTITY_SEPARATOR'-joined string
+    in the "entities" metadata field, since vector store metadata must be scalar.
+
+    Parameters
+    ----------
+    documents_dir: Path, optional
+        Directory with the .txt and .md lore documents.
+
+    Returns
+    -------
+    tuple[list[Document], list[LoreEntity]]
+        The chunks, with "path", "module", "file" and "entities" metadata, and all entities.
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    paths = [path for path in sorted(Path(documents_dir).glob("*.*")) if path.suffix in (".txt", ".md")]
+    texts = {path: path.read_text(encoding="utf-8") for path in paths}
+    headings = {path: parse_headings(text, path.name) for path, text in texts.items()}
+    entities = [entity for path in paths for _, entity in headings[path]]
+    names = {normalize(entity.name): entity.name for entity in entities}
+    pattern = _entity_pattern(names)
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, add_start_index=True)
+    chunks = []
+    for path, text in texts.items():
+        offsets = [offset for offset, _ in headings[path]]
+        metadata = {"path": str(path), "module": os.path.dirname(path).replace("lore/", ""), "file": path.name}
+        for chunk in splitter.create_documents([text], [metadata]):
+            tags = {names[key] for key in pattern.findall(normalize(chunk.page_content))} if pattern else set()
+            section = bisect_right(offsets, chunk.metadata.pop("start_index")) - 1
+            if section >= 0:
+                tags.add(headings[path][section][1].name)
+            chunk.metadata["entities"] = ENTITY_SEPARATOR.join(sorted(tags))
+            chunks.append(chunk)
+    return chunks, entities
+
+
+class LoreIndex:
+    """
+    Inverted index from lore entities to the chunks tagged with them.
+
+    Parameters
+    ----------
+    chunks: list[Document]
+        Chunks tagged by 'load_lore_chunks'.
+    entities: list[LoreEntity]
+        Entities of the lore documents.
+
+    Notes
+    -----
+    Entities are looked up by 'normalize'd name, so "The Shattered Coast" and
+    "shattered coast" are the same key. An entity mentioned in another document is
+    indexed with the chunks of that document too (e.g. a creature in a location).
+    """
+
+    def __init__(self, chunks: list["Document"], entities: list[LoreEntity]):
+        self.chunks = chunks
+        self.entities = {normalize(entity.name): entity for entity in entities}
+        self.by_entity: dict[str, list[int]] = {}
+        for i, chunk in enumerate(chunks):
+            for name in filter(None, chunk.metadata.get("entities", "").split(ENTITY_SEPARATOR)):
+                self.by_entity.setdefault(normalize(name), []).append(i)
+        self._pattern = _entity_pattern(self.by_entity)
+
+    def match(self, text: str) -> list[LoreEntity]:
+        """
+        Return the entities a text refers to.
+
+        Parameters
+        ----------
+        text: str
+            Free text such as a location name, a quest or a history entry.
+
+        Returns
+        -------
+        list[LoreEntity]
+            The entity named exactly by the text, otherwise every entity mentioned in it
+            (longest names first, so "Emerald Forest" wins over a plain "Forest").
+        """
+        key = normalize(text)
+        if key in self.by_entity:
+            return [self.entities[key]]
+        if self._pattern is None:
+            return []
+        keys = dict.fromkeys(self._pattern.findall(key))
+        return [self.entities[key] for key in keys]
+
+    def lookup(self, text: str, k: int | None = None) -> list["Document"]:
+        """
+        Return the chunks of the entities a text refers to, without a vector search.
+
+        Parameters
+        ----------
+        text: str
+            Free text such as a location name, a quest or a history entry.
+        k: int or None, optional
+            Maximum number of chunks, all chunks if None.
+
+        Returns
+        -------
+        list[Document]
+            Chunks in entity and document order, empty if the text names no known entity.
+        """
+        indices = dict.fromkeys(i for entity in self.match(text) for i in self.by_entity[normalize(entity.name)])
+        return [self.chunks[i] for i in list(indices)[:k]]
+
+
+@cache
+def get_lore_index() -> LoreIndex:
+    """Return the process-wide lore index, built from the lore documents on first use."""
+    return LoreIndex(*load_lore_chunks())
@@ -1,15 +1,9 @@
-import glob
 import os
 
-from dotenv import load_dotenv
-from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
 from langchain_chroma import Chroma
 
-
-load_dotenv()
-
+from data.lore.lore_index import load_lore_chunks
 
 PROJ_DIR = r"C:\Repositories\NeuronsAndDragons"
 PERSIST_DIR = rf"{PROJ_DIR}\chroma_langchain_db"  # temp solution
@@ -24,8 +18,8 @@ def get_vector_store():
     1. Loads OpenAI embeddings using the `text-embedding-3-large` model.
     2. Checks whether a persisted Chroma collection already exists.
        - If it exists and contains documents, it is loaded and returned.
-       - Otherwise, lore documents are loaded from disk, split into chunks,
-         embedded, and stored in a new Chroma collection.
+       - Otherwise, lore documents are loaded from disk, split into chunks
+         (see 'load_lore_chunks'), embedded, and stored in a new Chroma collection.
     3. Persists the vector store locally for future reuse.
 
     Supported file formats:
@@ -41,6 +35,7 @@ def get_vector_store():
         - path: Full file system path to the source file
         - module: Relative directory under the lore root
         - file: File name of the source document
+        - entities: Names of the lore entities the chunk is about, '|'-joined
 
     Returns:
         Chroma:
@@ -60,28 +55,7 @@ def get_vector_store():
     if db_exists:
         return Chroma(collection_name=COLLECTION, embedding_function=embeddings, persist_directory=PERSIST_DIR)
 
-    all_docs = []
-    for path in glob.glob(f"{PROJ_DIR}/src/data/lore/lore_documents/*.*", recursive=True):
-        if path.endswith((".txt", ".md")):
-            with open(path, encoding="utf-8") as f:
-                text = f.read()
-
-            all_docs.append(
-                {
-                    "text": text,
-                    "metadata": {
-                        "path": path,
-                        "module": os.path.dirname(path).replace("lore/", ""),
-                        "file": os.path.basename(path),
-                    },
-                }
-            )
-
-    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=150)
-    doc_chunks = []
-    for d in all_docs:
-        for chunk in splitter.split_text(d["text"]):
-            doc_chunks.append(Document(page_content=chunk, metadata=d["metadata"]))
+    doc_chunks, _ = load_lore_chunks()
 
     vectorstore = Chroma.from_documents(
         documents=doc_chunks,
@@ -1,20 +1,27 @@
+import argparse
 import os
+import subprocess
+import sys
 from collections import deque
 
 from dotenv import load_dotenv
 from rich.console import Console
+from rich.table import Table
 
 from core import GameState
 from core.character_builder import create_player
 from core.entities import World
 from core.entities.constants import HISTORY_LENGTH
-from core.graph import build_graph
-from core.save import SaveManager
+from core.graph import get_graph
+from core.profiling import PROFILE_DIR, TurnProfiler, profiling_from_env, summarize
+from core.save import DEFAULT_SESSION, SaveManager, session_prefix
+from core.save_retention import SaveRetention
+from nodes.llm import cache_report
+from nodes.routing import get_router
 
 load_dotenv()
 
 console = Console()
-save_manager = SaveManager(save_dir=os.getenv("SAVE_DIR"))
 
 
 def initial_state() -> GameState:
@@ -27,16 +34,120 @@ def initial_state() -> GameState:
     )
 
 
+def import_profile(top: int = 25) -> None:
+    """
+    Report the slowest imports of the startup path.
+
+    Startup (module imports and graph construction) is replayed in a fresh
+    interpreter with 'python -X importtime', so the numbers are not skewed by
+    modules this process has already imported.
+
+    Parameters
+    ----------
+    top: int, optional
+        Number of imports to list, slowest (cumulative) first.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main; main.get_graph()"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+
+    table = Table(title=f"Startup imports: {sum(row[1] for row in rows) / 1000:.0f} ms total")
+    table.add_column("Module")
+    table.add_column("Cumulative [ms]", justify="right")
+    table.add_column("Self [ms]", justify="right")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+        table.add_row(name, f"{cumulative_us / 1000:.1f}", f"{self_us / 1000:.1f}")
+    console.print(table)
+    if result.returncode != 0:
+        console.print(f"[red]Startup failed:[/red]\n{result.stderr.splitlines()[-1]}")
+
+
+def print_turns(graph, config) -> None:
+    """Print the resumable turns of a session, newest first, as accepted by '--rewind'."""
+    from core.checkpoint import list_turns
+
+    table = Table(title=f"Session '{config['configurable']['thread_id']}'")
+    table.add_column("Rewind", justify="right")
+    table.add_column("Next scene")
+    table.add_column("Last event")
+    for turns, snapshot in enumerate(list_turns(graph, config)):
+        history = snapshot.values.get("history") or [""]
+        table.add_row(str(turns), snapshot.next[0], history[-1])
+    console.print(table)
+
+
 def main():
-    console.print("[bold green]🧙 Welcome to Neurons & Dragons![/bold green]")
+    parser = argparse.ArgumentParser(description="Neurons & Dragons")
+    parser.add_argument("--import-profile", action="store_true", help="report startup import times and exit")
+    parser.add_argument("--session", default=DEFAULT_SESSION, help="session (checkpoint thread) to play")
+    parser.add_argument("--list-turns", action="store_true", help="list the turns of the session and exit")
+    parser.add_argument("--rewind", type=int, default=0, metavar="N", help="resume the session N turns back")
+    parser.add_argument(
+        "--profile", type=int, default=None, metavar="N", help="profile every N-th turn into PROFILE_DIR (see PROFILE)"
+    )
+    args = parser.parse_args()
+    if args.import_profile:
+        import_profile()
+        return
 
-    game_state = save_manager.load()
-    if game_state is None:
-        game_state = initial_state()
+    # Imported here, not at the top: the checkpointer pulls in langgraph and langchain_core, which
+    # 'core.graph' defers until the graph is built.
+    from core.checkpoint import (
+        CHECKPOINT_BATCH_SIZE,
+        CHECKPOINT_FILE,
+        SQLiteCheckpointer,
+        rewind_config,
+        session_config,
+    )
+
+    save_manager = SaveManager(
+        save_dir=os.getenv("SAVE_DIR"),
+        prefix=session_prefix(args.session),
+        deduplicate=os.getenv("SAVE_DEDUPLICATE") == "1",
+    )
+    batch_size = int(os.getenv("CHECKPOINT_BATCH_SIZE", CHECKPOINT_BATCH_SIZE))
+    with SQLiteCheckpointer(save_manager.save_dir / CHECKPOINT_FILE, batch_size) as checkpointer:
+        config = session_config(args.session)
+        if args.list_turns:
+            print_turns(get_graph(checkpointer), config)
+            return
 
-    start_node = game_state.scene_type
-    graph = build_graph(start_node)
-    graph.invoke(game_state)
+        console.print("[bold green]🧙 Welcome to Neurons & Dragons![/bold green]")
+        resume = checkpointer.get_tuple(config) is not None
+        # New sessions start from their newest save file, so games saved before checkpoints existed carry over.
+        game_state = None if resume else save_manager.load() or initial_state()
+        profiler = profiling_from_env()
+        if args.profile is not None:
+            profiler = TurnProfiler(os.getenv("PROFILE_DIR", PROFILE_DIR), every=args.profile)
+        graph = get_graph(checkpointer, profiler)
+        if resume:
+            try:
+                config = rewind_config(graph, config, args.rewind)
+            except ValueError as e:
+                console.print(f"[red]{e}[/red] Start a new session with '--session'.")
+                return
+        retention = SaveRetention(save_manager.save_dir)
+        retention.start()
+        try:
+            graph.invoke(game_state, config, durability="sync")
+        finally:
+            retention.stop()
+            if report := cache_report():
+                console.print(f"[dim]Prompt cache usage:\n{report}[/dim]")
+            if report := get_router().report():
+                console.print(f"[dim]Model tiers:\n{report}[/dim]")
+            if profiler is not None and profiler.turns >= profiler.every:
+                summary = summarize(profiler.directory, top=10, session=profiler.session)
+                console.print(f"Profile ({profiler.directory}):\n{summary.report()}", style="dim", markup=False)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,10 @@
-from nodes.combat import combat
-from nodes.narration import narration
-from nodes.dialogue import dialogue
-from nodes.exploration import exploration
-from nodes.camp import camp
-from nodes.puzzle import puzzle
+import importlib
 
 __all__ = ["combat", "narration", "dialogue", "exploration", "camp", "puzzle"]
+
+
+def __getattr__(name: str):
+    """Import scene nodes on first access, so importing the package does not load every node and its clients."""
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f"{__name__}.{name}"), name)
@@ -1,13 +1,21 @@
+from functools import cache
 from typing import Literal
 
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable
 from pydantic import BaseModel, Field
 from rich.console import Console
 
 from core import GameState
 from core.save import SaveManager
-from nodes.constants import MODEL_NAME
+from nodes.constants import PROMPT_TOKEN_BUDGETS
+from nodes.llm import chat_model
+from nodes.routing import Route, route_model
+from nodes.streaming import StreamedField, stream_structured
+from nodes.prompt_builder import PromptBuilder, add_game_state, count_tokens
+from nodes.repair import repair_choices
 from nodes.utils import get_player_choice, list_available_player_choices
+from nodes.summarization import compact_history
 
 
 class CampUpdate(BaseModel):
@@ -30,32 +38,65 @@ class CampUpdate(BaseModel):
 
 
 console = Console()
-model = ChatOpenAI(model=MODEL_NAME, temperature=0.5).with_structured_output(CampUpdate)
 
 
-def camp(state: GameState) -> GameState:
-    state_str = state.model_dump_json()
-    prompt = (
-        "You are the Dungeon Master in a fantasy text RPG called 'Neurons & Dragons'.\n"
-        "Generate a *camp scene*.\n"
-        "The player is resting at a safe place (a camp, fire, ruins, cave, etc.).\n"
-        "Camp scenes should feel calm, introspective, or atmospheric, with a small story twist.\n\n"
-        "ALLOWED ACTIONS for camp scenes:\n"
-        "- Rest and regain health.\n"
-        "- Reflect, meditate, or experience a dream.\n"
-        "- Trigger a mysterious or prophetic dialogue (dream, vision, memory, spirit).\n\n"
-        "RULES:\n"
-        "- Provide 2–4 user_options.\n"
-        "- next_scene_type MUST have same length as user_options.\n"
-        "- Scene types allowed from camp: ['narration', 'dialogue'].\n"
-        "- Move the story forward gently.\n\n"
-        "Respond strictly following the CampUpdate schema.\n\n"
-        f"Current game state:\n{state_str}\n"
+def repair_camp_update(response: CampUpdate, messages: list[BaseMessage]) -> CampUpdate:
+    """Match 'next_scene_type' to 'user_options' and keep 2-4 distinct options (see 'repair_choices')."""
+    return repair_choices("camp", response, "user_options", "next_scene_type", "narration", messages, max_options=4)
+
+
+def fallback_camp_update(state: GameState) -> CampUpdate:
+    """Return a camp scene written without the model, shown when every tier misses the deadline."""
+    return CampUpdate(
+        narrative=f"The fire crackles as night settles over {state.world.location}. You rest until dawn.",
+        summary="The player rested at camp.",
+        user_options=["Break camp and move on", "Talk to a fellow traveler"],
+        next_scene_type=["narration", "dialogue"],
     )
 
-    response: CampUpdate = model.invoke(prompt)
 
-    console.print(f"\n{response.narrative}\n")
+@cache
+def get_model(route: Route) -> Runnable:
+    return chat_model(route.model, route.temperature, stream_usage=True).bind(response_format=CampUpdate)
+
+
+SYSTEM_PROMPT = SystemMessage(
+    "You are the Dungeon Master in a fantasy text RPG called 'Neurons & Dragons'.\n"
+    "Generate a *camp scene*.\n"
+    "The player is resting at a safe place (a camp, fire, ruins, cave, etc.).\n"
+    "Camp scenes should feel calm, introspective, or atmospheric, with a small story twist.\n\n"
+    "ALLOWED ACTIONS for camp scenes:\n"
+    "- Rest and regain health.\n"
+    "- Reflect, meditate, or experience a dream.\n"
+    "- Trigger a mysterious or prophetic dialogue (dream, vision, memory, spirit).\n\n"
+    "RULES:\n"
+    "- Provide 2–4 user_options.\n"
+    "- next_scene_type MUST have same length as user_options.\n"
+    "- Scene types allowed from camp: ['narration', 'dialogue'].\n"
+    "- Move the story forward gently.\n\n"
+    "Respond strictly following the CampUpdate schema."
+)
+
+
+def camp(state: GameState) -> GameState:
+    budget = PROMPT_TOKEN_BUDGETS["camp"] - count_tokens(SYSTEM_PROMPT.content)
+    prompt = add_game_state(PromptBuilder(budget), state).build()
+    messages = [SYSTEM_PROMPT, HumanMessage(prompt)]
+
+    console.print()
+    route = route_model("camp")
+    response = stream_structured(
+        "camp",
+        get_model(route),
+        messages,
+        CampUpdate,
+        [StreamedField("narrative")],
+        console,
+        route=route,
+        fallback=get_model,
+        fallback_response=lambda: fallback_camp_update(state),
+    )
+    response = repair_camp_update(response, messages)
 
     before = state.player.hp
     state.player.heal(50)
@@ -70,5 +111,6 @@ def camp(state: GameState) -> GameState:
     state.scene_type = response.next_scene_type[choice - 1]
     state.append_history(f"player action: {response.user_options[choice - 1]}")
 
+    compact_history(state)
     SaveManager().save(state)
     return state
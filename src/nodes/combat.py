@@ -1,6 +1,8 @@
 import random
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from functools import cache
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable
 from pydantic import BaseModel, Field
 from typing import Optional, List
 
@@ -11,9 +13,15 @@ from core import GameState
 from core.entities import Enemy, Item, Weapon, Potion, Armor, Player
 from core.entities.enemy import SpecialAttack
 from core.save import SaveManager
+from data.lore.catalogue import RARITIES, THREAT_TIERS, BestiaryEntry, get_catalogue
+from nodes.constants import ENEMY_HP_BASE, ENEMY_HP_PER_LEVEL, PROMPT_TOKEN_BUDGETS
+from nodes.content_pool import ContentPool
+from nodes.llm import chat_model, invoke_structured
+from nodes.routing import Route, route_model
+from nodes.prompt_builder import PRIORITY_LORE, PromptBuilder, add_game_state, count_tokens
+from nodes.repair import clamp
 from nodes.utils import dice_roll
-
-load_dotenv()
+from nodes.summarization import compact_history
 
 
 class CombatSetup(BaseModel):
@@ -93,7 +101,11 @@ class UI:
         self.console.print(f"• {item.name} ({item.rarity}) - {item.description or ''}")
 
 
-model = ChatOpenAI(model="gpt-5-nano", temperature=0.7).with_structured_output(CombatSetup)
+@cache
+def get_model(route: Route) -> Runnable:
+    return chat_model(route.model, route.temperature).with_structured_output(CombatSetup, include_raw=True)
+
+
 ui = UI()
 
 
@@ -158,26 +170,173 @@ def run(player: Player, enemy: Enemy) -> bool:
     return result
 
 
-def combat(state: GameState) -> GameState:
-    state_str = state.model_dump_json()
-    prompt = (
-        "You are the Dungeon Master in a fantasy text RPG called 'Neurons & Dragons'.\n"
-        "The player is about to enter combat.\n"
-        "Generate the enemy they are about to face, the introduction narrative, and possible loot.\n"
-        "Difficulty rules:\n"
-        "- Enemy should be reasonably beatable and scale approximately to the player’s current power. "
-        "However, if the story context suggests arrogance, risk, curiosity, warnings ignored, "
-        "or a clearly dangerous location or enemy type, then it is valid (and narratively appropriate) "
-        "for the enemy to be significantly stronger. In such cases, emphasize the danger in the narrative "
-        "and make it clear that the player may attempt to fight or retreat.\n"
-        "Output strictly using the CombatSetup schema (no extra fields, no commentary).\n\n"
-        f"Current game state:\n{state_str}\n"
+def max_threat_tier(state: GameState) -> int:
+    """Return the highest bestiary threat tier fitting the player's level."""
+    return min(8, 2 + state.player.level.level // 2)
+
+
+def max_enemy_hp(state: GameState) -> int:
+    """Return the highest HP (on the game's scale) of a bestiary creature the player can be expected to beat."""
+    return ENEMY_HP_BASE + ENEMY_HP_PER_LEVEL * state.player.level.level
+
+
+def max_loot_rarity(state: GameState) -> str:
+    """Return the highest rarity of lore loot fitting the player's level."""
+    return RARITIES[min(len(RARITIES) - 1, state.player.level.level // 3 + 1)]
+
+
+def is_boss(enemy: Enemy, state: GameState) -> bool:
+    """
+    Return whether an enemy is a boss for the player, i.e. above what their level is matched against.
+
+    A bestiary creature is a boss if its threat tier is above 'max_threat_tier', or if it
+    is catastrophic; any other enemy if its HP is above 'max_enemy_hp'. Saves after
+    defeating a boss are kept by save retention.
+    """
+    creature = get_catalogue().creature(enemy.name)
+    if creature is not None:
+        return creature.threat_tier > max_threat_tier(state) or creature.threat_tier == max(THREAT_TIERS.values())
+    return enemy.hp > max_enemy_hp(state)
+
+
+def creature_candidates(state: GameState) -> list[BestiaryEntry]:
+    """Return the bestiary creatures fitting the location, threat tier and HP envelope of the player."""
+    return get_catalogue().creatures_for(state.world.location, max_threat_tier(state), max_enemy_hp(state))
+
+
+def lore_stat_blocks(state: GameState, creatures: int = 3, items: int = 5) -> str:
+    """
+    Build compact bestiary and item stat blocks grounding the combat generation in the lore.
+
+    Parameters
+    ----------
+    state: GameState
+        Current game state. The player level bounds the threat tier, HP and loot rarity.
+    creatures: int, optional
+        Maximum number of candidate creatures.
+    items: int, optional
+        Maximum number of candidate loot items.
+
+    Returns
+    -------
+    str
+        Prompt section listing candidate creatures and loot.
+    """
+    candidates = creature_candidates(state)
+    loot = get_catalogue().items_up_to(max_loot_rarity(state))
+    creature_lines = "\n".join(
+        f"- {c.stat_block()}" for c in random.sample(candidates, min(creatures, len(candidates)))
+    )
+    item_lines = "\n".join(f"- {i.stat_block()}" for i in random.sample(loot, min(items, len(loot))))
+    return (
+        "Bestiary candidates (pick one, keep its HP within the listed range and its abilities as special attacks):\n"
+        f"{creature_lines}\n"
+        "Loot candidates (weapon attack maps to damage, armor defense maps to defense):\n"
+        f"{item_lines}\n"
+    )
+
+
+SYSTEM_PROMPT = SystemMessage(
+    "You are the Dungeon Master in a fantasy text RPG called 'Neurons & Dragons'.\n"
+    "The player is about to enter combat.\n"
+    "Generate the enemy they are about to face, the introduction narrative, and possible loot.\n"
+    "Difficulty rules:\n"
+    "- Enemy should be reasonably beatable and scale approximately to the player’s current power. "
+    "However, if the story context suggests arrogance, risk, curiosity, warnings ignored, "
+    "or a clearly dangerous location or enemy type, then it is valid (and narratively appropriate) "
+    "for the enemy to be significantly stronger. In such cases, emphasize the danger in the narrative "
+    "and make it clear that the player may attempt to fight or retreat.\n"
+    "Output strictly using the CombatSetup schema (no extra fields, no commentary)."
+)
+
+
+def repair_combat_setup(setup: CombatSetup) -> CombatSetup:
+    """
+    Clamp the generated enemy stats and loot to the ranges the combat rules expect.
+
+    Parameters
+    ----------
+    setup: CombatSetup
+        Generated setup, modified in place.
+
+    Returns
+    -------
+    CombatSetup
+        The repaired setup.
+    """
+    enemy = setup.enemy
+    enemy.hp = max(1, enemy.hp)
+    enemy.attack_max = max(1, enemy.attack_max)
+    enemy.attacks_per_turn = clamp(enemy.attacks_per_turn, 1, 3)
+    enemy.critical_hit_chance = clamp(enemy.critical_hit_chance, 0, 100)
+    enemy.escape_difficulty = clamp(enemy.escape_difficulty, 1, 20)
+    enemy.special_attacks = enemy.special_attacks[:3]
+    for special_attack in enemy.special_attacks:
+        special_attack.chance = clamp(special_attack.chance, 0, 100)
+        special_attack.cooldown = max(1, special_attack.cooldown)
+        special_attack.dmg_multiplier = clamp(special_attack.dmg_multiplier, 1.0, 3.0)
+    if setup.loot:
+        setup.loot = setup.loot[:3]
+    return setup
+
+
+def generate_combat_setup(state: GameState) -> CombatSetup:
+    budget = PROMPT_TOKEN_BUDGETS["combat"] - count_tokens(SYSTEM_PROMPT.content)
+    builder = add_game_state(PromptBuilder(budget), state)
+    prompt = builder.add("bestiary", lore_stat_blocks(state), PRIORITY_LORE).build()
+    route = route_model("combat")
+    setup: CombatSetup = repair_combat_setup(
+        invoke_structured("combat", get_model(route), [SYSTEM_PROMPT, HumanMessage(prompt)], route=route)
+    )
+
+    lore_entry = get_catalogue().creature(setup.enemy.name)
+    if lore_entry is not None:
+        hp_min, hp_max = lore_entry.game_hp()
+        setup.enemy.hp = min(max(setup.enemy.hp, hp_min), hp_max)
+    return setup
+
+
+def is_valid_setup(setup: CombatSetup, state: GameState) -> bool:
+    return setup.enemy.hp > 0 and setup.enemy.attack_max > 0
+
+
+def lore_combat_setup(state: GameState) -> CombatSetup:
+    """
+    Build a combat setup from the bestiary without calling the model.
+
+    Used when the generation misses its deadline and no pooled setup is available,
+    so a stalled request never blocks the player.
+
+    Parameters
+    ----------
+    state: GameState
+        Current game state. The location and player level select the creature.
+
+    Returns
+    -------
+    CombatSetup
+        Setup with a lore creature and its lore drops as loot.
+    """
+    catalogue = get_catalogue()
+    creature = random.choice(creature_candidates(state))
+    drops = [catalogue.item(name) for name in creature.drops]
+    return CombatSetup(
+        narrative=f"{creature.name} emerges near {state.world.location}, blocking your path!",
+        enemy=creature.to_enemy(),
+        loot=[drop.to_item() for drop in drops if drop is not None][:3] or None,
     )
 
-    setup: CombatSetup = model.invoke(prompt)
+
+combat_pool = ContentPool("combat", generate=generate_combat_setup, validate=is_valid_setup, fallback=lore_combat_setup)
+
+
+def combat(state: GameState) -> GameState:
+    setup: CombatSetup = combat_pool.get(state)
     player = state.player
     enemy = setup.enemy
     narrative = setup.narrative
+    milestone = None
+    boss = is_boss(enemy, state)
 
     ui.combat_intro(enemy=enemy, narrative=narrative)
 
@@ -207,6 +366,8 @@ def combat(state: GameState) -> GameState:
         ui.player_victory(enemy=enemy)
         player.gain_experience(amount=100)
         state.append_history(f"Player defeated {enemy.name}")
+        if boss:
+            milestone = "boss"
 
         if setup.loot:
             ui.loot_info()
@@ -216,5 +377,6 @@ def combat(state: GameState) -> GameState:
             state.append_history(f"Loot obtained: {[item.name for item in setup.loot]}")
 
     state.scene_type = "narration"
-    SaveManager().save(state)
+    compact_history(state)
+    SaveManager().save(state, milestone=milestone)
     return state
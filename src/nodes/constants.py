@@ -1 +1,81 @@
 MODEL_NAME = "gpt-5-nano"
+
+CONTENT_POOL_SIZE = 2
+CONTENT_POOL_LEVEL_BAND = 3
+POOLED_SCENES = ("combat", "puzzle")
+
+# Highest HP of a lore creature a player faces, ENEMY_HP_BASE + ENEMY_HP_PER_LEVEL * level (the player has 100 HP).
+ENEMY_HP_BASE = 40
+ENEMY_HP_PER_LEVEL = 10
+
+STREAM_RESPONSES = True
+
+# "inline": narration retrieves lore chunks directly and sends them with the scene request (one model round trip),
+# "agent": a lore assistant agent searches and condenses the lore before the scene request.
+LORE_MODE = "inline"
+INLINE_LORE_CHUNKS = 4
+INLINE_LORE_HISTORY = 2
+LORE_CACHE_LOCATIONS = 64
+
+PROMPT_TOKEN_BUDGETS = {
+    "narration": 6000,
+    "exploration": 5000,
+    "dialogue": 4000,
+    "camp": 3000,
+    "puzzle": 4000,
+    "combat": 5000,
+    "lore": 3000,
+}
+
+EMBEDDING_MODEL_NAME = "text-embedding-3-large"
+
+LLM_RATE_LIMITS = {
+    "default": {"requests_per_minute": 500, "tokens_per_minute": 200_000, "max_concurrency": 8},
+    "gpt-5-nano": {"requests_per_minute": 500, "tokens_per_minute": 200_000, "max_concurrency": 8},
+    "gpt-5-mini": {"requests_per_minute": 500, "tokens_per_minute": 200_000, "max_concurrency": 8},
+    "text-embedding-3-large": {"requests_per_minute": 3_000, "tokens_per_minute": 1_000_000, "max_concurrency": 8},
+}
+LLM_MAX_RETRIES = 4
+LLM_RETRY_BASE_DELAY = 0.5
+LLM_RETRY_MAX_DELAY = 20.0
+
+LLM_REQUEST_TIMEOUT = 60.0
+NODE_DEADLINES = {
+    "narration": 30.0,
+    "exploration": 25.0,
+    "dialogue": 25.0,
+    "camp": 25.0,
+    "puzzle": 30.0,
+    "combat": 30.0,
+    "lore": 30.0,
+}
+HEDGE_QUANTILE = 0.95
+HEDGE_MIN_SAMPLES = 20
+HEDGE_DEFAULT_DELAY = 10.0
+
+MODEL_TIERS = {"quality": "gpt-5-mini", "standard": "gpt-5-nano", "fast": "gpt-5-nano"}
+TIER_ORDER = ("quality", "standard", "fast")
+NODE_TIERS = {
+    "narration": "quality",
+    "dialogue": "quality",
+    "exploration": "standard",
+    "camp": "standard",
+    "puzzle": "standard",
+    "combat": "standard",
+    "lore": "fast",
+    "summarization": "fast",
+}
+NODE_TEMPERATURES = {
+    "narration": 0.9,
+    "dialogue": 0.8,
+    "exploration": 0.8,
+    "camp": 0.5,
+    "puzzle": 1.0,
+    "combat": 0.7,
+    "summarization": 0.2,
+    "repair": 0.3,
+}
+TIER_LATENCY_THRESHOLDS = {"quality": 15.0, "standard": 12.0, "fast": 10.0}
+TIER_MAX_QUEUE_DEPTH = 4
+TIER_LATENCY_WINDOW = 60.0
+TIER_MIN_SAMPLES = 5
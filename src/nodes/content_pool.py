@@ -0,0 +1,227 @@
+import importlib
+import queue
+import threading
+from collections import defaultdict, deque
+from typing import Callable, Generic, Hashable, TypeVar
+
+from core import GameState
+from nodes.constants import CONTENT_POOL_LEVEL_BAND, CONTENT_POOL_SIZE, POOLED_SCENES
+from nodes.scheduler import Priority, request_priority
+
+T = TypeVar("T")
+
+_POOLS: dict[str, "ContentPool"] = {}
+
+
+def pool_key(state: GameState) -> tuple[str, int]:
+    """
+    Return the key under which pre-generated content for a given state is shared.
+
+    Content is shared between sessions that are in the same location and in the
+    same level band, so the generated enemies and puzzles stay appropriate for the player.
+
+    Parameters
+    ----------
+    state: GameState
+        Current game state.
+
+    Returns
+    -------
+    tuple[str, int]
+        Location name and level band index.
+    """
+    return state.world.location, (state.player.level.level - 1) // CONTENT_POOL_LEVEL_BAND
+
+
+class ContentPool(Generic[T]):
+    """
+    Background pool of pre-generated scene content.
+
+    The pool keeps up to 'size' generated objects per key (see 'pool_key') and refills
+    itself asynchronously on a daemon worker thread, so a scene can start with content that
+    is already available instead of waiting for a full structured-output generation.
+    Refills are scheduled as background requests, behind the scenes players wait for.
+
+    Parameters
+    ----------
+    name: str
+        Scene type the pool serves (e.g. "combat"). Used by 'prefetch_scenes'.
+    generate: Callable[[GameState], T]
+        Function producing a single piece of content for a given state.
+    validate: Callable[[T, GameState], bool], optional
+        Predicate filtering out invalid or stale content. It is applied both when the
+        content is generated and when it is taken from the pool.
+    size: int, optional
+        Number of objects kept ready per key.
+    fallback: Callable[[GameState], T], optional
+        Function producing content without the model, used when the synchronous
+        generation fails or misses its deadline and no pooled content fits.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        generate: Callable[[GameState], T],
+        validate: Callable[[T, GameState], bool] | None = None,
+        size: int = CONTENT_POOL_SIZE,
+        fallback: Callable[[GameState], T] | None = None,
+    ):
+        self.name = name
+        self.size = size
+        self._generate = generate
+        self._validate = validate or (lambda item, state: True)
+        self._fallback = fallback
+        self._ready: dict[Hashable, deque[T]] = defaultdict(deque)
+        self._pending: dict[Hashable, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._refills: queue.SimpleQueue[tuple[Hashable, GameState]] = queue.SimpleQueue()
+        self._worker: threading.Thread | None = None
+        _POOLS[name] = self
+
+    def take(self, state: GameState) -> T | None:
+        """
+        Pop a ready object for the given state and schedule a refill.
+
+        Parameters
+        ----------
+        state: GameState
+            Current game state.
+
+        Returns
+        -------
+        T | None
+            Pre-generated content, or None if nothing valid is ready.
+        """
+        key = pool_key(state)
+        item = None
+        with self._lock:
+            ready = self._ready[key]
+            while ready:
+                candidate = ready.popleft()
+                if self._validate(candidate, state):
+                    item = candidate
+                    break
+        self.prefill(state)
+        return item
+
+    def _take_any(self, state: GameState) -> T | None:
+        """Pop valid content pooled for the same location and a neighbouring level band."""
+        location, band = pool_key(state)
+        with self._lock:
+            for (other_location, other_band), ready in self._ready.items():
+                if other_location != location or abs(other_band - band) > 1:
+                    continue
+                for candidate in list(ready):
+                    if self._validate(candidate, state):
+                        ready.remove(candidate)
+                        return candidate
+        return None
+
+    def get(self, state: GameState) -> T:
+        """
+        Return pooled content if available, otherwise generate it synchronously.
+
+        Generated content is validated like pooled content, and generated once more if it
+        is invalid. If the generation fails (e.g. it misses the node deadline) or yields
+        invalid content twice, valid content pooled for the same location and a
+        neighbouring level band is used, then the pool's fallback.
+
+        Parameters
+        ----------
+        state: GameState
+            Current game state.
+
+        Returns
+        -------
+        T
+            Content ready to be used by the scene.
+
+        Raises
+        ------
+        Exception
+            The generation error, if there is neither other pooled content nor a fallback.
+        ValueError
+            If the generated content is invalid and there is neither other pooled content nor a fallback.
+        """
+        item = self.take(state)
+        if item is not None:
+            return item
+        error = None
+        for _ in range(2):
+            try:
+                item = self._generate(state)
+            except Exception as e:  # a failed generation already took the node's deadline, do not retry it
+                error = e
+                break
+            if self._validate(item, state):
+                return item
+        item = self._take_any(state)
+        if item is not None:
+            return item
+        if self._fallback is not None:
+            return self._fallback(state)
+        if error is not None:
+            raise error
+        raise ValueError(f"Generated {self.name} content is invalid.")
+
+    def prefill(self, state: GameState) -> None:
+        """
+        Schedule background generation until the pool for the state's key is full.
+
+        The state is deep-copied so the worker never reads an object that the game loop mutates.
+
+        Parameters
+        ----------
+        state: GameState
+            Current game state used as generation context.
+        """
+        key = pool_key(state)
+        with self._lock:
+            missing = self.size - len(self._ready[key]) - self._pending[key]
+            if missing <= 0:
+                return
+            self._pending[key] += missing
+        snapshot = state.model_copy(deep=True)
+        for _ in range(missing):
+            self._refills.put((key, snapshot))
+        with self._lock:
+            if self._worker is None:  # a daemon thread, so pending refills never delay interpreter exit
+                self._worker = threading.Thread(target=self._run, name=f"{self.name}-pool", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            self._refill(*self._refills.get())
+
+    def _refill(self, key: Hashable, state: GameState) -> None:
+        try:
+            with request_priority(Priority.BACKGROUND):
+                item = self._generate(state)
+        except Exception:  # a failed background generation must never reach the player
+            item = None
+        with self._lock:
+            self._pending[key] -= 1
+            if item is not None and self._validate(item, state):
+                self._ready[key].append(item)
+
+
+def prefetch_scenes(state: GameState, scene_types: list[str]) -> None:
+    """
+    Start pre-generating content for the scenes the player may enter next.
+
+    Called while the player is still reading and choosing an option, so the
+    generation overlaps with the player's think time.
+
+    Parameters
+    ----------
+    state: GameState
+        Current game state.
+    scene_types: list[str]
+        Scene types reachable from the current player choices.
+    """
+    for scene_type in set(scene_types):
+        if scene_type in POOLED_SCENES:
+            importlib.import_module(f"nodes.{scene_type}")  # registers the pool of a lazily imported node
+        pool = _POOLS.get(scene_type)
+        if pool is not None:
+            pool.prefill(state)
@@ -1,13 +1,22 @@
+from functools import cache
 from pydantic import BaseModel, Field
 from typing import List, Literal
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable
 
 from rich.console import Console
 
 from core import GameState
 from core.save import SaveManager
-from nodes.constants import MODEL_NAME
+from nodes.constants import PROMPT_TOKEN_BUDGETS
+from nodes.llm import chat_model
+from nodes.routing import Route, route_model
+from nodes.streaming import StreamedField, stream_structured
+from nodes.prompt_builder import PromptBuilder, add_game_state, count_tokens
+from nodes.repair import repair_choices
+from nodes.content_pool import prefetch_scenes
 from nodes.utils import get_player_choice, list_available_player_choices
+from nodes.summarization import compact_history
 
 
 class DialogueUpdate(BaseModel):
@@ -22,28 +31,62 @@ class DialogueUpdate(BaseModel):
     )
 
 
-model = ChatOpenAI(model=MODEL_NAME, temperature=0.8).with_structured_output(DialogueUpdate)
-console = Console()
+def repair_dialogue_update(response: DialogueUpdate, messages: list[BaseMessage]) -> DialogueUpdate:
+    """Match 'next_scene_type' to 'player_choices' and keep 2-5 distinct choices (see 'repair_choices')."""
+    return repair_choices("dialogue", response, "player_choices", "next_scene_type", "narration", messages)
 
 
-def dialogue(state: GameState) -> GameState:
-    state_str = state.model_dump_json()
-    prompt = (
-        "You are the Dungeon Master in a fantasy text RPG called 'Neurons & Dragons'.\n"
-        "The player is now in a dialogue scene. Generate the NPC's dialogue lines, possible player responses, "
-        "and how the scene can branch next. Keep it concise and immersive.\n"
-        "RULES:\n"
-        "- Never repeat the exact same dialogue or player options from previous scenes.\n"
-        "- Branching options must meaningfully change the situation.\n"
-        "Use the DialogueUpdate schema strictly.\n\n"
-        f"Current game state:\n{state_str}\n"
+def fallback_dialogue_update(state: GameState) -> DialogueUpdate:
+    """Return a dialogue turn written without the model, shown when every tier misses the deadline."""
+    return DialogueUpdate(
+        npc_name="Stranger",
+        dialogue="Hm? Forgive me, traveler, my thoughts were elsewhere. What was it you wanted?",
+        summary="The stranger was distracted and asked the player to repeat themselves.",
+        player_choices=["Ask again", "Take your leave"],
+        next_scene_type=["dialogue", "narration"],
     )
 
-    response: DialogueUpdate = model.invoke(prompt)
+
+@cache
+def get_model(route: Route) -> Runnable:
+    return chat_model(route.model, route.temperature, stream_usage=True).bind(response_format=DialogueUpdate)
+
+
+console = Console()
+
+
+SYSTEM_PROMPT = SystemMessage(
+    "You are the Dungeon Master in a fantasy text RPG called 'Neurons & Dragons'.\n"
+    "The player is now in a dialogue scene. Generate the NPC's dialogue lines, possible player responses, "
+    "and how the scene can branch next. Keep it concise and immersive.\n"
+    "RULES:\n"
+    "- Never repeat the exact same dialogue or player options from previous scenes.\n"
+    "- Branching options must meaningfully change the situation.\n"
+    "Use the DialogueUpdate schema strictly."
+)
+
+
+def dialogue(state: GameState) -> GameState:
+    budget = PROMPT_TOKEN_BUDGETS["dialogue"] - count_tokens(SYSTEM_PROMPT.content)
+    prompt = add_game_state(PromptBuilder(budget), state).build()
+    messages = [SYSTEM_PROMPT, HumanMessage(prompt)]
 
     console.print("\n[bold cyan]🗣️ Dialogue begins[/bold cyan]\n")
-    console.print(f"[yellow]{response.npc_name}:[/yellow] {response.dialogue}\n")
+    route = route_model("dialogue")
+    response = stream_structured(
+        "dialogue",
+        get_model(route),
+        messages,
+        DialogueUpdate,
+        [StreamedField("npc_name", style="yellow", end=": "), StreamedField("dialogue")],
+        console,
+        route=route,
+        fallback=get_model,
+        fallback_response=lambda: fallback_dialogue_update(state),
+    )
+    response = repair_dialogue_update(response, messages)
 
+    prefetch_scenes(state, response.next_scene_type)
     list_available_player_choices(choices=response.player_choices)
     choice = get_player_choice("Your reply", len(response.player_choices))
 
@@ -54,5 +97,6 @@ def dialogue(state: GameState) -> GameState:
     state.append_history(f"player reply: {chosen_reply}")
     state.player.gain_experience(amount=10)
 
+    compact_history(state)
     SaveManager().save(state)
     return state
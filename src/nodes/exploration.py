@@ -1,14 +1,23 @@
+from functools import cache
 from pydantic import BaseModel, Field
 from typing import Literal, Optional
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable
 
 from rich.console import Console
 
 from core import GameState
 from core.entities import Item
 from core.save import SaveManager
-from nodes.constants import MODEL_NAME
+from nodes.constants import PROMPT_TOKEN_BUDGETS
+from nodes.llm import chat_model
+from nodes.routing import Route, route_model
+from nodes.streaming import StreamedField, stream_structured
+from nodes.prompt_builder import PromptBuilder, add_game_state, count_tokens
+from nodes.repair import repair_choices
+from nodes.content_pool import prefetch_scenes
 from nodes.utils import get_player_choice, list_available_player_choices
+from nodes.summarization import compact_history
 
 
 class ExplorationUpdate(BaseModel):
@@ -23,43 +32,76 @@ class ExplorationUpdate(BaseModel):
     summary: str = Field(description="One-line summary of what happened in this exploration turn.")
 
 
-model = ChatOpenAI(model=MODEL_NAME, temperature=0.8).with_structured_output(ExplorationUpdate)
-console = Console()
+def repair_exploration_update(response: ExplorationUpdate, messages: list[BaseMessage]) -> ExplorationUpdate:
+    """Match 'next_scene_type' to 'player_actions', keep 2-5 distinct actions and at most 3 discoveries."""
+    if response.discoveries:
+        response.discoveries = response.discoveries[:3]
+    return repair_choices("exploration", response, "player_actions", "next_scene_type", "narration", messages)
 
 
-def exploration(state: GameState) -> GameState:
-    state_str = state.model_dump_json()
-    prompt = (
-        "You are the Dungeon Master in a fantasy text RPG called 'Neurons & Dragons'.\n"
-        "The player is now in an exploration scene. Describe the surroundings, "
-        "possible actions, any items, clues, or puzzles the player can discover, "
-        "and how the scene can branch next. Keep it immersive and consequential.\n"
-        "HARD RULES (must follow exactly):\n"
-        "1) Provide 2–5 player_actions total.\n"
-        "2) next_scene_type must be the same length as player_actions and match by index.\n"
-        "3) In this turn, at least one next_scene_type MUST be one of: "
-        "narration, combat, dialogue, puzzle (i.e., not exploration).\n"
-        "4) No more than 50% of next_scene_type entries may be 'exploration'.\n"
-        "5) If the last two scene types were 'exploration', then:\n"
-        "   - Provide AT LEAST two non-exploration next_scene_type options, and\n"
-        "   - Prefer 'narration' or 'dialogue' to advance the plot.\n"
-        "6) Advance the main story or world state in a meaningful way in this turn.\n"
-        "7) Do NOT repeat discoveries, clues, puzzles, or gated areas already encountered.\n"
-        "8) Keep momentum: avoid loops like 'explore deeper' repeatedly unless it introduces "
-        "a clearly new objective, risk, or reward.\n"
-        "9) Use the ExplorationUpdate schema strictly.\n\n"
-        "Scene mix targets (soft): narration ~40%, dialogue or puzzle ~30%, "
-        "combat ~20%, exploration ≤10–30% depending on pacing.\n"
-        "If the recent scenes contain a lot of exploration, bias strongly toward narration/dialogue now.\n"
-        "If a threat is imminent, allow combat as a branch but not the only non-exploration option.\n\n"
-        f"Current game state (JSON):\n{state_str}\n"
-        f"\nRecent events (last 10):\n{state.get_history(limit=10)}\n"
+def fallback_exploration_update(state: GameState) -> ExplorationUpdate:
+    """Return an exploration turn written without the model, shown when every tier misses the deadline."""
+    return ExplorationUpdate(
+        description=f"You search {state.world.location}, but nothing stands out at first glance.",
+        player_actions=["Search further", "Move on"],
+        next_scene_type=["exploration", "narration"],
+        summary=f"The player searched {state.world.location} and found nothing.",
     )
 
-    response: ExplorationUpdate = model.invoke(prompt)
+
+@cache
+def get_model(route: Route) -> Runnable:
+    return chat_model(route.model, route.temperature, stream_usage=True).bind(response_format=ExplorationUpdate)
+
+
+console = Console()
+
+
+SYSTEM_PROMPT = SystemMessage(
+    "You are the Dungeon Master in a fantasy text RPG called 'Neurons & Dragons'.\n"
+    "The player is now in an exploration scene. Describe the surroundings, "
+    "possible actions, any items, clues, or puzzles the player can discover, "
+    "and how the scene can branch next. Keep it immersive and consequential.\n"
+    "HARD RULES (must follow exactly):\n"
+    "1) Provide 2–5 player_actions total.\n"
+    "2) next_scene_type must be the same length as player_actions and match by index.\n"
+    "3) In this turn, at least one next_scene_type MUST be one of: "
+    "narration, combat, dialogue, puzzle (i.e., not exploration).\n"
+    "4) No more than 50% of next_scene_type entries may be 'exploration'.\n"
+    "5) If the last two scene types were 'exploration', then:\n"
+    "   - Provide AT LEAST two non-exploration next_scene_type options, and\n"
+    "   - Prefer 'narration' or 'dialogue' to advance the plot.\n"
+    "6) Advance the main story or world state in a meaningful way in this turn.\n"
+    "7) Do NOT repeat discoveries, clues, puzzles, or gated areas already encountered.\n"
+    "8) Keep momentum: avoid loops like 'explore deeper' repeatedly unless it introduces "
+    "a clearly new objective, risk, or reward.\n"
+    "9) Use the ExplorationUpdate schema strictly.\n\n"
+    "Scene mix targets (soft): narration ~40%, dialogue or puzzle ~30%, "
+    "combat ~20%, exploration ≤10–30% depending on pacing.\n"
+    "If the recent scenes contain a lot of exploration, bias strongly toward narration/dialogue now.\n"
+    "If a threat is imminent, allow combat as a branch but not the only non-exploration option."
+)
+
+
+def exploration(state: GameState) -> GameState:
+    budget = PROMPT_TOKEN_BUDGETS["exploration"] - count_tokens(SYSTEM_PROMPT.content)
+    prompt = add_game_state(PromptBuilder(budget), state).build()
+    messages = [SYSTEM_PROMPT, HumanMessage(prompt)]
 
     console.print("\n[bold cyan]🧭 Exploration begins[/bold cyan]\n")
-    console.print(f"{response.description}\n")
+    route = route_model("exploration")
+    response = stream_structured(
+        "exploration",
+        get_model(route),
+        messages,
+        ExplorationUpdate,
+        [StreamedField("description")],
+        console,
+        route=route,
+        fallback=get_model,
+        fallback_response=lambda: fallback_exploration_update(state),
+    )
+    response = repair_exploration_update(response, messages)
     if response.discoveries:
         console.print("[magenta]You notice the following discoveries:[/magenta]")
         for discovery in response.discoveries:
@@ -73,6 +115,7 @@ def exploration(state: GameState) -> GameState:
         )
         console.print("")
 
+    prefetch_scenes(state, response.next_scene_type)
     list_available_player_choices(choices=response.player_actions)
     choice = get_player_choice("Your action", len(response.player_actions))
 
@@ -83,5 +126,6 @@ def exploration(state: GameState) -> GameState:
     state.history.append(f"player action: {chosen_action}")
     state.player.gain_experience(amount=25)
 
+    compact_history(state)
     SaveManager().save(state)
     return state
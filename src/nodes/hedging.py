@@ -0,0 +1,211 @@
+import contextvars
+import math
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, TypeVar
+
+from nodes.constants import HEDGE_DEFAULT_DELAY, HEDGE_MIN_SAMPLES, HEDGE_QUANTILE, NODE_DEADLINES
+from nodes.scheduler import Priority, current_priority
+
+T = TypeVar("T")
+
+executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when no request of a node answered within the node's deadline."""
+
+
+class LatencyTracker:
+    """
+    Recent response latencies of one node, used to decide when a request is slow enough to hedge.
+
+    Parameters
+    ----------
+    samples: int, optional
+        Number of recent latencies kept.
+    """
+
+    def __init__(self, samples: int = 200):
+        self._latencies: deque[float] = deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    def hedge_delay(self, quantile: float = HEDGE_QUANTILE) -> float:
+        """Return the latency quantile, or 'HEDGE_DEFAULT_DELAY' until enough latencies are recorded."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return latencies[min(len(latencies) - 1, math.ceil(quantile * len(latencies)) - 1)]
+
+
+latencies: dict[str, LatencyTracker] = {}
+_latencies_lock = threading.Lock()
+
+
+def latency_tracker(node: str) -> LatencyTracker:
+    with _latencies_lock:
+        return latencies.setdefault(node, LatencyTracker())
+
+
+def _submit(fn: Callable, *args):
+    """Run 'fn' on the hedging executor with the caller's context (e.g. the request priority)."""
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _race(node: str, launch: Callable[[int], None], events: queue.Queue, deadline: float | None):
+    """
+    Yield '(attempt, kind, payload)' events of hedged attempts until the caller stops iterating.
+
+    Attempt 0 is launched immediately. Attempt 1 is launched once the node's hedge delay passes
+    without an answer, or as soon as attempt 0 fails. 'kind' "answer" means an attempt answered
+    (its latency is recorded). Errors before the first answer are absorbed while another attempt
+    is pending, later events of any kind are passed through.
+    """
+    tracker = latency_tracker(node)
+    start = time.monotonic()
+    hedge_at = start + tracker.hedge_delay()
+    expires_at = start + deadline if deadline is not None else math.inf
+    launched, failed, answered = 1, 0, False
+    launch(0)
+    while True:
+        now = time.monotonic()
+        wake_at = min(expires_at, hedge_at) if launched == 1 and not answered else expires_at
+        try:
+            attempt, kind, payload = events.get(timeout=None if wake_at == math.inf else max(0.0, wake_at - now))
+        except queue.Empty:
+            if launched == 1 and not answered and hedge_at <= time.monotonic() < expires_at:
+                launched += 1
+                launch(1)
+                continue
+            if not answered and time.monotonic() >= expires_at:
+                raise DeadlineExceeded(f"{node}: no response within {deadline:.0f} s")
+            continue
+        if kind == "error" and not answered:
+            failed += 1
+            if failed == launched == 2:
+                raise payload
+            if launched == 1:
+                launched += 1
+                launch(1)
+            continue
+        if kind == "answer" and not answered:
+            answered = True
+            tracker.record(time.monotonic() - start)
+            expires_at = math.inf
+        yield attempt, kind, payload
+
+
+def hedged_call(node: str, fn: Callable[[], T], deadline: float | None = None) -> T:
+    """
+    Run a request with a deadline, hedging it with a second identical request when it is slow.
+
+    The second request is sent once the first one takes longer than the node's recent
+    'HEDGE_QUANTILE' latency (or fails); the first successful response wins. 'fn' should
+    raise on invalid responses (e.g. schema errors), so that only a valid response can win.
+    Background requests (see 'nodes.scheduler.request_priority') have no player waiting for
+    them and are sent once, without a deadline.
+
+    Parameters
+    ----------
+    node: str
+        Node name, selects the latency statistics and the default deadline.
+    fn: Callable[[], T]
+        Function sending the request.
+    deadline: float or None, optional
+        Seconds to wait for a response. Defaults to the node's 'NODE_DEADLINES' entry.
+
+    Returns
+    -------
+    T
+        The first successful response.
+
+    Raises
+    ------
+    DeadlineExceeded
+        If no request answered within the deadline.
+    Exception
+        The error of the hedge, if both requests failed.
+    """
+    if current_priority() == Priority.BACKGROUND:
+        return fn()
+    events: queue.Queue = queue.Queue()
+
+    def run(attempt: int) -> None:
+        try:
+            events.put((attempt, "answer", fn()))
+        except Exception as error:
+            events.put((attempt, "error", error))
+
+    deadline = NODE_DEADLINES.get(node) if deadline is None else deadline
+    for _, _, result in _race(node, lambda attempt: _submit(run, attempt), events, deadline):
+        return result
+
+
+def hedged_stream(node: str, stream: Callable[[], Iterator[T]], deadline: float | None = None) -> Iterator[T]:
+    """
+    Open a streamed request with a deadline on its first chunk, hedging it when the first chunk is slow.
+
+    Whichever request produces its first chunk first is streamed to the caller, the other one
+    is closed at its next chunk. Once text is flowing the player is no longer stalled, so the
+    deadline only covers the wait for the first chunk. Background requests are streamed directly.
+
+    Parameters
+    ----------
+    node: str
+        Node name, selects the latency statistics and the default deadline.
+    stream: Callable[[], Iterator[T]]
+        Function starting the request and yielding its chunks.
+    deadline: float or None, optional
+        Seconds to wait for the first chunk. Defaults to the node's 'NODE_DEADLINES' entry.
+
+    Yields
+    ------
+    T
+        Chunks of the winning request.
+
+    Raises
+    ------
+    DeadlineExceeded
+        If no request produced a chunk within the deadline.
+    Exception
+        The error of the winning request, or of the hedge if both requests failed before answering.
+    """
+    if current_priority() == Priority.BACKGROUND:
+        yield from stream()
+        return
+    events: queue.Queue = queue.Queue()
+    winner: list[int] = []
+
+    def run(attempt: int) -> None:
+        try:
+            for index, chunk in enumerate(stream()):
+                if winner and winner[0] != attempt:  # lost the race, closing the stream releases its request
+                    return
+                events.put((attempt, "answer" if index == 0 else "chunk", chunk))
+            events.put((attempt, "done", None))
+        except Exception as error:
+            events.put((attempt, "error", error))
+
+    deadline = NODE_DEADLINES.get(node) if deadline is None else deadline
+    race = _race(node, lambda attempt: _submit(run, attempt), events, deadline)
+    try:
+        for attempt, kind, payload in race:
+            if not winner:
+                winner.append(attempt)
+            if attempt != winner[0]:
+                continue
+            if kind == "error":
+                raise payload
+            if kind == "done":
+                return
+            yield payload
+    finally:
+        winner[:] = [-1]  # cancels the attempts still running
@@ -0,0 +1,164 @@
+from dataclasses import dataclass
+from functools import cache
+from threading import Lock
+from typing import TYPE_CHECKING, Any
+
+from nodes.constants import LLM_REQUEST_TIMEOUT
+from nodes.hedging import hedged_call
+from nodes.prompt_builder import count_tokens
+from nodes.routing import Route, get_router, route_model
+from nodes.scheduler import get_scheduler
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+    from langchain_core.runnables import Runnable
+    from langchain_openai import ChatOpenAI
+
+
+@cache
+def chat_model(model: str, temperature: float, **kwargs) -> "ChatOpenAI":
+    """
+    Create a chat model client on first use and reuse it afterwards.
+
+    The OpenAI client library is imported here rather than at module import,
+    so starting the game does not pay for it before the first model call.
+    Client-side retries are disabled unless requested, the request scheduler
+    (see 'nodes.scheduler') retries failed calls with jittered backoff instead.
+    Requests time out after 'LLM_REQUEST_TIMEOUT' seconds, so a stalled request
+    that lost a hedging race does not hold its worker and scheduler slot forever.
+
+    Parameters
+    ----------
+    model: str
+        Model name.
+    temperature: float
+        Sampling temperature.
+    **kwargs
+        Further 'ChatOpenAI' options, e.g. 'stream_usage'.
+
+    Returns
+    -------
+    ChatOpenAI
+        Shared client for the given configuration.
+    """
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=model, temperature=temperature, **{"max_retries": 0, "timeout": LLM_REQUEST_TIMEOUT, **kwargs}
+    )
+
+
+def estimate_tokens(input: Any) -> int:
+    """Estimate the prompt tokens of a model input (messages, a prompt variables dict or a string)."""
+    if isinstance(input, str):
+        return count_tokens(input)
+    if isinstance(input, dict):
+        return sum(estimate_tokens(value) for value in input.values())
+    if isinstance(input, (list, tuple)):
+        return sum(estimate_tokens(getattr(item, "content", item)) for item in input)
+    return 0
+
+
+@dataclass
+class PromptCacheStats:
+    """
+    Prompt token usage of one node, used to check how much of the prompt the provider served from its cache.
+
+    Attributes
+    ----------
+    calls: int
+        Number of model calls.
+    input_tokens: int
+        Total prompt tokens.
+    cached_tokens: int
+        Prompt tokens read from the provider prefix cache.
+    """
+
+    calls: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+
+    @property
+    def cached_ratio(self) -> float:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+
+cache_stats: dict[str, PromptCacheStats] = {}
+_stats_lock = Lock()
+
+
+def record_usage(node: str, message: "BaseMessage | None") -> None:
+    """
+    Add the token usage reported in a model response to the statistics of a node.
+
+    Parameters
+    ----------
+    node: str
+        Node (or helper) name the call is accounted to.
+    message: BaseMessage or None
+        Raw model response. Messages without usage metadata are ignored.
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return
+    cached = (usage.get("input_token_details") or {}).get("cache_read") or 0
+    with _stats_lock:
+        stats = cache_stats.setdefault(node, PromptCacheStats())
+        stats.calls += 1
+        stats.input_tokens += usage.get("input_tokens", 0)
+        stats.cached_tokens += cached
+
+
+def invoke_structured(node: str, runnable: "Runnable", input: Any, route: Route | None = None) -> Any:
+    """
+    Invoke a structured output model through the request scheduler and record its prompt cache usage.
+
+    The call is bounded by the node's deadline and hedged when slow (see 'nodes.hedging.hedged_call');
+    the first response that parses against the schema wins.
+
+    Parameters
+    ----------
+    node: str
+        Node name the call is accounted to.
+    runnable: Runnable
+        Model (or prompt | model chain) created with 'with_structured_output(..., include_raw=True)'.
+    input: Any
+        Model input, usually a list of messages with the static system prompt first.
+    route: Route or None, optional
+        Route 'runnable' was built for (see 'nodes.routing'). Selects the rate limits and the tier
+        the call is measured in. Defaults to the node's current route.
+
+    Returns
+    -------
+    Any
+        The parsed structured output.
+
+    Raises
+    ------
+    DeadlineExceeded
+        If no valid response arrived within the node's deadline.
+    Exception
+        The parsing error, if the responses do not match the schema.
+    """
+    route = route or route_model(node)
+    tokens = estimate_tokens(input)
+
+    def attempt() -> Any:
+        with get_router().measure(route):
+            result = get_scheduler().call(route.model, lambda: runnable.invoke(input), tokens=tokens)
+        record_usage(node, result["raw"])
+        if result.get("parsing_error") is not None:
+            raise result["parsing_error"]
+        return result["parsed"]
+
+    return hedged_call(node, attempt)
+
+
+def cache_report() -> str:
+    """Return a per-node summary of the share of prompt tokens served from the provider cache."""
+    with _stats_lock:
+        lines = [
+            f"{node}: {stats.calls} calls, {stats.input_tokens} prompt tokens, {stats.cached_ratio:.0%} cached"
+            for node, stats in sorted(cache_stats.items())
+        ]
+    return "\n".join(lines)
@@ -1,18 +1,23 @@
-from dotenv import load_dotenv
-from langchain_core.messages import SystemMessage
+from functools import cache
+from langchain_core.messages import BaseMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import Runnable
 from rich.console import Console
 from typing import Literal, Optional
 from pydantic import BaseModel, Field
 
 from core import GameState
 from core.save import SaveManager
-from nodes.lore_search import lore_assistant
-from nodes.constants import MODEL_NAME
+from nodes.lore_search import inline_lore, location_lore, lore_assistant
+from nodes.constants import LORE_MODE, PROMPT_TOKEN_BUDGETS
+from nodes.llm import chat_model
+from nodes.routing import Route, route_model
+from nodes.content_pool import prefetch_scenes
+from nodes.streaming import StreamedField, stream_structured
+from nodes.prompt_builder import PromptBuilder, add_game_state, count_tokens
+from nodes.repair import repair_choices
 from nodes.utils import get_player_choice, list_available_player_choices
-
-load_dotenv()
+from nodes.summarization import compact_history
 
 console = Console()
 
@@ -51,46 +56,80 @@ class SceneUpdate(BaseModel):
     quest: Optional[str] = Field(default=None, description="If quest changes, specify a new quest.")
 
 
-model = ChatOpenAI(model=MODEL_NAME, temperature=0.9).with_structured_output(SceneUpdate)
+prompt = ChatPromptTemplate(
+    [
+        SystemMessage(
+            "LLM CONTRACT: SceneUpdate\n"
+            "You must generate a JSON object that strictly conforms to the SceneUpdate schema.\n\n"
+            "GENERAL RULES\n"
+            "- Output JSON only. No explanations, comments, or markdown.\n"
+            "- Follow the schema exactly.\n"
+            "- Do not invent fields.\n"
+            "- Omit optional fields if they do not change.\n\n"
+            "STRUCTURAL RULES\n"
+            "- user_options must contain 2 to 5 items.\n"
+            "- next_scene_type must have the same length and order as user_options.\n"
+            "- Each user option must logically match its scene type.\n\n"
+            "OPTIONAL FIELDS\n"
+            "- location: only if location changes.\n"
+            "- weather: only if weather changes.\n"
+            "- quest: only if quest updates, or changes.\n\n"
+        ),
+        SystemMessage(
+            "You are the Dungeon Master in a fantasy RPG called 'Neurons & Dragons'.\n"
+            "Always push the story forward.\n"
+            "Avoid repetition and loops.\n"
+            "Avoid offering similar choices to previous scenes.\n"
+            "Introduce new NPCs, dangers, or discoveries if progress stalls.\n"
+            "If player HP < 50, one option MUST allow rest or recovery (camp).\n"
+        ),
+        HumanMessagePromptTemplate.from_template("{state}"),
+    ]
+)
+
+
+def repair_scene_update(response: SceneUpdate, messages: list[BaseMessage]) -> SceneUpdate:
+    """Match 'next_scene_type' to 'user_options' and keep 2-5 distinct options (see 'repair_choices')."""
+    return repair_choices("narration", response, "user_options", "next_scene_type", "narration", messages)
+
+
+def fallback_scene_update(state: GameState) -> SceneUpdate:
+    """Return a scene written without the model, shown when every tier misses the deadline."""
+    return SceneUpdate(
+        narrative=f"The path through {state.world.location} stretches on in silence while you weigh your next move.",
+        summary=f"The player paused in {state.world.location}.",
+        user_options=["Press on", "Look around", "Make camp"],
+        next_scene_type=["narration", "exploration", "camp"],
+    )
+
+
+@cache
+def get_chain(route: Route) -> Runnable:
+    return prompt | chat_model(route.model, route.temperature, stream_usage=True).bind(response_format=SceneUpdate)
 
 
 def narration(state: GameState) -> GameState:
-    lore_assistant(state)
-    state_str = state.model_dump_json()
-    prompt = ChatPromptTemplate(
-        [
-            SystemMessage(
-                "LLM CONTRACT: SceneUpdate\n"
-                "You must generate a JSON object that strictly conforms to the SceneUpdate schema.\n\n"
-                "GENERAL RULES\n"
-                "- Output JSON only. No explanations, comments, or markdown.\n"
-                "- Follow the schema exactly.\n"
-                "- Do not invent fields.\n"
-                "- Omit optional fields if they do not change.\n\n"
-                "STRUCTURAL RULES\n"
-                "- user_options must contain 2 to 5 items.\n"
-                "- next_scene_type must have the same length and order as user_options.\n"
-                "- Each user option must logically match its scene type.\n\n"
-                "OPTIONAL FIELDS\n"
-                "- location: only if location changes.\n"
-                "- weather: only if weather changes.\n"
-                "- quest: only if quest updates, or changes.\n\n"
-            ),
-            SystemMessage(
-                "You are the Dungeon Master in a fantasy RPG called 'Neurons & Dragons'.\n"
-                "Always push the story forward.\n"
-                "Avoid repetition and loops.\n"
-                "Avoid offering similar choices to previous scenes.\n"
-                "Introduce new NPCs, dangers, or discoveries if progress stalls.\n"
-                "If player HP < 50, one option MUST allow rest or recovery (camp).\n"
-            ),
-            HumanMessagePromptTemplate.from_template("Current game state (JSON):\n{state}"),
-        ]
+    if LORE_MODE == "inline":  # lore chunks go straight into the scene request, no lore agent round trips
+        state.lore = inline_lore(state) or state.lore
+    else:
+        lore_assistant(state)
+    system_tokens = sum(count_tokens(message.content) for message in prompt.messages[:-1])
+    state_str = add_game_state(PromptBuilder(PROMPT_TOKEN_BUDGETS["narration"] - system_tokens), state).build()
+    console.print()
+    route = route_model("narration")
+    response = stream_structured(
+        "narration",
+        get_chain(route),
+        {"state": state_str},
+        SceneUpdate,
+        [StreamedField("narrative")],
+        console,
+        route=route,
+        fallback=get_chain,
+        fallback_response=lambda: fallback_scene_update(state),
     )
-    chain = prompt | model
-    response: SceneUpdate = chain.invoke({"state": state_str})
+    response = repair_scene_update(response, prompt.format_messages(state=state_str))
 
-    narrative = response.narrative
     summary = response.summary
     user_options = response.user_options
     next_scene_type = response.next_scene_type
@@ -98,17 +137,21 @@ def narration(state: GameState) -> GameState:
     weather = response.weather
     quest = response.quest
 
-    console.print(f"\n{narrative}\n")
     state.append_history(f"dungeon master: {summary}")
-    state.world.location = location if location is not None else state.world.location
+    if location is not None and location != state.world.location:
+        if LORE_MODE == "inline":
+            location_lore.prefetch(location)  # the lore of the next scene is ready by the time it is requested
+        state.world.location = location
     state.world.weather = weather if weather is not None else state.world.weather
     state.world.quest = quest if quest is not None else state.world.quest
 
+    prefetch_scenes(state, next_scene_type)
     list_available_player_choices(choices=user_options)
     choice = get_player_choice("Your action", len(user_options))
 
     state.scene_type = next_scene_type[choice - 1]
     state.append_history(f"player action: {user_options[choice - 1]}")
 
+    compact_history(state)
     SaveManager().save(state)
     return state
@@ -0,0 +1,200 @@
+import math
+from dataclasses import dataclass
+from functools import cache, lru_cache
+from typing import Literal
+
+from core import GameState
+from nodes.constants import MODEL_NAME
+
+CHARS_PER_TOKEN = 3  # English prose averages ~4 characters per token, so the estimate errs on the long side
+
+PRIORITY_RULES = 0
+PRIORITY_WORLD = 1
+PRIORITY_PLAYER = 2
+PRIORITY_LORE = 3
+PRIORITY_RECENT_HISTORY = 4
+PRIORITY_CHAPTERS = 5
+
+
+@cache
+def _encoding(model: str):
+    """Return the tiktoken encoding for a model, or None if its data files are unavailable."""
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str, model: str = MODEL_NAME) -> int:
+    """
+    Count the tokens of a text for a given model.
+
+    Uses the model's tiktoken encoding (tiktoken is a requirement) and falls back
+    to a characters-per-token estimate only if its encoding data cannot be loaded,
+    e.g. offline on first use. The estimate overcounts typical text by about a
+    third, so prompts stay within 'PROMPT_TOKEN_BUDGETS' either way. Results are
+    cached, since the same rules and state sections are counted on every turn.
+
+    Parameters
+    ----------
+    text: str
+        Text to count.
+    model: str, optional
+        Model name used to select the tokenizer.
+
+    Returns
+    -------
+    int
+        Number of tokens.
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@dataclass
+class PromptSection:
+    """
+    A named part of a prompt.
+
+    Attributes
+    ----------
+    name: str
+        Section name, used for reporting.
+    text: str
+        Section content.
+    priority: int
+        Lower values are filled first and truncated last.
+    keep: {"head", "tail"}
+        Which end of the section survives truncation. History keeps its tail (the most recent lines).
+    title: str or None
+        Heading line rendered above the text, never truncated.
+    """
+
+    name: str
+    text: str
+    priority: int
+    keep: Literal["head", "tail"] = "head"
+    title: str | None = None
+
+
+class PromptBuilder:
+    """
+    Assemble a prompt from sections within a fixed token budget.
+
+    Sections are filled in priority order. Lines repeated from a higher-priority
+    section are dropped, and sections that do not fit are truncated line by line
+    from their least valuable end (or dropped entirely). The result keeps the
+    order in which sections were added, so the layout of the prompt is stable.
+
+    Parameters
+    ----------
+    budget: int
+        Maximum number of prompt tokens.
+    model: str, optional
+        Model name used to select the tokenizer.
+    """
+
+    def __init__(self, budget: int, model: str = MODEL_NAME):
+        self.budget = budget
+        self.model = model
+        self.sections: list[PromptSection] = []
+        self.used: dict[str, int] = {}
+
+    def add(
+        self,
+        name: str,
+        text: str | None,
+        priority: int,
+        keep: Literal["head", "tail"] = "head",
+        title: str | None = None,
+    ) -> "PromptBuilder":
+        """Add a section. Empty sections are ignored. Returns the builder to allow chaining."""
+        if text:
+            self.sections.append(PromptSection(name=name, text=text, priority=priority, keep=keep, title=title))
+        return self
+
+    def _fit(self, lines: list[str], budget: int, keep: str) -> list[str]:
+        """Return the longest run of lines from the kept end that fits in 'budget' tokens."""
+        ordered = lines if keep == "head" else lines[::-1]
+        fitted, used = [], 0
+        for line in ordered:
+            tokens = count_tokens(line + "\n", self.model)
+            if used + tokens > budget:
+                break
+            fitted.append(line)
+            used += tokens
+        return fitted if keep == "head" else fitted[::-1]
+
+    def build(self) -> str:
+        """
+        Render the prompt.
+
+        Returns
+        -------
+        str
+            Sections joined in insertion order, deduplicated and truncated to the budget.
+            Token usage per section is available in 'used' afterwards.
+        """
+        seen: set[str] = set()
+        remaining = self.budget
+        rendered: dict[int, str] = {}
+        self.used = {}
+        for index, section in sorted(enumerate(self.sections), key=lambda item: item[1].priority):
+            lines = [line for line in section.text.splitlines() if not line.strip() or line not in seen]
+            title_tokens = count_tokens(section.title + "\n", self.model) if section.title else 0
+            tokens = count_tokens("\n".join(lines), self.model)
+            if title_tokens + tokens > remaining:
+                lines = self._fit(lines, remaining - title_tokens, section.keep)
+                tokens = count_tokens("\n".join(lines), self.model) if lines else 0
+            if not any(line.strip() for line in lines):
+                continue
+            seen.update(line for line in lines if line.strip())
+            remaining -= title_tokens + tokens
+            rendered[index] = "\n".join([section.title, *lines] if section.title else lines)
+            self.used[section.name] = title_tokens + tokens
+        return "\n\n".join(rendered[index] for index in sorted(rendered))
+
+
+def add_game_state(builder: PromptBuilder, state: GameState, include_lore: bool = True) -> PromptBuilder:
+    """
+    Add the game state to a prompt as separately prioritized sections.
+
+    The state is split into world, player, lore, recent history and chapter
+    summaries instead of a single JSON dump, so history is sent once and the
+    least important parts are truncated first when the budget is tight.
+    Sections are laid out from the least to the most frequently changing one,
+    so consecutive turns share the longest possible prompt prefix.
+
+    Parameters
+    ----------
+    builder: PromptBuilder
+        Builder to add the sections to.
+    state: GameState
+        Current game state.
+    include_lore: bool, optional
+        Whether to add the current lore section.
+
+    Returns
+    -------
+    PromptBuilder
+        The same builder.
+    """
+    history = "\n".join(f"- {entry}" for entry in state.history)
+    chapters = "\n".join(f"- {chapter}" for chapter in state.chapters)
+    world = state.model_dump_json(include={"world", "scene_type"})
+    player = state.model_dump_json(include={"player"})
+    builder.add("chapters", chapters, PRIORITY_CHAPTERS, title="Earlier chapters (oldest first):")
+    if include_lore:
+        builder.add("lore", state.lore, PRIORITY_LORE, title="Lore:")
+    builder.add("world", world, PRIORITY_WORLD, title="Current world (JSON):")
+    builder.add("player", player, PRIORITY_PLAYER, title="Player (JSON):")
+    builder.add("recent history", history, PRIORITY_RECENT_HISTORY, keep="tail", title="Recent events (oldest first):")
+    return builder
@@ -1,13 +1,21 @@
+from functools import cache
 from typing import List, Literal
 
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable
 from pydantic import BaseModel, Field
 from rich.console import Console
 
 from core import GameState
 from core.save import SaveManager
-from nodes.constants import MODEL_NAME
+from nodes.constants import PROMPT_TOKEN_BUDGETS
+from nodes.llm import chat_model, invoke_structured
+from nodes.routing import Route, route_model
+from nodes.prompt_builder import PromptBuilder, add_game_state, count_tokens
+from nodes.repair import reask_field, unique_options
+from nodes.content_pool import ContentPool
 from nodes.utils import list_available_player_choices, get_player_choice
+from nodes.summarization import compact_history
 
 
 class PuzzleOption(BaseModel):
@@ -28,38 +36,122 @@ class PuzzleUpdate(BaseModel):
 
 
 console = Console()
-model = ChatOpenAI(model=MODEL_NAME, temperature=1.0).with_structured_output(PuzzleUpdate)
 
 
-def puzzle(state: GameState) -> GameState:
-    state_str = state.model_dump_json()
-    prompt = (
-        "You are the Dungeon Master in a fantasy text RPG called 'Neurons & Dragons'.\n"
-        "Generate a PUZZLE scene.\n\n"
-        "GENERAL RULES:\n"
-        "- Output JSON only.\n"
-        "- Do not include explanations or commentary.\n"
-        "- Follow the schema exactly.\n"
-        "- Do not include solution explanations.\n"
-        "PUZZLE DESIGN RULES:\n"
-        "- The puzzle must be solvable using logic or observation from the text.\n"
-        "- Do not reveal which option is correct.\n"
-        "- All options must sound plausible.\n"
-        "- Avoid trivia or real-world knowledge.\n"
-        "EXTRA RULES:\n"
-        "- Provide a clear riddle or puzzle challenge.\n"
-        "- Provide 2–5 options.\n"
-        "- EXACTLY ONE of the options must have correct=true.\n"
-        "- Wrong answers should still meaningfully branch the story (different scene types allowed).\n"
-        "- next_scene_type must reflect the consequences.\n"
-        "- Allowed next scenes: narration, combat, dialogue.\n"
-        "- If puzzle is successfully solved, story should progress.\n"
-        "- Avoid repeating puzzles from history, ALWAYS come up with a new puzzle.\n"
-        "- Respond strictly using PuzzleUpdate schema.\n\n"
-        f"Current game state:\n{state_str}\n"
+def _fix_options(options: list[PuzzleOption]) -> list[PuzzleOption]:
+    options = [options[i] for i in unique_options([option.text for option in options])][:5]
+    correct = [option for option in options if option.correct]
+    for option in correct[1:]:
+        option.correct = False
+    return options
+
+
+def repair_puzzle_update(response: PuzzleUpdate, messages: list[BaseMessage]) -> PuzzleUpdate:
+    """
+    Keep 2-5 distinct options with exactly one correct answer.
+
+    Repeated options are dropped and only the first of several correct options stays correct.
+    The options are re-asked from the model only if fewer than two remain or none is correct.
+
+    Parameters
+    ----------
+    response: PuzzleUpdate
+        Generated puzzle, modified in place.
+    messages: list[BaseMessage]
+        Messages the puzzle was generated from.
+
+    Returns
+    -------
+    PuzzleUpdate
+        The repaired puzzle. It may still be invalid if the re-asked options are, 'is_valid_puzzle' rejects it then.
+    """
+    response.options = _fix_options(response.options)
+    if len(response.options) < 2 or not any(option.correct for option in response.options):
+        problem = "provide 2 to 5 distinct options with exactly one option marked correct=true"
+        response.options = _fix_options(reask_field("puzzle", response, "options", problem, messages))
+    return response
+
+
+@cache
+def get_model(route: Route) -> Runnable:
+    return chat_model(route.model, route.temperature).with_structured_output(PuzzleUpdate, include_raw=True)
+
+
+SYSTEM_PROMPT = SystemMessage(
+    "You are the Dungeon Master in a fantasy text RPG called 'Neurons & Dragons'.\n"
+    "Generate a PUZZLE scene.\n\n"
+    "GENERAL RULES:\n"
+    "- Output JSON only.\n"
+    "- Do not include explanations or commentary.\n"
+    "- Follow the schema exactly.\n"
+    "- Do not include solution explanations.\n"
+    "PUZZLE DESIGN RULES:\n"
+    "- The puzzle must be solvable using logic or observation from the text.\n"
+    "- Do not reveal which option is correct.\n"
+    "- All options must sound plausible.\n"
+    "- Avoid trivia or real-world knowledge.\n"
+    "EXTRA RULES:\n"
+    "- Provide a clear riddle or puzzle challenge.\n"
+    "- Provide 2–5 options.\n"
+    "- EXACTLY ONE of the options must have correct=true.\n"
+    "- Wrong answers should still meaningfully branch the story (different scene types allowed).\n"
+    "- next_scene_type must reflect the consequences.\n"
+    "- Allowed next scenes: narration, combat, dialogue.\n"
+    "- If puzzle is successfully solved, story should progress.\n"
+    "- Avoid repeating puzzles from history, ALWAYS come up with a new puzzle.\n"
+    "- Respond strictly using PuzzleUpdate schema."
+)
+
+
+def generate_puzzle(state: GameState) -> PuzzleUpdate:
+    budget = PROMPT_TOKEN_BUDGETS["puzzle"] - count_tokens(SYSTEM_PROMPT.content)
+    prompt = add_game_state(PromptBuilder(budget), state).build()
+    messages = [SYSTEM_PROMPT, HumanMessage(prompt)]
+
+    route = route_model("puzzle")
+    return repair_puzzle_update(invoke_structured("puzzle", get_model(route), messages, route=route), messages)
+
+
+def is_valid_puzzle(response: PuzzleUpdate, state: GameState) -> bool:
+    correct = sum(option.correct for option in response.options)
+    return 2 <= len(response.options) <= 5 and correct == 1 and f"puzzle: {response.puzzle_prompt}" not in state.history
+
+
+# Riddles used when no puzzle can be generated in time, as (riddle, answer, wrong answers).
+FALLBACK_RIDDLES = (
+    ("What has roots nobody sees, is taller than trees, yet never grows?", "A mountain", ["An oak", "A shadow"]),
+    ("The more of me you take, the more you leave behind. What am I?", "Footsteps", ["Coins", "Memories"]),
+    ("I speak without a mouth and hear without ears. What am I?", "An echo", ["A ghost", "The wind"]),
+    ("What can fill a room but takes up no space?", "Light", ["Smoke", "Water"]),
+)
+
+
+def fallback_puzzle(state: GameState) -> PuzzleUpdate:
+    """
+    Build a riddle puzzle without calling the model.
+
+    Used when the generation misses its deadline and no pooled puzzle is available. The
+    first riddle the player has not seen yet is chosen, and the position of the correct
+    answer varies between riddles.
+    """
+    seen = [f"puzzle: {riddle}" in state.history for riddle, _, _ in FALLBACK_RIDDLES]
+    index = seen.index(False) if False in seen else len(FALLBACK_RIDDLES) - 1
+    riddle, answer, wrong = FALLBACK_RIDDLES[index]
+    options = [PuzzleOption(text=text, correct=False, next_scene_type="narration") for text in wrong]
+    options.insert(index % (len(options) + 1), PuzzleOption(text=answer, correct=True, next_scene_type="narration"))
+    return PuzzleUpdate(
+        narrative=f"Carved into a weathered stone in {state.world.location}, an inscription asks a question.",
+        puzzle_prompt=riddle,
+        summary="The player found a riddle carved into a stone.",
+        options=options,
     )
 
-    response: PuzzleUpdate = model.invoke(prompt)
+
+puzzle_pool = ContentPool("puzzle", generate=generate_puzzle, validate=is_valid_puzzle, fallback=fallback_puzzle)
+
+
+def puzzle(state: GameState) -> GameState:
+    response: PuzzleUpdate = puzzle_pool.get(state)
 
     console.print(f"\n{response.narrative}\n")
     console.print(f"[yellow]{response.puzzle_prompt}[/yellow]\n")
@@ -82,5 +174,6 @@ def puzzle(state: GameState) -> GameState:
 
     state.scene_type = choice.next_scene_type
 
+    compact_history(state)
     SaveManager().save(state)
     return state
@@ -0,0 +1,159 @@
+from dataclasses import replace
+from typing import Any, Sequence, TypeVar
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from pydantic import BaseModel, create_model
+
+from nodes.constants import NODE_TEMPERATURES
+from nodes.llm import chat_model, invoke_structured
+from nodes.routing import route_model
+
+FALLBACK_OPTION = "Continue"
+
+T = TypeVar("T")
+M = TypeVar("M", bound=BaseModel)
+
+
+def clamp(value: T, low: T, high: T) -> T:
+    """Return 'value' limited to the range [low, high]."""
+    return max(low, min(high, value))
+
+
+def fit_length(values: list[T], length: int, fill: T) -> list[T]:
+    """Return 'values' truncated or padded with 'fill' to exactly 'length' items."""
+    return list(values[:length]) + [fill] * (length - len(values))
+
+
+def unique_options(options: Sequence[str]) -> list[int]:
+    """Return the indices of the non-empty options, dropping repeated (case-insensitive) ones."""
+    seen: set[str] = set()
+    kept = []
+    for i, option in enumerate(options):
+        key = option.strip().casefold()
+        if key and key not in seen:
+            seen.add(key)
+            kept.append(i)
+    return kept
+
+
+def reask_fields(
+    node: str,
+    response: M,
+    fields: Sequence[str],
+    problem: str,
+    messages: Sequence[BaseMessage],
+) -> dict[str, Any]:
+    """
+    Ask the model to regenerate invalid fields of a structured response.
+
+    The original conversation is replayed with the invalid response appended, followed by
+    a request for the fields, so the cached prompt prefix is reused and the model only
+    generates the few tokens of the fields instead of the whole scene. Fields that depend
+    on each other (e.g. options and their scene types) are re-asked together so they stay
+    consistent. The re-ask goes to the model the node is routed to, since a prompt prefix
+    is only cached per model, at the lower "repair" temperature.
+
+    Parameters
+    ----------
+    node: str
+        Node name, the call is accounted to '<node>:repair'.
+    response: BaseModel
+        Invalid structured response.
+    fields: Sequence[str]
+        Names of the fields to regenerate.
+    problem: str
+        Description of what is wrong with the fields.
+    messages: Sequence[BaseMessage]
+        Messages the response was generated from.
+
+    Returns
+    -------
+    dict[str, Any]
+        New values of the fields by name, validated against the fields' schemas.
+    """
+    model_fields = type(response).model_fields
+    schema = create_model(
+        f"{type(response).__name__}Fix",
+        **{field: (model_fields[field].annotation, model_fields[field]) for field in fields},
+    )
+    route = replace(route_model(node), temperature=NODE_TEMPERATURES["repair"])
+    model = chat_model(route.model, route.temperature).with_structured_output(schema, include_raw=True)
+    names = ", ".join(f"'{field}'" for field in fields)
+    request = HumanMessage(
+        f"The {names} {'field is' if len(fields) == 1 else 'fields are'} invalid in your response: {problem}\n"
+        f"Return only corrected {names}, consistent with the rest of the response."
+    )
+    messages = [*messages, AIMessage(response.model_dump_json()), request]
+    fixed = invoke_structured(f"{node}:repair", model, messages, route=route)
+    return {field: getattr(fixed, field) for field in fields}
+
+
+def reask_field(node: str, response: M, field: str, problem: str, messages: Sequence[BaseMessage]) -> Any:
+    """Ask the model to regenerate a single invalid field of a structured response (see 'reask_fields')."""
+    return reask_fields(node, response, [field], problem, messages)[field]
+
+
+def repair_choices(
+    node: str,
+    response: M,
+    options_field: str,
+    scene_field: str,
+    default_scene: str,
+    messages: Sequence[BaseMessage],
+    min_options: int = 2,
+    max_options: int = 5,
+) -> M:
+    """
+    Make the player choices of a response consistent with their next scene types.
+
+    Empty and repeated options are dropped with their scene types, surplus options are
+    cut to 'max_options', and the scene types are truncated or padded with 'default_scene'
+    to match the options. Only if fewer than 'min_options' options remain the options are
+    re-asked from the model together with their scene types (see 'reask_fields'). If no
+    option is left after that, a single "Continue" option leading to 'default_scene'
+    keeps the game playable.
+
+    Parameters
+    ----------
+    node: str
+        Node name, re-asks are accounted to "<node>:repair".
+    response: BaseModel
+        Response to repair, modified in place.
+    options_field, scene_field: str
+        Names of the options list and of the matching scene type list.
+    default_scene: str
+        Scene type used for options without one.
+    messages: Sequence[BaseMessage]
+        Messages the response was generated from, used to re-ask options.
+    min_options, max_options: int, optional
+        Allowed number of options.
+
+    Returns
+    -------
+    BaseModel
+        The repaired response.
+    """
+    options, scenes = getattr(response, options_field), getattr(response, scene_field)
+    kept = unique_options(options)[:max_options]
+    if len(kept) < len(options):
+        scenes = [scenes[i] if i < len(scenes) else default_scene for i in kept]
+        options = [options[i] for i in kept]
+    if len(options) < min_options:
+        problem = f"provide {min_options} to {max_options} distinct options, each with the scene type it leads to"
+        try:
+            reasked = reask_fields(node, response, [options_field, scene_field], problem, messages)
+        except Exception:  # a single remaining option is still playable
+            reasked = None
+        if reasked is not None:
+            reasked_options, reasked_scenes = reasked[options_field], reasked[scene_field]
+            kept = unique_options(reasked_options)[:max_options]
+            if kept:
+                options = [reasked_options[i] for i in kept]
+                scenes = [reasked_scenes[i] if i < len(reasked_scenes) else default_scene for i in kept]
+        if not options:
+            options, scenes = [FALLBACK_OPTION], [default_scene]
+    if len(scenes) != len(options):
+        scenes = fit_length(scenes, len(options), default_scene)
+    setattr(response, options_field, options)
+    setattr(response, scene_field, scenes)
+    return response
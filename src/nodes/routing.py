@@ -0,0 +1,193 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import cache
+from typing import Iterator
+
+from nodes.constants import (
+    MODEL_TIERS,
+    NODE_TEMPERATURES,
+    NODE_TIERS,
+    TIER_LATENCY_THRESHOLDS,
+    TIER_LATENCY_WINDOW,
+    TIER_MAX_QUEUE_DEPTH,
+    TIER_MIN_SAMPLES,
+    TIER_ORDER,
+)
+from nodes.scheduler import get_scheduler
+
+
+@dataclass(frozen=True)
+class Route:
+    """
+    Model selected for one call site.
+
+    Attributes
+    ----------
+    node: str
+        Call site (node or task) name.
+    tier: str
+        Tier the call is served by, one of 'TIER_ORDER'.
+    model: str
+        Model name of the tier.
+    temperature: float
+        Sampling temperature of the call site.
+    """
+
+    node: str
+    tier: str
+    model: str
+    temperature: float
+
+
+@dataclass
+class TierStats:
+    """
+    Usage and latency of one model tier.
+
+    Attributes
+    ----------
+    calls: int
+        Calls served by the tier.
+    errors: int
+        Calls that failed.
+    fallbacks: int
+        Calls routed away from the tier to a faster one.
+    latencies: deque[tuple[float, float]]
+        Recent '(finished_at, latency)' pairs.
+    """
+
+    calls: int = 0
+    errors: int = 0
+    fallbacks: int = 0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=500))
+
+    def recent_latency(self, now: float, quantile: float = 0.95) -> float | None:
+        """Return the latency quantile of the last 'TIER_LATENCY_WINDOW' seconds, None with too few samples."""
+        recent = sorted(latency for finished, latency in self.latencies if now - finished <= TIER_LATENCY_WINDOW)
+        if len(recent) < TIER_MIN_SAMPLES:
+            return None
+        return recent[min(len(recent) - 1, math.ceil(quantile * len(recent)) - 1)]
+
+
+class ModelRouter:
+    """
+    Route each call site to a model by its latency/quality tier.
+
+    Call sites declare a tier in 'NODE_TIERS' ("quality", "standard" or "fast") and tiers map
+    to models in 'MODEL_TIERS'. A tier is skipped in favour of the next faster one while its
+    model has more than 'TIER_MAX_QUEUE_DEPTH' requests waiting in the scheduler or while its
+    recent p95 latency exceeds its 'TIER_LATENCY_THRESHOLDS' entry. Latencies only count for
+    'TIER_LATENCY_WINDOW' seconds, so an overloaded tier is tried again once it recovers.
+
+    Parameters
+    ----------
+    models: dict[str, str], optional
+        Model name per tier.
+    node_tiers: dict[str, str], optional
+        Tier per call site. Call sites without an entry use the "standard" tier.
+    """
+
+    def __init__(self, models: dict[str, str] = MODEL_TIERS, node_tiers: dict[str, str] = NODE_TIERS):
+        self.models = models
+        self.node_tiers = node_tiers
+        self.stats = {tier: TierStats() for tier in TIER_ORDER}
+        self._lock = threading.Lock()
+
+    def _overloaded(self, tier: str) -> bool:
+        if get_scheduler().queue_depth(self.models[tier]) > TIER_MAX_QUEUE_DEPTH:
+            return True
+        with self._lock:
+            latency = self.stats[tier].recent_latency(time.monotonic())
+        return latency is not None and latency > TIER_LATENCY_THRESHOLDS[tier]
+
+    def route(self, node: str) -> Route:
+        """
+        Select the model for a call site.
+
+        Parameters
+        ----------
+        node: str
+            Call site name.
+
+        Returns
+        -------
+        Route
+            The call site's tier, or the first faster tier that is not overloaded
+            (the fastest tier if all are).
+        """
+        requested = self.node_tiers.get(node, "standard")
+        tiers = TIER_ORDER[TIER_ORDER.index(requested) :]
+        tier = next((tier for tier in tiers if not self._overloaded(tier)), tiers[-1])
+        if tier != requested:
+            with self._lock:
+                self.stats[requested].fallbacks += 1
+        return Route(node, tier, self.models[tier], NODE_TEMPERATURES.get(node, 0.7))
+
+    def fallback(self, route: Route) -> Route | None:
+        """
+        Return the route of the next faster tier for a call that missed its deadline.
+
+        Parameters
+        ----------
+        route: Route
+            Route of the call that missed its deadline.
+
+        Returns
+        -------
+        Route or None
+            The same call site on the next tier in 'TIER_ORDER', None if 'route' is on the fastest tier.
+        """
+        index = TIER_ORDER.index(route.tier) + 1
+        if index == len(TIER_ORDER):
+            return None
+        with self._lock:
+            self.stats[route.tier].fallbacks += 1
+        tier = TIER_ORDER[index]
+        return Route(route.node, tier, self.models[tier], route.temperature)
+
+    @contextmanager
+    def measure(self, route: Route) -> Iterator[None]:
+        """Record the latency (or failure) of the call made in the block in the statistics of its tier."""
+        start = time.monotonic()
+        try:
+            yield
+        except Exception:
+            with self._lock:
+                self.stats[route.tier].errors += 1
+            raise
+        now = time.monotonic()
+        with self._lock:
+            stats = self.stats[route.tier]
+            stats.calls += 1
+            stats.latencies.append((now, now - start))
+
+    def report(self) -> str:
+        """Return a per-tier summary of calls, errors, fallbacks and recent p95 latency."""
+        lines = []
+        now = time.monotonic()
+        with self._lock:
+            for tier, stats in self.stats.items():
+                if not (stats.calls or stats.errors or stats.fallbacks):
+                    continue
+                latency = stats.recent_latency(now)
+                p95 = f"{latency:.1f} s" if latency is not None else "n/a"
+                lines.append(
+                    f"{tier} ({self.models[tier]}): {stats.calls} calls, {stats.errors} errors, "
+                    f"{stats.fallbacks} fallbacks, p95 {p95}"
+                )
+        return "\n".join(lines)
+
+
+@cache
+def get_router() -> ModelRouter:
+    """Return the model router shared by all sessions of the process."""
+    return ModelRouter()
+
+
+def route_model(node: str) -> Route:
+    """Select the model for a call site with the shared router (see 'ModelRouter.route')."""
+    return get_router().route(node)
@@ -0,0 +1,305 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import IntEnum
+from functools import cache
+from typing import Callable, Iterable, Iterator, TypeVar
+
+from nodes.constants import LLM_MAX_RETRIES, LLM_RATE_LIMITS, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError"}
+
+
+class Priority(IntEnum):
+    """Scheduling class of a model request, lower values are served first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_priority: ContextVar[Priority] = ContextVar("llm_request_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """
+    Schedule the model requests made inside the block with the given priority.
+
+    Background work (content pools, history summaries) wraps its generation in
+    'request_priority(Priority.BACKGROUND)', so it queues behind the scene the player waits for.
+
+    Parameters
+    ----------
+    priority: Priority
+        Priority of the requests made in the block.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    """Return the priority requests made by the caller are scheduled with."""
+    return _priority.get()
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    Provider limits of one model.
+
+    Attributes
+    ----------
+    requests_per_minute: int
+        Maximum number of requests per minute.
+    tokens_per_minute: int
+        Maximum number of prompt tokens per minute.
+    max_concurrency: int
+        Maximum number of requests in flight at the same time.
+    """
+
+    requests_per_minute: int
+    tokens_per_minute: int
+    max_concurrency: int
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at 'per_minute / 60' units per second, holding at most one minute of budget.
+
+    Parameters
+    ----------
+    per_minute: float
+        Budget per minute.
+    now: float
+        Current monotonic time.
+    """
+
+    def __init__(self, per_minute: float, now: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Return the seconds until 'amount' is available (0 if it is available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        """Consume 'amount' from the bucket."""
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+
+class _ModelQueue:
+    def __init__(self, limit: RateLimit, now: float):
+        self.limit = limit
+        self.requests = TokenBucket(limit.requests_per_minute, now)
+        self.tokens = TokenBucket(limit.tokens_per_minute, now)
+        self.active = 0
+        self.waiting: list[tuple[int, int]] = []
+
+
+def is_retryable(error: Exception) -> bool:
+    """Return True for rate limit, timeout, connection and server errors, which are worth retrying."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return type(error).__name__ in RETRYABLE_ERRORS or isinstance(error, (TimeoutError, ConnectionError))
+
+
+class LLMScheduler:
+    """
+    Process-wide scheduler of model and embedding requests.
+
+    Every request waits for a slot of its model before it is sent. A slot is granted
+    when the model has a free concurrency slot and its request and token buckets
+    allow the request; waiting requests are served by priority, then in arrival order.
+    Failed requests are retried with exponential backoff and full jitter if the error
+    is transient (see 'is_retryable').
+
+    Parameters
+    ----------
+    limits: dict[str, RateLimit]
+        Limits per model name. The "default" entry applies to models without their own entry.
+    max_retries: int, optional
+        Number of retries of a failed request.
+    base_delay: float, optional
+        Backoff ceiling of the first retry, in seconds. Doubles with every retry.
+    max_delay: float, optional
+        Maximum backoff ceiling, in seconds.
+    """
+
+    def __init__(
+        self,
+        limits: dict[str, RateLimit],
+        max_retries: int = LLM_MAX_RETRIES,
+        base_delay: float = LLM_RETRY_BASE_DELAY,
+        max_delay: float = LLM_RETRY_MAX_DELAY,
+    ):
+        self.limits = limits
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._queues: dict[str, _ModelQueue] = {}
+        self._condition = threading.Condition()
+        self._arrivals = itertools.count()
+
+    def _queue(self, model: str) -> _ModelQueue:
+        if model not in self._queues:
+            self._queues[model] = _ModelQueue(self.limits.get(model, self.limits["default"]), time.monotonic())
+        return self._queues[model]
+
+    def queue_depth(self, model: str) -> int:
+        """Return the number of requests waiting for a slot of a model."""
+        with self._condition:
+            return len(self._queues[model].waiting) if model in self._queues else 0
+
+    @contextmanager
+    def slot(self, model: str, tokens: int = 0, priority: Priority | None = None) -> Iterator[None]:
+        """
+        Hold a request slot of a model for the duration of the block.
+
+        Parameters
+        ----------
+        model: str
+            Model name.
+        tokens: int, optional
+            Estimated prompt tokens of the request.
+        priority: Priority or None, optional
+            Request priority. Defaults to the priority set by 'request_priority'.
+        """
+        entry = (_priority.get() if priority is None else priority, next(self._arrivals))
+        with self._condition:
+            queue = self._queue(model)
+            heapq.heappush(queue.waiting, entry)
+            try:
+                while True:
+                    timeout = None
+                    if queue.waiting[0] == entry and queue.active < queue.limit.max_concurrency:
+                        now = time.monotonic()
+                        timeout = max(queue.requests.wait_time(1, now), queue.tokens.wait_time(tokens, now))
+                        if timeout == 0:
+                            break
+                    self._condition.wait(timeout)
+            except BaseException:
+                queue.waiting.remove(entry)
+                heapq.heapify(queue.waiting)
+                self._condition.notify_all()
+                raise
+            heapq.heappop(queue.waiting)
+            now = time.monotonic()
+            queue.requests.take(1, now)
+            queue.tokens.take(tokens, now)
+            queue.active += 1
+            self._condition.notify_all()
+        try:
+            yield
+        finally:
+            with self._condition:
+                queue.active -= 1
+                self._condition.notify_all()
+
+    def backoff(self, attempt: int) -> float:
+        """Return the jittered delay before retry number 'attempt' (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def call(self, model: str, fn: Callable[[], T], tokens: int = 0, priority: Priority | None = None) -> T:
+        """
+        Run a model request within the model's limits, retrying transient failures.
+
+        Parameters
+        ----------
+        model: str
+            Model name the request is sent to.
+        fn: Callable[[], T]
+            Function sending the request.
+        tokens: int, optional
+            Estimated prompt tokens of the request.
+        priority: Priority or None, optional
+            Request priority. Defaults to the priority set by 'request_priority'.
+
+        Returns
+        -------
+        T
+            Result of 'fn'.
+
+        Raises
+        ------
+        Exception
+            The last error, if it is not retryable or the retries are exhausted.
+        """
+        for attempt in itertools.count():
+            with self.slot(model, tokens, priority):
+                try:
+                    return fn()
+                except Exception as error:
+                    if attempt >= self.max_retries or not is_retryable(error):
+                        raise
+            time.sleep(self.backoff(attempt))
+
+    def stream(
+        self,
+        model: str,
+        open_stream: Callable[[], Iterable[T]],
+        tokens: int = 0,
+        priority: Priority | None = None,
+    ) -> Iterator[T | None]:
+        """
+        Stream a model response within the model's limits, retrying transient failures.
+
+        The slot is held until the stream is exhausted or closed. When a stream fails after
+        it produced chunks and is retried, 'None' is yielded before the chunks of the retry.
+
+        Parameters
+        ----------
+        model: str
+            Model name the request is sent to.
+        open_stream: Callable[[], Iterable[T]]
+            Function starting the request and returning its chunks.
+        tokens: int, optional
+            Estimated prompt tokens of the request.
+        priority: Priority or None, optional
+            Request priority. Defaults to the priority set by 'request_priority'.
+
+        Yields
+        ------
+        T or None
+            Response chunks; 'None' marks a restart of the response.
+        """
+        for attempt in itertools.count():
+            emitted = False
+            with self.slot(model, tokens, priority):
+                try:
+                    for chunk in open_stream():
+                        emitted = True
+                        yield chunk
+                    return
+                except Exception as error:
+                    if attempt >= self.max_retries or not is_retryable(error):
+                        raise
+            if emitted:
+                yield None
+            time.sleep(self.backoff(attempt))
+
+
+@cache
+def get_scheduler() -> LLMScheduler:
+    """Return the scheduler shared by all sessions of the process."""
+    return LLMScheduler({model: RateLimit(**limit) for model, limit in LLM_RATE_LIMITS.items()})
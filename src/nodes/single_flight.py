@@ -0,0 +1,87 @@
+import threading
+from typing import Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: T | None = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesce concurrent identical requests into one upstream call.
+
+    The first caller of a key runs the function; callers arriving with the same key
+    while it is in flight wait for it and receive the same result (or exception).
+    Nothing is cached: once the call finishes, the next caller starts a new one.
+
+    Parameters
+    ----------
+    name: str
+        Name of the coalesced request kind, used in statistics.
+
+    Attributes
+    ----------
+    calls: int
+        Number of upstream calls made.
+    shared: int
+        Number of callers served by another caller's in-flight call.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._in_flight: dict[Hashable, _Call[T]] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """
+        Return the result of 'fn', sharing it with concurrent callers of the same key.
+
+        Parameters
+        ----------
+        key: Hashable
+            Identity of the request; equal keys must produce interchangeable results.
+        fn: Callable[[], T]
+            Function making the request.
+
+        Returns
+        -------
+        T
+            Result of this caller's or the in-flight call.
+
+        Raises
+        ------
+        Exception
+            The error raised by the call, re-raised in every caller that shared it.
+        """
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+        return call.result
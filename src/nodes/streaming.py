@@ -0,0 +1,261 @@
+import itertools
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Sequence, TypeVar
+
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel
+from rich.console import Console
+
+from nodes.constants import STREAM_RESPONSES
+from nodes.hedging import DeadlineExceeded, hedged_call, hedged_stream
+from nodes.llm import estimate_tokens, record_usage
+from nodes.routing import Route, get_router, route_model
+from nodes.scheduler import get_scheduler
+
+T = TypeVar("T", bound=BaseModel)
+
+
+@dataclass(frozen=True)
+class StreamedField:
+    """
+    A string field of a structured response rendered to the console as it is generated.
+
+    Attributes
+    ----------
+    name: str
+        Field name in the response schema.
+    style: str or None
+        Rich style applied to the field text.
+    end: str
+        Text printed after the field is complete.
+    """
+
+    name: str
+    style: str | None = None
+    end: str = "\n\n"
+
+
+def _decodable_end(text: str, start: int, stop: int) -> int:
+    """Return the end of the longest prefix of 'text[start:stop]' that does not cut a JSON escape sequence."""
+    safe = i = start
+    while i < stop:
+        if text[i] != "\\":
+            i += 1
+            safe = i
+            continue
+        if i + 1 >= stop:
+            break
+        if text[i + 1] != "u":
+            i += 2
+            safe = i
+            continue
+        if i + 6 > stop:
+            break
+        code = int(text[i + 2 : i + 6], 16)
+        i += 6
+        if 0xD800 <= code < 0xDC00:  # high surrogate, decoded together with the following low surrogate
+            if i + 6 > stop:
+                break
+            i += 6
+        safe = i
+    return safe
+
+
+class JsonFieldStream:
+    """
+    Incrementally extract the value of a string field from a JSON document received in chunks.
+
+    Parameters
+    ----------
+    field: str
+        Name of the string field to extract.
+    """
+
+    def __init__(self, field: str):
+        self.pattern = re.compile(rf'"{re.escape(field)}"\s*:\s*"')
+        self.text = ""
+        self.start: int | None = None
+        self.end: int | None = None
+        self.decoded = 0
+        self.scanned = 0
+        self.escaped = False
+        self.failed = False
+
+    @property
+    def done(self) -> bool:
+        return self.end is not None and self.decoded == self.end
+
+    def feed(self, chunk: str) -> str:
+        """
+        Add a chunk of the JSON document.
+
+        Parameters
+        ----------
+        chunk: str
+            Next piece of the document.
+
+        Returns
+        -------
+        str
+            Newly available, decoded text of the field (possibly empty).
+        """
+        if self.failed or self.done:
+            return ""
+        self.text += chunk
+        if self.start is None:
+            match = self.pattern.search(self.text)
+            if match is None:
+                return ""
+            self.start = self.decoded = self.scanned = match.end()
+
+        for i in range(self.scanned, len(self.text)):
+            if self.escaped:
+                self.escaped = False
+            elif self.text[i] == "\\":
+                self.escaped = True
+            elif self.text[i] == '"':
+                self.end = i
+                break
+        self.scanned = len(self.text) if self.end is None else self.end
+
+        try:
+            stop = self.end if self.end is not None else _decodable_end(self.text, self.decoded, len(self.text))
+            if stop <= self.decoded:
+                return ""
+            decoded = json.loads(f'"{self.text[self.decoded:stop]}"')
+        except ValueError:  # malformed escape, the field is shown once the whole response is parsed
+            self.failed = True
+            return ""
+        self.decoded = stop
+        return decoded
+
+
+def stream_structured(
+    node: str,
+    model: Runnable,
+    input: Any,
+    schema: type[T],
+    fields: Sequence[StreamedField],
+    console: Console,
+    stream: bool = STREAM_RESPONSES,
+    route: Route | None = None,
+    fallback: Callable[[Route], Runnable] | None = None,
+    fallback_response: Callable[[], T] | None = None,
+) -> T:
+    """
+    Generate a structured response and render its text fields to the console as they arrive.
+
+    The response JSON is parsed incrementally, so the player starts reading the scene while
+    the rest of the object (options, scene types, summary) is still being generated. The
+    complete response is validated against the schema at the end. The request goes through
+    the request scheduler; if a stream fails and is retried, the text is rendered again.
+    The wait for the first chunk is bounded by the node's deadline and hedged when slow
+    (see 'nodes.hedging'). A request that misses the deadline is sent again on the next faster
+    tier (see 'ModelRouter.fallback'); once no faster tier is left, 'fallback_response' is
+    rendered instead, so a stalled provider costs the player at most one deadline per tier.
+
+    Parameters
+    ----------
+    node: str
+        Node name the call is accounted to.
+    model: Runnable
+        Chat model (or prompt | model chain) bound with 'response_format=schema'.
+    input: Any
+        Model input.
+    schema: type[BaseModel]
+        Response schema.
+    fields: Sequence[StreamedField]
+        String fields to render, in schema order.
+    console: Console
+        Console to render to.
+    stream: bool, optional
+        Stream the response. Otherwise the fields are rendered once the response is complete.
+    route: Route or None, optional
+        Route 'model' was built for (see 'nodes.routing'). Selects the rate limits and the tier
+        the call is measured in. Defaults to the node's current route.
+    fallback: Callable[[Route], Runnable] or None, optional
+        Builds the model for another route, used to retry on a faster tier after a missed
+        deadline. Without it there is no retry.
+    fallback_response: Callable[[], BaseModel] or None, optional
+        Builds a response without the model, used when the fastest tier missed its deadline too.
+
+    Returns
+    -------
+    BaseModel
+        The validated response.
+
+    Raises
+    ------
+    DeadlineExceeded
+        If no tier answered within the deadline and there is no 'fallback_response'.
+    """
+    shown = {field.name: "" for field in fields}
+    finished: set[str] = set()
+
+    def show(field: StreamedField, text: str) -> None:
+        if text:
+            console.print(text, style=field.style, end="", markup=False, highlight=False)
+            shown[field.name] += text
+
+    def finish(field: StreamedField) -> None:
+        console.print(field.end, style=field.style, end="", markup=False, highlight=False)
+        finished.add(field.name)
+
+    scheduler = get_scheduler()
+    route = route or route_model(node)
+    tokens = estimate_tokens(input)
+
+    def generate(route: Route, model: Runnable) -> Any:
+        if not stream:
+            with get_router().measure(route):
+                return hedged_call(
+                    node, lambda: scheduler.call(route.model, lambda: model.invoke(input), tokens=tokens)
+                )
+        streams = {field.name: JsonFieldStream(field.name) for field in fields}
+        message = None
+        chunks = hedged_stream(node, lambda: scheduler.stream(route.model, lambda: model.stream(input), tokens=tokens))
+        with get_router().measure(route):  # streamed calls are measured to the first chunk, what the player waits for
+            first = next(chunks, None)
+        for chunk in itertools.chain([first] if first is not None else [], chunks):
+            if chunk is None:  # the stream failed and was retried, render the response again
+                console.print()
+                shown.update((name, "") for name in shown)
+                finished.clear()
+                streams = {field.name: JsonFieldStream(field.name) for field in fields}
+                message = None
+                continue
+            message = chunk if message is None else message + chunk
+            for field in fields:
+                show(field, streams[field.name].feed(chunk.content))
+                if streams[field.name].done and field.name not in finished:
+                    finish(field)
+        return message
+
+    while True:
+        try:
+            message = generate(route, model)
+            break
+        except DeadlineExceeded:  # raised before anything was rendered
+            faster = get_router().fallback(route) if fallback is not None else None
+            if faster is not None:
+                route, model = faster, fallback(faster)
+            elif fallback_response is None:
+                raise
+            else:
+                message = None
+                break
+
+    if message is None:
+        response = fallback_response()
+    else:
+        record_usage(node, message)
+        response = schema.model_validate_json(message.content)
+    for field in fields:
+        if field.name in finished:
+            continue
+        value = getattr(response, field.name)
+        show(field, value[len(shown[field.name]) :] if value.startswith(shown[field.name]) else f"\n{value}")
+        finish(field)
+    return response
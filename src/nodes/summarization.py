@@ -0,0 +1,148 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable
+
+from core import GameState
+from nodes.llm import chat_model, estimate_tokens, record_usage
+from nodes.routing import Route, get_router, route_model
+from nodes.scheduler import Priority, get_scheduler, request_priority
+
+
+@cache
+def get_model(route: Route) -> Runnable:
+    return chat_model(route.model, route.temperature)
+
+
+executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarizer")
+
+PENDING_SUMMARIES = 256
+
+SYSTEM_PROMPT = SystemMessage(
+    "You are the chronicler of a fantasy text RPG called 'Neurons & Dragons'.\n"
+    "Summarize the following events into one short chapter summary (3-5 sentences).\n"
+    "Keep names of NPCs, places, items, quests, promises and unresolved threads. "
+    "Drop flavour text. Write in past tense, no commentary."
+)
+
+
+def summarize(entries: list[str]) -> str:
+    """
+    Summarize a list of history entries or chapters into a short chapter summary.
+
+    Parameters
+    ----------
+    entries: list[str]
+        History entries (or older chapter summaries), oldest first.
+
+    Returns
+    -------
+    str
+        A short summary that keeps names, places, items, quests and unresolved threads.
+    """
+    events = "\n".join(f"- {entry}" for entry in entries)
+    messages = [SYSTEM_PROMPT, HumanMessage(f"Events:\n{events}\n")]
+    route = route_model("summarization")
+    with get_router().measure(route):
+        response = get_scheduler().call(
+            route.model, lambda: get_model(route).invoke(messages), tokens=estimate_tokens(messages)
+        )
+    record_usage("summarization", response)
+    return response.content
+
+
+class ChapterSummaries:
+    """
+    Finished chapter summaries waiting to be merged into the game state.
+
+    Graph nodes receive a fresh copy of the state, so a background summary cannot
+    update the state it was started from. Summaries are kept here, keyed by the
+    provisional chapter they replace, until the next 'compact_history' call merges
+    them into the live state. Only the newest 'size' summaries are kept, so summaries
+    of chapters that no longer exist (e.g. a rewound session) do not pile up.
+    Chapters being summarized are tracked so each is scheduled once per process.
+    """
+
+    def __init__(self, size: int = PENDING_SUMMARIES):
+        self.size = size
+        self._summaries: OrderedDict[str, str] = OrderedDict()
+        self._scheduled: set[str] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._summaries)
+
+    def schedule(self, provisional: str) -> bool:
+        """Mark a provisional chapter as being summarized, returning False if it already is or is finished."""
+        with self._lock:
+            if provisional in self._scheduled or provisional in self._summaries:
+                return False
+            self._scheduled.add(provisional)
+            return True
+
+    def cancel(self, provisional: str) -> None:
+        """Forget a failed summary so the chapter is scheduled again."""
+        with self._lock:
+            self._scheduled.discard(provisional)
+
+    def add(self, provisional: str, summary: str) -> None:
+        with self._lock:
+            self._scheduled.discard(provisional)
+            self._summaries[provisional] = summary
+            while len(self._summaries) > self.size:
+                self._summaries.popitem(last=False)
+
+    def apply(self, state: GameState) -> int:
+        """Replace the provisional chapters of a state with their finished summaries, returning how many."""
+        with self._lock:
+            finished = [chapter for chapter in state.chapters if chapter in self._summaries]
+            for provisional in finished:
+                state.replace_chapter(provisional, self._summaries.pop(provisional))
+        return len(finished)
+
+
+chapter_summaries = ChapterSummaries()
+
+
+def _summarize_into(provisional: str, entries: list[str]) -> None:
+    try:
+        with request_priority(Priority.BACKGROUND):
+            summary = summarize(entries)
+    except Exception:  # the provisional chapter keeps the raw events, nothing is lost
+        chapter_summaries.cancel(provisional)
+        return
+    chapter_summaries.add(provisional, summary)
+
+
+def _schedule(provisional: str, entries: list[str]) -> None:
+    if chapter_summaries.schedule(provisional):
+        executor.submit(_summarize_into, provisional, entries)
+
+
+def compact_history(state: GameState) -> None:
+    """
+    Fold old history into chapters and summarize them off the critical path.
+
+    Summaries finished since the last call replace their provisional chapters first,
+    so older chapters are merged from summaries rather than raw events. Folding
+    happens synchronously (it is a cheap in-memory move), the summaries are generated
+    on a background worker and merged by the next call (see 'ChapterSummaries'), so
+    they are persisted with the save of the next scene. Provisional chapters without a
+    summary on the way, e.g. those saved raw before a restart or whose summary failed,
+    are scheduled again from their saved text.
+
+    Parameters
+    ----------
+    state: GameState
+        Current game state, modified in place.
+    """
+    chapter_summaries.apply(state)
+    for fold in (state.fold_history, state.fold_chapters):
+        while (folded := fold()) is not None:
+            provisional, entries = folded
+            _schedule(provisional, entries)
+    for provisional in state.provisional_chapters:
+        _schedule(provisional, [provisional])
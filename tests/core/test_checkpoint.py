@@ -0,0 +1,104 @@
+import sqlite3
+from collections import deque
+
+import pytest
+from langgraph.graph import END, StateGraph
+
+from core import GameState
+from core.checkpoint import SQLiteCheckpointer, list_turns, rewind_config, session_config
+from core.entities import Player, PlayerClass, Race, Origin, World
+
+
+def make_state() -> GameState:
+    player = Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    return GameState(player=player, world=World(location="Forest", quest="quest"), history=deque(["start"]))
+
+
+@pytest.fixture(name="calls")
+def calls_fixture():
+    return []
+
+
+@pytest.fixture(name="builder")
+def builder_fixture(calls):
+    def scene(name: str, damage: int):
+        def node(state: GameState) -> GameState:
+            calls.append((name, state.player.hp))
+            state.append_history(name)
+            state.player.hp -= damage
+            return state
+
+        return node
+
+    graph = StateGraph(GameState)
+    graph.add_node("first", scene("first", 1))
+    graph.add_node("second", scene("second", 10))
+    graph.set_entry_point("first")
+    graph.add_edge("first", "second")
+    graph.add_edge("second", END)
+    return graph
+
+
+def test_resume_after_reopen(tmp_path, builder):
+    path = tmp_path / "checkpoints.sqlite"
+    config = session_config("session")
+    with SQLiteCheckpointer(path) as checkpointer:
+        builder.compile(checkpointer=checkpointer).invoke(make_state(), config, durability="sync")
+
+    with SQLiteCheckpointer(path) as checkpointer:
+        snapshot = builder.compile(checkpointer=checkpointer).get_state(config)
+
+    player = snapshot.values["player"]
+    assert isinstance(player, Player)
+    assert player.hp == player.max_hp - 11
+    assert list(snapshot.values["history"]) == ["start", "first", "second"]
+    assert snapshot.next == ()
+
+
+def test_sessions_are_isolated(tmp_path, builder):
+    with SQLiteCheckpointer(tmp_path / "checkpoints.sqlite") as checkpointer:
+        graph = builder.compile(checkpointer=checkpointer)
+        graph.invoke(make_state(), session_config("a"), durability="sync")
+
+        assert graph.get_state(session_config("b")).values == {}
+        checkpointer.delete_thread("a")
+        assert checkpointer.get_tuple(session_config("a")) is None
+
+
+def test_rewind_branches_from_earlier_turn(tmp_path, builder, calls):
+    config = session_config("session")
+    with SQLiteCheckpointer(tmp_path / "checkpoints.sqlite", batch_size=1) as checkpointer:
+        graph = builder.compile(checkpointer=checkpointer)
+        graph.invoke(make_state(), config, durability="sync")
+
+        assert [snapshot.next for snapshot in list_turns(graph, config)] == [("second",), ("first",), ("__start__",)]
+        calls.clear()
+        result = graph.invoke(None, rewind_config(graph, config, 0), durability="sync")
+
+        assert calls == [("second", result["player"].max_hp - 1)]
+        assert list(result["history"]) == ["start", "first", "second"]
+        assert len(list(graph.get_state_history(config))) == 5
+        with pytest.raises(ValueError):
+            rewind_config(graph, config, 10)
+
+
+def test_scene_type_change_commits_batch(tmp_path):
+    path = tmp_path / "checkpoints.sqlite"
+    config = session_config("session", "checkpoint")
+
+    def committed() -> int:
+        with sqlite3.connect(path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM writes").fetchone()[0]
+
+    with SQLiteCheckpointer(path, batch_size=100, max_delay=float("inf")) as checkpointer:
+        checkpointer.put_writes(config, [("scene_type", "exploration")], "first")
+        checkpointer.put_writes(config, [("scene_type", "exploration")], "second")
+        assert committed() == 0
+
+        checkpointer.put_writes(config, [("scene_type", "combat")], "third")
+        assert committed() == 3
+
+
+def test_batch_size_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        SQLiteCheckpointer(tmp_path / "checkpoints.sqlite", batch_size=0)
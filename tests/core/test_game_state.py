@@ -1,11 +1,9 @@
 import json
-from collections import deque
-
 import pytest
 
 from core import GameState
 from core.entities import Player, PlayerClass, Race, Origin, World, Inventory, Weapon
-from core.entities.constants import HISTORY_LENGTH
+from core.entities.history import HistoryBuffer
 
 
 @pytest.fixture(name="game_state")
@@ -19,7 +17,7 @@ def game_state_fixture() -> GameState:
             inventory=Inventory(weapons=[Weapon(name="Knife", damage=1, weapon_type="dagger")]),
         ),
         world=World(location="Emerald Forest", quest="Find the lost relic"),
-        history=deque(["The adventure begins!"], maxlen=HISTORY_LENGTH),
+        history=HistoryBuffer(["The adventure begins!"]),
     )
 
 
@@ -41,7 +39,7 @@ def test_game_state_empty_history_and_inventory() -> None:
             name="loner", player_class=PlayerClass.PALADIN, race=Race.HUMAN, origin=Origin.NOBLE, inventory=Inventory()
         ),
         world=World(location="Silent Valley", quest="Survive the night"),
-        history=deque([], maxlen=HISTORY_LENGTH),
+        history=HistoryBuffer(),
     )
 
     game_state_json = game_state.model_dump_json()
@@ -69,22 +67,57 @@ def test_game_state_append_history(game_state):
     ],
 )
 def test_game_state_get_history(limit, expected, game_state):
-    game_state.history = deque([f"n {i}" for i in range(10)])
+    game_state.history = HistoryBuffer([f"n {i}" for i in range(10)])
     assert game_state.get_history(limit=limit) == expected
 
 
 @pytest.mark.parametrize(
     "records, expected",
     [
-        (0, deque(["n 0", "n 1", "n 2", "n 3", "n 4", "n 5", "n 6", "n 7", "n 8", "n 9"])),
-        (1, deque(["n 1", "n 2", "n 3", "n 4", "n 5", "n 6", "n 7", "n 8", "n 9"])),
-        (5, deque(["n 5", "n 6", "n 7", "n 8", "n 9"])),
-        (9, deque(["n 9"])),
-        (10, deque([])),
-        (11, deque([])),
+        (0, ["n 0", "n 1", "n 2", "n 3", "n 4", "n 5", "n 6", "n 7", "n 8", "n 9"]),
+        (1, ["n 1", "n 2", "n 3", "n 4", "n 5", "n 6", "n 7", "n 8", "n 9"]),
+        (5, ["n 5", "n 6", "n 7", "n 8", "n 9"]),
+        (9, ["n 9"]),
+        (10, []),
+        (11, []),
     ],
 )
 def test_game_state_remove_history(records, expected, game_state):
-    game_state.history = deque([f"n {i}" for i in range(10)])
+    game_state.history = HistoryBuffer([f"n {i}" for i in range(10)])
     game_state.remove_history(records=records)
-    assert game_state.history == expected
+    assert list(game_state.history) == expected
+
+
+def test_game_state_fold_history(game_state):
+    game_state.history = HistoryBuffer([f"n {i}" for i in range(13)])
+
+    assert game_state.fold_history(keep=5, chapter_length=8) == (
+        "n 0 | n 1 | n 2 | n 3 | n 4 | n 5 | n 6 | n 7",
+        [f"n {i}" for i in range(8)],
+    )
+    assert list(game_state.history) == ["n 8", "n 9", "n 10", "n 11", "n 12"]
+    assert game_state.chapters == ["n 0 | n 1 | n 2 | n 3 | n 4 | n 5 | n 6 | n 7"]
+    assert game_state.fold_history(keep=5, chapter_length=8) is None
+
+
+def test_game_state_fold_chapters(game_state):
+    game_state.chapters = [f"c {i}" for i in range(4)]
+
+    assert game_state.fold_chapters(max_chapters=4) is None
+    game_state.chapters.append("c 4")
+    provisional, merged = game_state.fold_chapters(max_chapters=4, chapters_per_arc=3)
+    assert merged == ["c 0", "c 1", "c 2"]
+    assert game_state.chapters == [provisional, "c 3", "c 4"]
+
+
+def test_game_state_replace_chapter(game_state):
+    game_state.chapters = ["raw a | raw b", "c 1"]
+
+    assert game_state.replace_chapter("raw a | raw b", "summary") is True
+    assert game_state.chapters == ["summary", "c 1"]
+    assert game_state.replace_chapter("raw a | raw b", "summary") is False
+
+
+def test_game_state_chapters_serialize(game_state):
+    game_state.chapters = ["summary"]
+    assert GameState.model_validate_json(game_state.model_dump_json()).chapters == ["summary"]
@@ -0,0 +1,60 @@
+from collections import deque
+
+import pytest
+
+from core import GameState
+from core import graph as game_graph
+from core.entities import Player, PlayerClass, Race, Origin, World
+
+
+def make_state(**kwargs) -> GameState:
+    player = Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    return GameState(player=player, world=World(location="Forest", quest="quest"), history=deque(["start"]), **kwargs)
+
+
+@pytest.fixture(name="calls")
+def calls_fixture(monkeypatch):
+    calls = []
+
+    def camp(state: GameState) -> GameState:
+        calls.append("camp")
+        state.scene_type = "narration"
+        return state
+
+    def narration(state: GameState) -> GameState:
+        calls.append("narration")
+        state.exit = True
+        return state
+
+    monkeypatch.setitem(game_graph.NODE_MAP, "camp", camp)
+    monkeypatch.setitem(game_graph.NODE_MAP, "narration", narration)
+    return calls
+
+
+def test_route_scene():
+    assert game_graph.route_scene(make_state(scene_type="puzzle")) == "puzzle"
+    assert game_graph.route_scene(make_state(scene_type="puzzle", exit=True)) == "END"
+
+    state = make_state()
+    state.scene_type = "unknown"
+    assert game_graph.route_scene(state) == "narration"
+    assert state.scene_type == "narration"
+
+
+def test_entry_point_follows_scene_type(calls):
+    graph = game_graph.build_graph()
+
+    graph.invoke(make_state(scene_type="camp"))
+    assert calls == ["camp", "narration"]
+
+    calls.clear()
+    graph.invoke(make_state(scene_type="narration"))
+    assert calls == ["narration"]
+
+    calls.clear()
+    graph.invoke(make_state(exit=True))
+    assert calls == []
+
+
+def test_get_graph_is_shared():
+    assert game_graph.get_graph() is game_graph.get_graph()
@@ -0,0 +1,39 @@
+import copy
+from collections import deque
+
+import pytest
+
+from core.entities.history import HistoryBuffer, HistoryKind, split_entry
+
+
+def test_split_entry():
+    assert split_entry("player action: Run") == (HistoryKind.PLAYER_ACTION, "Run")
+    assert split_entry("narrator: Night falls") == (HistoryKind.TEXT, "narrator: Night falls")
+    assert split_entry("The adventure begins!") == (HistoryKind.TEXT, "The adventure begins!")
+
+
+def test_buffer_behaves_like_a_bounded_deque():
+    entries = [f"{prefix}{i}" for i, prefix in enumerate(["dungeon master: ", "player action: ", "", "puzzle: "] * 5)]
+    history, expected = HistoryBuffer(maxlen=12), deque(maxlen=12)
+    for entry in entries:
+        history.append(entry)
+        expected.append(entry)
+    assert list(history) == list(expected)
+    assert list(reversed(history)) == list(reversed(expected))
+    assert (history[0], history[-1], len(history)) == (expected[0], expected[-1], 12)
+    assert "puzzle: 19" in history and "puzzle: 18" not in history
+
+    assert [history.popleft() for _ in range(3)] == [expected.popleft() for _ in range(3)]
+    history.append("exploration: cave")
+    expected.append("exploration: cave")
+    assert list(history) == list(expected)
+    with pytest.raises(IndexError):
+        history[10]
+
+
+def test_buffer_copy_and_equality():
+    history = HistoryBuffer(["dungeon master: A dragon appears", "player action: Flee"])
+    duplicate = copy.deepcopy(history)
+    duplicate.append("player action: Hide")
+    assert history == HistoryBuffer(list(history)) and history != duplicate
+    assert HistoryBuffer(["a", "b", "c"], maxlen=2) == HistoryBuffer(["b", "c"])
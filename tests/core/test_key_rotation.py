@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+from core.key_rotation import PROGRESS_FILE, key_fingerprint, rotate_saves
+from core.save import ENCRYPTED_FILE_HEADER, decode_save, load_key_ring
+
+OLD_KEY, NEW_KEY = Fernet.generate_key(), Fernet.generate_key()
+
+
+@pytest.fixture(name="save_dir")
+def save_dir_fixture(tmp_path):
+    for i in range(5):
+        token = Fernet(OLD_KEY).encrypt(f'{{"save": {i}}}'.encode("utf-8"))
+        (tmp_path / f"save_{i}.sav").write_bytes(ENCRYPTED_FILE_HEADER + token)
+    (tmp_path / "save_dev.sav").write_text('{"save": "dev"}', encoding="utf-8")
+    return tmp_path
+
+
+def test_load_key_ring_from_env(monkeypatch):
+    monkeypatch.setenv("SAVE_AES_KEY", NEW_KEY.decode())
+    monkeypatch.setenv("SAVE_AES_OLD_KEYS", f" {OLD_KEY.decode()} ,")
+    assert load_key_ring() == [NEW_KEY, OLD_KEY]
+
+
+def test_load_key_ring_missing(monkeypatch):
+    monkeypatch.delenv("SAVE_AES_KEY", raising=False)
+    with pytest.raises(ValueError):
+        load_key_ring()
+
+
+def test_rotate_saves(save_dir):
+    report = rotate_saves(save_dir, [NEW_KEY, OLD_KEY], workers=2, chunk_size=2)
+
+    assert (report.rotated, report.skipped, report.errors) == (5, 1, [])
+    assert not (save_dir / PROGRESS_FILE).exists()
+    data = (save_dir / "save_3.sav").read_bytes()
+    assert decode_save(data, Fernet(NEW_KEY)) == '{"save": 3}'
+    with pytest.raises(InvalidToken):
+        decode_save(data, Fernet(OLD_KEY))
+
+
+def test_rotate_saves_resumes_from_progress(save_dir):
+    (save_dir / PROGRESS_FILE).write_text(f"{key_fingerprint(NEW_KEY)}\nsave_0.sav\nsave_1.sav\n", encoding="utf-8")
+
+    report = rotate_saves(save_dir, [NEW_KEY, OLD_KEY], workers=1)
+
+    assert (report.rotated, report.skipped) == (3, 3)
+    assert decode_save((save_dir / "save_0.sav").read_bytes(), Fernet(OLD_KEY)) == '{"save": 0}'
+
+
+def test_rotate_saves_reports_unknown_key(save_dir):
+    report = rotate_saves(save_dir, [NEW_KEY], workers=1)
+
+    assert report.rotated == 0
+    assert sorted(Path(path).name for path, _ in report.errors) == [f"save_{i}.sav" for i in range(5)]
+    assert (save_dir / PROGRESS_FILE).exists()
@@ -2,7 +2,7 @@ from unittest.mock import Mock, call
 
 import pytest
 
-from core.entities.level import Level
+from core.entities.level import ExponentialCurve, Level, LinearCurve, XPTable
 
 
 @pytest.fixture(name="level")
@@ -24,3 +24,49 @@ def test_gain_experience_negative(level):
     with pytest.raises(ValueError) as err:
         level.gain_experience(amount=-20)
     assert str(err.value) == "Experience amount cannot be negative, got -20."
+
+
+def _loop_level_ups(level: int, experience: int, curve) -> tuple[int, int]:
+    while experience >= curve.xp_for_next_level(level):
+        experience -= curve.xp_for_next_level(level)
+        level += 1
+    return level, experience
+
+
+@pytest.mark.parametrize("amount", [0, 99, 100, 219, 220, 5_000, 123_456, 10_000_000])
+def test_gain_experience_matches_step_by_step(amount):
+    level = Level()
+    level.gain_experience(amount=37)
+    expected = _loop_level_ups(level.level, level.experience + amount, ExponentialCurve())
+    level.gain_experience(amount=amount)
+    assert (level.level, level.experience) == expected
+
+
+def test_gain_experience_batched_callback(level):
+    batch_callback = Mock()
+    level._on_levels_gained = [batch_callback]
+    level.gain_experience(amount=300)
+    batch_callback.assert_called_once_with(range(2, 4))
+
+
+def test_xp_table_shared_between_equal_curves():
+    assert XPTable.for_curve(ExponentialCurve(100, 1.2)) is XPTable.for_curve(ExponentialCurve(100, 1.2))
+    assert XPTable.for_curve(LinearCurve(100)) is not XPTable.for_curve(ExponentialCurve(100, 1.0))
+
+
+def test_xp_table_resolve():
+    table = XPTable.for_curve(LinearCurve(100))
+    assert table.total_xp(5) == 400
+    assert table.resolve(399) == (4, 99)
+    assert table.resolve(400) == (5, 0)
+
+
+def test_levels_share_defaults():
+    first, second = Level(), Level()
+    assert first._curve is second._curve and first._on_levels_gained is second._on_levels_gained
+
+    callback = Mock()
+    first.add_level_up_callback(callback)
+    first.gain_experience(amount=100)
+    callback.assert_called_once_with(2)
+    assert second._on_level_up == ()
@@ -53,30 +53,30 @@ def test_main_weapon_no_weapon(player):
     assert weapon is None
 
 
-def test_calc_attack(player):
-    player._calc_skill = lambda _: 100
+def test_calc_attack(player, monkeypatch):
+    monkeypatch.setattr(Player, "_calc_skill", lambda self, _: 100)
     assert player.calc_attack() == 110
 
 
-def test_calc_attack_no_weapon(player):
-    player._calc_skill = lambda _: 100
+def test_calc_attack_no_weapon(player, monkeypatch):
+    monkeypatch.setattr(Player, "_calc_skill", lambda self, _: 100)
     player.inventory.weapons.clear()
     assert player.calc_attack() == 100
 
 
-def test_calc_defense(player):
-    player._calc_skill = lambda _: 100
+def test_calc_defense(player, monkeypatch):
+    monkeypatch.setattr(Player, "_calc_skill", lambda self, _: 100)
     assert player.calc_defense() == 110
 
 
-def test_calc_defense_no_armor(player):
-    player._calc_skill = lambda _: 100
+def test_calc_defense_no_armor(player, monkeypatch):
+    monkeypatch.setattr(Player, "_calc_skill", lambda self, _: 100)
     player.inventory.armors.clear()
     assert player.calc_defense() == 100
 
 
-def test_calc_escape(player):
-    player._calc_skill = lambda _: 100
+def test_calc_escape(player, monkeypatch):
+    monkeypatch.setattr(Player, "_calc_skill", lambda self, _: 100)
     assert player.calc_escape() == 100
 
 
@@ -0,0 +1,72 @@
+from collections import deque
+
+import pytest
+
+from core import GameState
+from core import graph as game_graph
+from core.entities import Origin, Player, PlayerClass, Race, World
+from core.profiling import TurnProfiler, categorize, profiling_from_env, summarize
+
+
+def make_state() -> GameState:
+    player = Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    return GameState(player=player, world=World(location="Forest", quest="quest"), history=deque(["start"]))
+
+
+def narration(state: GameState) -> GameState:
+    state.append_history("dungeon master: " + "".join(str(i) for i in range(2000)))
+    return state
+
+
+@pytest.fixture(name="profiler")
+def profiler_fixture(tmp_path) -> TurnProfiler:
+    return TurnProfiler(tmp_path, every=2, keep=3)
+
+
+def test_profiler_captures_every_nth_turn(profiler):
+    node = profiler.wrap("narration", narration)
+    assert node.__name__ == "narration"
+    state = make_state()
+    for _ in range(10):
+        node(state)
+
+    assert profiler.turns == 10
+    records = sorted(path.name for path in profiler.directory.glob("*.json"))
+    assert [name.split("_", 1)[1] for name in records] == [
+        "turn000006_narration.json",
+        "turn000008_narration.json",
+        "turn000010_narration.json",
+    ]
+    assert len(list(profiler.directory.glob("*.prof"))) == 3
+
+
+def test_summarize(profiler):
+    node = profiler.wrap("narration", narration)
+    for _ in range(4):
+        node(make_state())
+
+    summary = summarize(profiler.directory, top=5, session=profiler.session)
+    assert summary.turns == 2 and list(summary.node_time) == ["narration"]
+    assert any("narration" in function for function, *_ in summary.functions)
+    assert any("test_profiling.py" in site for site, *_ in summary.allocations)
+    assert "hottest functions" in summary.report()
+    assert summarize(profiler.directory, session="other").turns == 0
+
+
+def test_graph_nodes_are_only_wrapped_when_profiling(profiler, monkeypatch):
+    monkeypatch.delenv("PROFILE", raising=False)
+    assert profiling_from_env() is None
+    monkeypatch.setenv("PROFILE", "3")
+    assert profiling_from_env().every == 3
+
+    def exit_narration(state: GameState) -> GameState:
+        state.exit = True
+        return state
+
+    monkeypatch.setitem(game_graph.NODE_MAP, "narration", exit_narration)
+    game_graph.build_graph(profiler=TurnProfiler(profiler.directory, every=1)).invoke(make_state())
+    assert len(list(profiler.directory.glob("*_narration.prof"))) == 1
+    assert (
+        categorize("~", "<method 'validate_json' of 'pydantic_core.SchemaValidator' objects>") == "pydantic"
+        and categorize("/tmp/x.py") == "other"
+    )
@@ -0,0 +1,39 @@
+from collections import deque
+
+import pytest
+from cryptography.fernet import Fernet
+
+from core import GameState
+from core.entities import Origin, Player, PlayerClass, Race, Weapon, World
+from core.save import ENCRYPTED_FILE_HEADER, SaveManager, load_save, parse_save_name
+
+
+@pytest.fixture(name="game_state")
+def game_state_fixture() -> GameState:
+    player = Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    player.add_item(Weapon(name="Knife", damage=2, weapon_type="dagger"))
+    return GameState(
+        player=player, world=World(location="Forest", quest="quest"), history=deque(["player action: Run"])
+    )
+
+
+def test_load_save(game_state):
+    fernet = Fernet(Fernet.generate_key())
+    payload = game_state.model_dump_json().encode("utf-8")
+    assert load_save(payload, None) == game_state
+    assert load_save(ENCRYPTED_FILE_HEADER + fernet.encrypt(payload), fernet) == game_state
+    with pytest.raises(ValueError):
+        load_save(ENCRYPTED_FILE_HEADER + fernet.encrypt(payload), None)
+
+
+def test_save_manager_writes_unique_tagged_saves(game_state, tmp_path, monkeypatch):
+    monkeypatch.setattr(SaveManager, "_instance", None)
+    manager = SaveManager(save_dir=str(tmp_path), encryption_key=Fernet.generate_key())
+    paths = [manager.save(game_state) for _ in range(20)]
+    assert len(set(paths)) == 20 and sorted(paths) == paths
+
+    game_state.player.gain_experience(amount=10_000)
+    assert parse_save_name(manager.save(game_state).name)[2] == "level"
+    assert parse_save_name(manager.save(game_state).name)[2] is None
+    assert parse_save_name(manager.save(game_state, milestone="boss").name)[2] == "boss"
+    assert manager.load() == game_state
@@ -0,0 +1,100 @@
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from core.save import parse_save_name, save_name, session_prefix
+from core.save_retention import RetentionPolicy, SaveFile, SaveRetention, list_save_files, select_expired
+
+START = datetime(2025, 1, 31, 18, 0, 0)
+
+
+def make_saves(count: int, step: timedelta, session: str = "save") -> list[SaveFile]:
+    return [SaveFile(Path(f"{session}_{i}.sav"), session, START + i * step) for i in range(count)]
+
+
+def test_save_names_sort_in_save_order():
+    names = [save_name("save", START), save_name("save", START + timedelta(microseconds=1), "level")]
+    assert names == ["save_2025-01-31_18-00-00_000000.sav", "save_2025-01-31_18-00-00_000001.level.sav"]
+    assert sorted(["save_2025-01-31_18-00-00.sav", *names]) == ["save_2025-01-31_18-00-00.sav", *names]
+    assert parse_save_name(names[1]) == ("save", START + timedelta(microseconds=1), "level")
+    assert parse_save_name("save_2025-01-31_18-00-00.sav") == ("save", START, None)
+    assert parse_save_name("checkpoints.sqlite") is None
+
+
+def test_select_expired_thins_hourly_and_daily():
+    saves = make_saves(3 * 24 * 6, timedelta(minutes=10))  # three days, a save every ten minutes
+    policy = RetentionPolicy(keep_last=3, hourly=4, daily=3)
+    kept = set(saves) - set(select_expired(saves, policy))
+    assert sorted(save.timestamp for save in kept) == [
+        datetime(2025, 2, 1, 23, 50),  # newest save of the day before
+        datetime(2025, 2, 2, 23, 50),
+        datetime(2025, 2, 3, 14, 50),
+        datetime(2025, 2, 3, 15, 50),
+        datetime(2025, 2, 3, 16, 50),
+        datetime(2025, 2, 3, 17, 30),
+        datetime(2025, 2, 3, 17, 40),
+        datetime(2025, 2, 3, 17, 50),
+    ]
+
+
+def test_select_expired_keeps_milestones_per_session():
+    saves = make_saves(10, timedelta(seconds=1)) + make_saves(2, timedelta(seconds=1), "other")
+    saves[0] = SaveFile(saves[0].path, "save", saves[0].timestamp, "boss")
+    expired = select_expired(saves, RetentionPolicy(keep_last=2, hourly=0, daily=0))
+    assert [save.timestamp.second for save in expired] == [1, 2, 3, 4, 5, 6, 7]
+    assert {save.session for save in expired} == {"save"}
+
+    with pytest.raises(ValueError):
+        RetentionPolicy(keep_last=0)
+
+
+def test_save_retention_deletes_expired_saves(tmp_path):
+    for i in range(5):
+        (tmp_path / save_name("save", START + timedelta(seconds=i), "level" if i == 0 else None)).write_text("{}")
+    (tmp_path / "checkpoints.sqlite").write_text("")
+
+    retention = SaveRetention(tmp_path, RetentionPolicy(keep_last=2, hourly=0, daily=0), max_deletes_per_second=1e6)
+    report = retention.run_once()
+    assert (report.kept, report.deleted, report.freed, report.errors) == (3, 2, 4, [])
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "checkpoints.sqlite",
+        "save_2025-01-31_18-00-00_000000.level.sav",
+        "save_2025-01-31_18-00-03_000000.sav",
+        "save_2025-01-31_18-00-04_000000.sav",
+    ]
+    assert len(list_save_files(tmp_path)) == 3
+
+
+def test_save_retention_thins_interleaved_sessions_separately(tmp_path):
+    assert (session_prefix("default"), session_prefix("alice"), session_prefix("bob_2")) == (
+        "save",
+        "save-alice",
+        "save-bob-2",
+    )
+    for i in range(6):
+        session = session_prefix("alice" if i % 2 == 0 else "bob")
+        (tmp_path / save_name(session, START + timedelta(seconds=i))).write_text("{}")
+
+    retention = SaveRetention(tmp_path, RetentionPolicy(keep_last=2, hourly=0, daily=0), max_deletes_per_second=1e6)
+    assert retention.run_once().deleted == 2
+    assert sorted((save.session, save.timestamp.second) for save in list_save_files(tmp_path)) == [
+        ("save-alice", 2),
+        ("save-alice", 4),
+        ("save-bob", 3),
+        ("save-bob", 5),
+    ]
+
+
+def test_save_retention_runs_in_background(tmp_path):
+    for i in range(3):
+        (tmp_path / save_name("save", START + timedelta(seconds=i))).write_text("{}")
+    retention = SaveRetention(tmp_path, RetentionPolicy(keep_last=1, hourly=0, daily=0), interval=60)
+    retention.start()
+    deadline = time.monotonic() + 5
+    while retention.last_report is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    retention.stop(timeout=5)
+    assert retention.last_report.deleted == 2
+    assert [save.timestamp.second for save in list_save_files(tmp_path)] == [2]
@@ -0,0 +1,60 @@
+from collections import deque
+
+import pytest
+from cryptography.fernet import Fernet
+
+from core import GameState
+from core.entities import Player, PlayerClass, Race, Origin, World
+from core.save import ENCRYPTED_FILE_HEADER
+from core.save_scanner import extract_field, scan_saves, write_csv
+
+KEY = Fernet.generate_key()
+
+
+def make_state(level: int, location: str) -> GameState:
+    player = Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    player.level.level = level
+    return GameState(player=player, world=World(location=location, quest="quest"), history=deque(["a", "b"]))
+
+
+@pytest.fixture(name="save_dir")
+def save_dir_fixture(tmp_path):
+    (tmp_path / "save_1.sav").write_text(make_state(1, "Forest").model_dump_json(), encoding="utf-8")
+    encrypted = Fernet(KEY).encrypt(make_state(4, "Coast").model_dump_json().encode("utf-8"))
+    (tmp_path / "save_2.sav").write_bytes(ENCRYPTED_FILE_HEADER + encrypted)
+    (tmp_path / "save_3.sav").write_bytes(ENCRYPTED_FILE_HEADER + b"garbage")
+    (tmp_path / "notes.txt").write_text("not a save", encoding="utf-8")
+    return tmp_path
+
+
+def test_extract_field():
+    data = {"player": {"level": {"level": 3}}, "history": ["a", "b", "c"]}
+    assert extract_field(data, "player.level.level") == 3
+    assert extract_field(data, "history") == 3
+    assert extract_field(data, "player.missing") is None
+
+
+def test_scan_saves(save_dir):
+    result = scan_saves(save_dir, ("player.level.level", "world.location", "history"), encryption_key=KEY, workers=2)
+
+    assert len(result) == 2
+    rows = sorted(zip(result.files, *result.columns.values()))
+    assert [row[1:] for row in rows] == [(1, "Forest", 2), (4, "Coast", 2)]
+    assert [path for path, _ in result.errors] == [str(save_dir / "save_3.sav")]
+    assert sorted(result.to_numpy()["player.level.level"].tolist()) == [1, 4]
+
+
+def test_scan_saves_without_key_reports_encrypted_saves(save_dir, monkeypatch):
+    monkeypatch.delenv("SAVE_AES_KEY", raising=False)
+    result = scan_saves(save_dir, ("scene_type",), workers=1, chunk_size=1)
+    assert result.columns == {"scene_type": ["narration"]}
+    assert len(result.errors) == 2
+
+
+def test_write_csv(save_dir, tmp_path):
+    out = tmp_path / "out.csv"
+    errors = write_csv(save_dir, out, ("player.hp",), encryption_key=KEY, workers=1)
+    lines = out.read_text(encoding="utf-8").splitlines()
+    assert lines[0] == "file,player.hp"
+    assert len(lines) == 3
+    assert len(errors) == 1
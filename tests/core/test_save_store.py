@@ -0,0 +1,107 @@
+import os
+from collections import deque
+
+import pytest
+from cryptography.fernet import Fernet
+
+from core import GameState
+from core.entities import Origin, Player, PlayerClass, Potion, Race, Weapon, World
+from core.key_rotation import rotate_saves
+from core.save import SaveManager, decode_save, load_save
+from core.save_store import (
+    OBJECTS_DIR,
+    SEGMENTS,
+    ObjectStore,
+    collect_garbage,
+    open_store,
+    read_snapshot,
+    split_segments,
+)
+from core.save_scanner import scan_saves
+
+KEY = Fernet.generate_key()
+
+
+@pytest.fixture(name="game_state")
+def game_state_fixture() -> GameState:
+    player = Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    for i in range(10):
+        player.add_item(Weapon(name=f"Blade {i}", damage=2, weapon_type="sword"))
+        player.add_item(Potion(name=f"Potion {i}"))
+    history = deque(f"player action: Turn {i}, the party presses on." for i in range(100))
+    world = World(location="Forest", quest="quest")
+    return GameState(player=player, world=world, history=history, lore="Ancient lore. " * 50)
+
+
+@pytest.fixture(name="manager", params=["development", "production"])
+def manager_fixture(request, tmp_path, monkeypatch) -> SaveManager:
+    monkeypatch.setattr(SaveManager, "_instance", None)
+    return SaveManager(mode=request.param, save_dir=str(tmp_path), encryption_key=KEY, deduplicate=True)
+
+
+def test_split_segments_are_content_defined():
+    entries = [f"entry {i}" for i in range(200)]
+    segments = split_segments(entries)
+    assert [entry for segment in segments for entry in segment] == entries
+    shifted = split_segments(entries[5:] + ["entry 200"])
+    assert len({tuple(segment) for segment in segments[1:-1]} - {tuple(segment) for segment in shifted}) == 0
+
+
+def test_object_store_detects_corruption(tmp_path):
+    store = ObjectStore(tmp_path)
+    address = store.put(b"content")
+    assert store.put(b"content") == address and store.get(address) == b"content"
+    store.path(address).write_bytes(store.path(store.put(b"other")).read_bytes())
+    with pytest.raises(ValueError):
+        store.get(address)
+
+
+def test_snapshots_share_objects(manager, game_state, tmp_path):
+    first = manager.save(game_state)
+    objects = {path.name for path in manager.store}
+    for turn in range(5):
+        game_state.append_history(f"player action: Turn {100 + turn}")
+        manager.save(game_state)
+    assert len({path.name for path in manager.store} - objects) <= 2 * 5  # the first and last history segments
+
+    addresses, payload = read_snapshot(first.read_bytes())
+    assert len(addresses) > 3 and b"Blade 0" not in payload
+    assert (payload.startswith(b"{")) == (manager.mode == "development")
+    assert (
+        load_save(first.read_bytes(), manager.fernet, manager.store).history[-1].startswith("player action: Turn 99,")
+    )
+    assert manager.load() == game_state
+    with pytest.raises(ValueError):
+        decode_save(first.read_bytes(), manager.fernet)
+
+
+def test_collect_garbage(manager, game_state, tmp_path):
+    first = manager.save(game_state)
+    game_state.player.inventory.weapons.clear()
+    last = manager.save(game_state)
+    assert collect_garbage(tmp_path) == (0, 0)  # new objects are in their grace period
+    first.unlink()
+    deleted, freed = collect_garbage(tmp_path, grace=-1)
+    assert deleted == 1 and freed > 0
+    assert manager.load(last) == game_state
+
+
+def test_rotate_and_scan_snapshots(game_state, tmp_path, monkeypatch):
+    monkeypatch.setattr(SaveManager, "_instance", None)
+    manager = SaveManager(mode="production", save_dir=str(tmp_path), encryption_key=KEY, deduplicate=True)
+    manager.save(game_state)
+    new_key = Fernet.generate_key()
+    report = rotate_saves(tmp_path, [new_key, KEY], workers=1)
+    assert report.rotated == 1 + sum(1 for _ in manager.store) and not report.errors
+
+    result = scan_saves(tmp_path, ("player.name", "history"), encryption_key=new_key, workers=1)
+    assert (result.columns, result.errors) == ({"player.name": ["player"], "history": [100]}, [])
+    assert os.path.isdir(tmp_path / OBJECTS_DIR) and open_store(tmp_path, [new_key]).fernet is not None
+
+
+def test_small_values_stay_inline(tmp_path, monkeypatch):
+    monkeypatch.setattr(SaveManager, "_instance", None)
+    manager = SaveManager(save_dir=str(tmp_path), encryption_key=KEY, deduplicate=True)
+    player = Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    path = manager.save(GameState(player=player, world=World(location="Forest", quest="quest")))
+    assert read_snapshot(path.read_bytes())[0] == [] and SEGMENTS not in path.read_text()
@@ -0,0 +1,73 @@
+from collections import deque
+
+import pytest
+from cryptography.fernet import Fernet
+
+from core import GameState
+from core.entities import Origin, Player, PlayerClass, Race, World
+from core.session_cache import SessionCache, decode_hibernated, encode_hibernated
+
+
+@pytest.fixture(name="clock")
+def clock_fixture():
+    return [0.0]
+
+
+@pytest.fixture(name="cache")
+def cache_fixture(tmp_path, clock):
+    return SessionCache(tmp_path, max_sessions=2, ttl=60, clock=lambda: clock[0])
+
+
+def make_state(name: str) -> GameState:
+    player = Player(name=name, player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    return GameState(player=player, world=World(location="Forest", quest="quest"), history=deque(["start"]))
+
+
+def test_encoding_round_trip():
+    fernet = Fernet(Fernet.generate_key())
+    state = make_state("player")
+    assert decode_hibernated(encode_hibernated(state)) == state
+    assert decode_hibernated(encode_hibernated(state, fernet), fernet) == state
+    with pytest.raises(ValueError):
+        decode_hibernated(encode_hibernated(state, fernet))
+
+
+def test_least_recently_used_session_is_hibernated_and_rehydrated(cache, tmp_path):
+    for name in ("a", "b"):
+        cache.put(name, make_state(name))
+    cache.get("a")
+    cache.put("c", make_state("c"))
+
+    assert len(cache) == 2 and "b" in cache
+    assert cache.stats.hibernations == {"lru": 1}
+    assert len(list(tmp_path.glob("*.hib"))) == 1
+
+    assert cache.get("b").player.name == "b"
+    assert list(tmp_path.glob("*.hib")) != [] and cache.stats.rehydrations == 1  # "a" made room for "b"
+    assert cache.get("unknown") is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_sweep_hibernates_idle_sessions(cache, clock):
+    cache.put("a", make_state("a"))
+    clock[0] = 50
+    cache.put("b", make_state("b"))
+    clock[0] = 100
+
+    assert cache.sweep() == 1
+    assert cache.stats.hibernations == {"ttl": 1}
+    assert cache.get("a").player.name == "a"
+    assert "rehydration latency" in cache.report()
+
+
+def test_sweep_under_memory_pressure(tmp_path):
+    usage = [100]
+    cache = SessionCache(tmp_path, max_sessions=10, max_memory=200, memory_usage=lambda: usage[0])
+    for name in "abcd":
+        cache.put(name, make_state(name))
+    assert cache.sweep() == 0
+
+    usage[0] = 300
+    assert cache.memory_pressure() == pytest.approx(1.5)
+    assert cache.sweep() == 1
+    assert "a" in cache and len(cache) == 3
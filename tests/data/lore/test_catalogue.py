@@ -0,0 +1,160 @@
+import pytest
+
+from core.entities import Armor, Item, Potion, Weapon
+from data.lore.catalogue import GAME_HP_RANGE, load_catalogue, parse_bestiary, parse_items, scale_hp
+
+BESTIARY = """BESTIARY
+
+1. Whisper Wraith
+Origin: Aether overuse
+HP: 70–110
+Behavior: Mimics familiar voices; avoids loud areas
+Abilities:
+•	Silence Fade: Turns invisible when ambient noise < 5 dB
+•	Echo Lure: Forces target to follow the copied voice
+Threat: Medium–High
+Weakness: Discordant sound magic
+Drops: Wraith Echo Shard (sound-based crafting)
+Combat Style: Hit-and-run, illusionary displacement
+
+2. Emberclaw Drake
+Origin: Solara volcano nests
+HP: 180–260
+Behavior: Highly territorial
+Abilities:
+•	Flame Resonance Breath: Fire DoT + burns armor
+•	Magma Dash
+Threat: High
+Weakness: Water dreamcrafting
+Drops: Ember Scales, Lava Gland
+Combat Style: Aggressive, favors burst damage
+"""
+
+ITEMS = """ITEM COMPENDIUM
+
+Weapons
+1. Dawnstring Blade
+Type: Sword
+Rarity: Epic
+Attack: 7
+Lore: Emits fragments of the first cosmic song.
+Effect: Light arcs blind shadow creatures.
+
+2. Tidebreaker
+Type: Warhammer
+Rarity: Mythic
+Attack: 10
+Lore: Forged from a sunken bell.
+Effect: Shatters shields.
+
+3. Wraith Echo Shard
+Type: Spear
+Rarity: Rare
+Attack: 5
+Lore: Hums with stolen voices.
+Effect: Silences its target.
+
+Armors
+1. Whisperleaf Mantle
+Type: Light Armor
+Rarity: Rare
+Defense: 4
+Lore: Worn by fae scouts of the Emerald Courts.
+Effect: Enhances stealth in forests.
+
+Potions
+1. Healt Potion
+•	Rarity: Common
+•	Effect: Restores health and heals wounds.
+
+Artifacts
+0. Lost Relic
+•	Rarity: Legendary
+•	Description:
+Legends trace the Lost Relic to the Primefall Epoch,
+a vanished age.
+"""
+
+
+@pytest.fixture(name="catalogue")
+def catalogue_fixture(tmp_path):
+    bestiary, items = tmp_path / "bestiary.txt", tmp_path / "items.txt"
+    bestiary.write_text(BESTIARY, encoding="utf-8")
+    items.write_text(ITEMS, encoding="utf-8")
+    return load_catalogue(bestiary, items, cache_path=tmp_path / "cache.json")
+
+
+def test_parse_bestiary():
+    wraith, drake = parse_bestiary(BESTIARY)
+    assert wraith.name == "Whisper Wraith"
+    assert (wraith.hp_min, wraith.hp_max) == (70, 110)
+    assert wraith.threat_tier == 4
+    assert wraith.abilities == [
+        "Silence Fade: Turns invisible when ambient noise < 5 dB",
+        "Echo Lure: Forces target to follow the copied voice",
+    ]
+    assert drake.drops == ["Ember Scales", "Lava Gland"]
+
+
+def test_parse_items():
+    blade, hammer, _, mantle, potion, relic = parse_items(ITEMS)
+    assert (blade.category, blade.rarity, blade.attack) == ("weapon", "epic", 7)
+    assert hammer.rarity == "legendary"
+    assert (mantle.category, mantle.defense) == ("armor", 4)
+    assert potion.category == "potion"
+    assert relic.extra["Description"] == "Legends trace the Lost Relic to the Primefall Epoch, a vanished age."
+
+
+def test_catalogue_indexes(catalogue):
+    assert catalogue.creature("emberclaw drake").hp_max == 260
+    assert [c.name for c in catalogue.by_threat[5]] == ["Emberclaw Drake"]
+    assert [c.name for c in catalogue.by_origin["volcano"]] == ["Emberclaw Drake"]
+    assert [c.name for c in catalogue.creatures_in_hp_range(50, 150)] == ["Whisper Wraith"]
+    assert [c.name for c in catalogue.creatures_for("Solara", max_tier=5)] == ["Emberclaw Drake"]
+    assert [c.name for c in catalogue.creatures_for("Nowhere", max_tier=4)] == ["Whisper Wraith"]
+    assert [i.name for i in catalogue.items_up_to("rare")] == [
+        "Healt Potion",
+        "Wraith Echo Shard",
+        "Whisperleaf Mantle",
+    ]
+
+
+def test_catalogue_cache(tmp_path, catalogue):
+    assert (tmp_path / "cache.json").exists()
+    cached = load_catalogue(tmp_path / "bestiary.txt", tmp_path / "items.txt", cache_path=tmp_path / "cache.json")
+    assert cached.to_dict() == catalogue.to_dict()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["bestiary.txt", "cache.json", "items.txt"]
+
+
+def test_catalogue_loads_when_cache_is_unwritable(tmp_path, catalogue):
+    (tmp_path / "not-a-directory").write_text("")
+    cache_path = tmp_path / "not-a-directory" / "cache.json"
+    loaded = load_catalogue(tmp_path / "bestiary.txt", tmp_path / "items.txt", cache_path=cache_path)
+    assert loaded.to_dict() == catalogue.to_dict()
+
+
+def test_scale_hp():
+    assert (scale_hp(1), scale_hp(30), scale_hp(3000), scale_hp(10000)) == (20, 20, 150, 150)
+    assert scale_hp(70) < scale_hp(110) < scale_hp(260)
+
+
+def test_creatures_for_bounds_hp(catalogue):
+    wraith_hp = catalogue.creature("Whisper Wraith").game_hp()[1]
+    assert [c.name for c in catalogue.creatures_for("Nowhere", max_tier=5, max_hp=wraith_hp)] == ["Whisper Wraith"]
+    assert catalogue.creatures_for("Solara", max_tier=5, max_hp=wraith_hp) == [catalogue.creature("Whisper Wraith")]
+
+
+def test_to_enemy(catalogue):
+    drake = catalogue.creature("Emberclaw Drake")
+    enemy = drake.to_enemy()
+    assert GAME_HP_RANGE[0] <= drake.game_hp()[0] <= enemy.hp <= drake.game_hp()[1] <= GAME_HP_RANGE[1]
+    assert [atk.name for atk in enemy.special_attacks] == ["Flame Resonance Breath", "Magma Dash"]
+
+
+def test_to_item(catalogue):
+    assert isinstance(catalogue.item("Dawnstring Blade").to_item(), Weapon)
+    assert catalogue.item("Tidebreaker").to_item().weapon_type == "axe"
+    assert catalogue.item("Wraith Echo Shard (sound-based crafting)").to_item().weapon_type == "staff"
+    assert isinstance(catalogue.item("Whisperleaf Mantle").to_item(), Armor)
+    assert isinstance(catalogue.item("Healt Potion").to_item(), Potion)
+    assert type(catalogue.item("Lost Relic").to_item()) is Item
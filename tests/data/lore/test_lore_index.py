@@ -0,0 +1,58 @@
+import pytest
+
+from data.lore.lore_index import LoreIndex, load_lore_chunks, normalize, parse_headings
+
+BIBLE = """WORLD BIBLE
+
+2. THE GODS
+1.\tAurelyn — The Dawnmother
+Goddess of the Sun.
+
+6. THE FACTIONS
+6.1 The Silent Choir
+Cult serving Nharos. Its spies hide in the Shattered Coast.
+"""
+
+LOCATIONS = """LOCATIONS BIBLE
+
+1. The Shattered Coast
+Biome: Jagged islands, shipwreck fields
+2. Aethrindor (Elven Dominion)
+Biome: Bioluminescent forests
+"""
+
+
+@pytest.fixture(name="index")
+def index_fixture(tmp_path):
+    (tmp_path / "world_bible.txt").write_text(BIBLE, encoding="utf-8")
+    (tmp_path / "locations.txt").write_text(LOCATIONS, encoding="utf-8")
+    (tmp_path / "notes.json").write_text("{}", encoding="utf-8")
+    return LoreIndex(*load_lore_chunks(tmp_path))
+
+
+def test_parse_headings():
+    entities = [entity for _, entity in parse_headings(BIBLE, "world_bible.txt")]
+    assert [(entity.name, entity.kind) for entity in entities] == [
+        ("Aurelyn", "deity"),
+        ("The Silent Choir", "faction"),
+    ]
+
+    entities = [entity for _, entity in parse_headings(LOCATIONS, "locations.txt")]
+    assert [entity.name for entity in entities] == ["The Shattered Coast", "Aethrindor"]
+    assert normalize("The  Shattered Coast") == "shattered coast"
+
+
+def test_chunks_are_tagged_with_entities(index):
+    assert len(index.chunks) == 2
+    assert {chunk.metadata["entities"] for chunk in index.chunks} == {
+        "Aurelyn|The Shattered Coast|The Silent Choir",
+        "Aethrindor|The Shattered Coast",
+    }
+
+
+def test_lookup(index):
+    assert [entity.name for entity in index.match("shattered coast")] == ["The Shattered Coast"]
+    assert [entity.kind for entity in index.match("Spy on the Silent Choir in Aethrindor")] == ["faction", "location"]
+    assert len(index.lookup("The Shattered Coast")) == 2
+    assert len(index.lookup("The Shattered Coast", k=1)) == 1
+    assert index.lookup("Abandoned Mill") == []
@@ -0,0 +1,58 @@
+import math
+from collections import deque
+
+import pytest
+
+from core import GameState
+from core.entities import Enemy, Origin, Player, PlayerClass, Race, World
+from data.lore.catalogue import get_catalogue
+from nodes.combat import creature_candidates, is_boss, lore_combat_setup, max_enemy_hp, max_loot_rarity
+
+LOCATIONS = ["Emerald Forest", "The Shattered Coast", "The Obsidian Reach", "Nowhere"]
+
+
+def make_state(level: int, location: str) -> GameState:
+    player = Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    player.level.level = level
+    return GameState(player=player, world=World(location=location, quest="quest"), history=deque(["start"]))
+
+
+@pytest.mark.parametrize("location", LOCATIONS)
+@pytest.mark.parametrize("level", range(1, 21))
+def test_lore_creatures_are_winnable(level, location):
+    state = make_state(level, location)
+    rarity = max_loot_rarity(state)
+    weapon = min(item.attack for item in get_catalogue().by_rarity[rarity] if item.attack is not None)
+    player_hit = 10.5 + weapon  # 1d20 + the weakest weapon of the loot the level unlocks, no class bonus
+
+    candidates = creature_candidates(state)
+    assert candidates
+    for creature in candidates:
+        enemy = creature.to_enemy()
+        enemy_turn = enemy.attacks_per_turn * (enemy.attack_max + 1) / 2
+        turns = math.ceil(creature.game_hp()[1] / player_hit)
+        assert (turns - 1) * enemy_turn < state.player.max_hp, creature.name
+
+
+def test_lore_combat_setup_fits_player():
+    setup = lore_combat_setup(make_state(9, "Emerald Forest"))
+    assert 0 < setup.enemy.hp <= 130
+
+
+@pytest.mark.parametrize("level", range(1, 21))
+def test_bosses_are_rare_among_candidates(level):
+    state = make_state(level, "Emerald Forest")
+    bosses = [creature for creature in creature_candidates(state) if is_boss(creature.to_enemy(), state)]
+    assert all(creature.threat_tier == 8 for creature in bosses)
+
+
+def test_boss_relative_to_level():
+    creature = get_catalogue().by_threat[7][0]
+    assert is_boss(creature.to_enemy(), make_state(1, "Emerald Forest"))
+    assert not is_boss(creature.to_enemy(), make_state(20, "Emerald Forest"))
+
+    state = make_state(5, "Emerald Forest")
+    enemy = Enemy(name="Unknown Brute", description="", hp=max_enemy_hp(state), attack_max=5, escape_difficulty=10)
+    assert not is_boss(enemy, state)
+    enemy.hp += 1
+    assert is_boss(enemy, state)
@@ -0,0 +1,90 @@
+import time
+from collections import deque
+
+import pytest
+
+from core import GameState
+from core.entities import Player, PlayerClass, Race, Origin, World
+from nodes import content_pool
+from nodes.content_pool import ContentPool, pool_key
+from nodes.hedging import DeadlineExceeded
+
+
+@pytest.fixture(name="pools", autouse=True)
+def pools_fixture():
+    pools = dict(content_pool._POOLS)
+    yield
+    content_pool._POOLS.clear()
+    content_pool._POOLS.update(pools)
+
+
+def make_state(location: str = "Forest", level: int = 1) -> GameState:
+    player = Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    player.level.level = level
+    return GameState(player=player, world=World(location=location, quest="quest"), history=deque(["start"]))
+
+
+def stalled(state: GameState) -> str:
+    raise DeadlineExceeded("no response")
+
+
+def test_stalled_generation_uses_content_pooled_for_neighbouring_level_band():
+    pool = ContentPool("test-pooled", generate=stalled, size=0)
+    pool._ready[pool_key(make_state("Coast"))].append("coast scene")
+    pool._ready[pool_key(make_state("Forest", level=20))].append("late forest scene")
+    pool._ready[pool_key(make_state("Forest", level=4))].append("forest scene")
+
+    assert pool.get(make_state("Forest")) == "forest scene"
+    with pytest.raises(DeadlineExceeded):
+        pool.get(make_state("Forest"))
+
+
+def test_stalled_generation_uses_fallback():
+    pool = ContentPool(
+        "test-fallback", generate=stalled, size=0, fallback=lambda state: f"{state.world.location} scene"
+    )
+    assert pool.get(make_state()) == "Forest scene"
+
+
+def test_stalled_generation_without_fallback_raises():
+    pool = ContentPool("test-raise", generate=stalled, size=0)
+    with pytest.raises(DeadlineExceeded):
+        pool.get(make_state())
+
+
+def test_invalid_generation_is_regenerated_once():
+    scenes = iter(["", "scene", "unused"])
+    pool = ContentPool(
+        "test-regenerate", generate=lambda state: next(scenes), validate=lambda item, state: bool(item), size=0
+    )
+    assert pool.get(make_state()) == "scene"
+
+
+def test_invalid_generation_uses_fallback():
+    calls = []
+
+    def invalid(state: GameState) -> str:
+        calls.append(state)
+        return ""
+
+    pool = ContentPool(
+        "test-invalid", generate=invalid, validate=lambda item, state: bool(item), size=0, fallback=lambda state: "lore"
+    )
+    assert pool.get(make_state()) == "lore"
+    assert len(calls) == 2
+
+    pool._fallback = None
+    with pytest.raises(ValueError):
+        pool.get(make_state())
+
+
+def test_pool_refills_on_daemon_thread():
+    pool = ContentPool("test-refill", generate=lambda state: f"{state.world.location} scene", size=2)
+    state = make_state()
+    pool.prefill(state)
+
+    deadline = time.monotonic() + 5
+    while len(pool._ready[pool_key(state)]) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pool._worker.daemon
+    assert pool.take(state) == "Forest scene"
@@ -0,0 +1,91 @@
+import itertools
+import time
+
+import pytest
+
+from nodes import hedging
+from nodes.hedging import DeadlineExceeded, LatencyTracker, hedged_call, hedged_stream
+from nodes.scheduler import Priority, request_priority
+
+
+@pytest.fixture(name="hedge_delay", autouse=True)
+def hedge_delay_fixture(monkeypatch):
+    monkeypatch.setattr(hedging, "HEDGE_DEFAULT_DELAY", 0.05)
+    hedging.latencies.clear()
+    yield
+    hedging.latencies.clear()
+
+
+def slow_first(delay: float):
+    attempts = itertools.count()
+
+    def fn():
+        attempt = next(attempts)
+        if attempt == 0:
+            time.sleep(delay)
+        return f"response {attempt}"
+
+    return fn
+
+
+def test_latency_tracker_quantile():
+    tracker = LatencyTracker()
+    for latency in range(1, 101):
+        tracker.record(latency / 10)
+    assert tracker.hedge_delay(0.95) == pytest.approx(9.5)
+
+
+def test_slow_request_is_hedged():
+    start = time.monotonic()
+    assert hedged_call("camp", slow_first(1.0), deadline=5) == "response 1"
+    assert time.monotonic() - start < 0.5
+
+
+def test_deadline_exceeded():
+    with pytest.raises(DeadlineExceeded):
+        hedged_call("camp", lambda: time.sleep(0.5), deadline=0.1)
+
+
+def test_failed_request_is_hedged_immediately():
+    attempts = itertools.count()
+
+    def invalid_first():
+        if next(attempts) == 0:
+            raise ValueError("schema mismatch")
+        return "valid"
+
+    assert hedged_call("camp", invalid_first, deadline=5) == "valid"
+
+
+def test_background_requests_are_not_hedged():
+    calls = []
+    with request_priority(Priority.BACKGROUND):
+        assert hedged_call("camp", lambda: calls.append(1) or "pooled", deadline=0.01) == "pooled"
+    assert calls == [1]
+
+
+def test_stream_first_chunk_wins():
+    attempts = itertools.count()
+
+    def stream():
+        attempt = next(attempts)
+        if attempt == 0:
+            time.sleep(1.0)
+        yield from (f"{attempt}a", f"{attempt}b")
+
+    start = time.monotonic()
+    assert list(hedged_stream("narration", stream, deadline=5)) == ["1a", "1b"]
+    assert time.monotonic() - start < 0.5
+
+
+def test_streaming_answer_is_not_hedged():
+    opened = []
+
+    def stream():
+        opened.append(1)
+        yield "a"
+        time.sleep(0.2)  # stalls between chunks, past the hedge delay
+        yield "b"
+
+    assert list(hedged_stream("narration", stream, deadline=5)) == ["a", "b"]
+    assert opened == [1]
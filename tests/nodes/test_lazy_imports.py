@@ -0,0 +1,22 @@
+import os
+import subprocess
+import sys
+
+
+def test_importing_nodes_and_graph_defers_clients():
+    code = (
+        "import sys\n"
+        "from core.graph import NODE_MAP\n"
+        "from nodes import camp, combat, narration\n"
+        "print(sorted(m for m in ('langchain_openai', 'langchain_chroma', 'langgraph.graph') if m in sys.modules))\n"
+    )
+    env = os.environ | {"PYTHONPATH": os.pathsep.join(sys.path)}
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_node_map_resolves_nodes_lazily():
+    from core.graph import NODE_MAP
+
+    assert list(NODE_MAP) == ["narration", "exploration", "combat", "dialogue", "camp", "puzzle"]
+    assert NODE_MAP["camp"].__name__ == "camp"
@@ -0,0 +1,50 @@
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from nodes import llm
+from nodes.llm import cache_report, invoke_structured, record_usage
+
+
+@pytest.fixture(name="stats", autouse=True)
+def stats_fixture():
+    llm.cache_stats.clear()
+    yield llm.cache_stats
+    llm.cache_stats.clear()
+
+
+def raw_message(input_tokens: int, cached: int) -> AIMessage:
+    return AIMessage(
+        content="",
+        usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": 10,
+            "total_tokens": input_tokens + 10,
+            "input_token_details": {"cache_read": cached},
+        },
+    )
+
+
+def test_record_usage(stats):
+    record_usage("narration", raw_message(1000, 0))
+    record_usage("narration", raw_message(1000, 768))
+    record_usage("narration", AIMessage(content="no usage"))
+
+    assert stats["narration"].calls == 2
+    assert stats["narration"].cached_ratio == pytest.approx(0.384)
+    assert "narration: 2 calls, 2000 prompt tokens, 38% cached" in cache_report()
+
+
+def test_invoke_structured_returns_parsed_output(stats):
+    runnable = RunnableLambda(lambda _: {"raw": raw_message(100, 50), "parsed": "scene", "parsing_error": None})
+    assert invoke_structured("camp", runnable, []) == "scene"
+    assert stats["camp"].cached_tokens == 50
+
+
+def test_invoke_structured_raises_parsing_error(stats):
+    runnable = RunnableLambda(
+        lambda _: {"raw": raw_message(100, 0), "parsed": None, "parsing_error": ValueError("bad")}
+    )
+    with pytest.raises(ValueError):
+        invoke_structured("camp", runnable, [])
+    assert stats["camp"].calls == 2  # the invalid response is hedged with a second request
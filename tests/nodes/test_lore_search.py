@@ -0,0 +1,69 @@
+from collections import deque
+
+import pytest
+from langchain_core.documents import Document
+
+from core import GameState
+from core.entities import Player, PlayerClass, Race, Origin, World
+from data.lore.lore_index import LoreEntity, LoreIndex
+from nodes import lore_search
+from nodes.lore_search import LocationLore, inline_lore, lore_queries
+
+CHUNKS = [
+    ("The forest is guarded by dryads.", "Emerald Forest"),
+    ("Wolves hunt at night.", "Emerald Forest|Lost Relic"),
+    ("The relic was stolen by goblins.", "Lost Relic"),
+]
+VECTOR_SEARCH = {"Follow the river": ["The river leads to the old mill."], "Old Mill": ["The mill is haunted."]}
+
+
+@pytest.fixture(name="retrieved")
+def retrieved_fixture(monkeypatch):
+    retrieved = []
+
+    def retrieve_lore(query):
+        retrieved.append(query)
+        return [Document(page_content=content) for content in VECTOR_SEARCH.get(query, [])]
+
+    index = LoreIndex(
+        [Document(page_content=content, metadata={"entities": entities}) for content, entities in CHUNKS],
+        [LoreEntity("Emerald Forest", "location", "locations.txt"), LoreEntity("Lost Relic", "item", "items.txt")],
+    )
+    monkeypatch.setattr(lore_search, "retrieve_lore", retrieve_lore)
+    monkeypatch.setattr(lore_search, "get_lore_index", lambda: index)
+    monkeypatch.setattr(lore_search, "location_lore", LocationLore(size=1))
+    return retrieved
+
+
+def make_state(history: list[str], location: str = "Emerald Forest") -> GameState:
+    player = Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    world = World(location=location, quest="Find the lost relic")
+    return GameState(player=player, world=world, history=deque(history))
+
+
+def test_lore_queries():
+    state = make_state(["start", "dungeon master: Emerald Forest", "player action: Follow the river"])
+    assert lore_queries(state) == ["Emerald Forest", "Find the lost relic", "Follow the river"]
+
+
+def test_inline_lore_interleaves_queries(retrieved):
+    state = make_state(["player action: Follow the river"])
+    assert inline_lore(state, k=4).split("\n\n") == [
+        "The forest is guarded by dryads.",
+        "Wolves hunt at night.",
+        "The river leads to the old mill.",
+        "The relic was stolen by goblins.",
+    ]
+    assert retrieved == ["Follow the river"]  # the location and the quest name lore entities
+    assert inline_lore(state, k=2).count("\n\n") == 1
+
+
+def test_location_lore_is_cached(retrieved):
+    cache = lore_search.location_lore
+    assert [doc.page_content for doc in cache.get("Old Mill")] == ["The mill is haunted."]
+    assert cache.get("old mill ") is cache.get("Old Mill")
+    assert (cache.hits, cache.misses, retrieved) == (2, 1, ["Old Mill"])
+
+    cache.get("Emerald Forest")  # evicts the least recently used location
+    cache.get("Old Mill")
+    assert retrieved == ["Old Mill", "Old Mill"]
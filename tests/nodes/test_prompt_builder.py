@@ -0,0 +1,61 @@
+from collections import deque
+
+import pytest
+
+from core import GameState
+from core.entities import Player, PlayerClass, Race, Origin, World
+from nodes.prompt_builder import PromptBuilder, add_game_state, count_tokens
+
+
+@pytest.fixture(name="game_state")
+def game_state_fixture() -> GameState:
+    return GameState(
+        player=Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR),
+        world=World(location="Emerald Forest", quest="Find the lost relic"),
+        history=deque([f"event {i}" for i in range(40)]),
+        chapters=["chapter 1"],
+    )
+
+
+def test_count_tokens():
+    assert count_tokens("") == 0
+    assert count_tokens("a longer sentence has more tokens") > count_tokens("short")
+
+
+def test_build_keeps_insertion_order_and_deduplicates():
+    prompt = PromptBuilder(budget=1000).add("b", "line 1\nline 2", priority=1).add("a", "line 2\nline 3", 0).build()
+    assert prompt == "line 1\n\nline 2\nline 3"
+
+
+def test_build_truncates_lowest_priority_first():
+    builder = PromptBuilder(budget=count_tokens("rules") + 20)
+    builder.add("rules", "rules", priority=0)
+    builder.add("history", "\n".join(f"entry number {i}" for i in range(50)), priority=1, keep="tail", title="History")
+    prompt = builder.build()
+
+    assert prompt.startswith("rules\n\nHistory\n")
+    assert prompt.endswith("entry number 49")
+    assert "entry number 0" not in prompt
+    assert sum(builder.used.values()) <= builder.budget
+
+
+def test_build_drops_section_when_nothing_fits():
+    builder = PromptBuilder(budget=count_tokens("rules"))
+    prompt = builder.add("rules", "rules", 0).add("extra", "more text", 1, title="Extra").build()
+    assert prompt == "rules"
+    assert "extra" not in builder.used
+
+
+def test_add_game_state_sends_history_once(game_state):
+    prompt = add_game_state(PromptBuilder(budget=100_000), game_state).build()
+    assert prompt.count("event 39") == 1
+    assert "chapter 1" in prompt
+    assert '"history"' not in prompt
+
+
+def test_add_game_state_respects_budget(game_state):
+    builder = add_game_state(PromptBuilder(budget=150), game_state)
+    prompt = builder.build()
+    assert sum(builder.used.values()) <= 150
+    assert "event 39" in prompt
+    assert "event 0\n" not in prompt
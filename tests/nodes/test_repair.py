@@ -0,0 +1,176 @@
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+from core import GameState
+from core.entities import Enemy, Origin, Player, PlayerClass, Race, World
+from core.entities.enemy import SpecialAttack
+from nodes import repair
+from nodes.combat import CombatSetup, repair_combat_setup
+from nodes.camp import fallback_camp_update, repair_camp_update
+from nodes.dialogue import fallback_dialogue_update, repair_dialogue_update
+from nodes.exploration import fallback_exploration_update, repair_exploration_update
+from nodes.narration import SceneUpdate, fallback_scene_update, repair_scene_update
+from nodes.puzzle import (
+    FALLBACK_RIDDLES,
+    PuzzleOption,
+    PuzzleUpdate,
+    fallback_puzzle,
+    is_valid_puzzle,
+    repair_puzzle_update,
+)
+from nodes.repair import clamp, fit_length, unique_options
+
+
+@pytest.fixture(name="reasked")
+def reasked_fixture(monkeypatch):
+    reasked = SimpleNamespace(calls=[], answer=None)
+
+    def reask_field(node, response, field, problem, messages):
+        reasked.calls.append((node, field))
+        return reasked.answer
+
+    def reask_fields(node, response, fields, problem, messages):
+        reasked.calls.append((node, *fields))
+        return reasked.answer
+
+    monkeypatch.setattr(repair, "reask_fields", reask_fields)
+    monkeypatch.setattr("nodes.puzzle.reask_field", reask_field)
+    return reasked
+
+
+def scene(options: list[str], scene_types: list[str]) -> SceneUpdate:
+    return SceneUpdate(narrative="n", summary="s", user_options=options, next_scene_type=scene_types)
+
+
+def test_helpers():
+    assert clamp(150, 0, 100) == 100
+    assert fit_length(["combat"], 3, "narration") == ["combat", "narration", "narration"]
+    assert fit_length(["a", "b", "c"], 2, "x") == ["a", "b"]
+    assert unique_options(["Run", "", "run ", "Hide"]) == [0, 3]
+
+
+def test_scene_types_are_fitted_to_options(reasked):
+    response = repair_scene_update(scene(["Fight", "Flee", "Talk"], ["combat"]), [])
+    assert response.next_scene_type == ["combat", "narration", "narration"]
+
+    response = repair_scene_update(scene(["Fight", "Flee"], ["combat", "narration", "camp"]), [])
+    assert response.next_scene_type == ["combat", "narration"]
+    assert reasked.calls == []
+
+
+def test_repeated_and_surplus_options_are_dropped(reasked):
+    options = ["Fight", "fight", "Flee", "Talk", "Rest", "Search", "Sing"]
+    scene_types = ["combat", "combat", "narration", "dialogue", "camp", "exploration", "narration"]
+    response = repair_scene_update(scene(options, scene_types), [])
+
+    assert response.user_options == ["Fight", "Flee", "Talk", "Rest", "Search"]
+    assert response.next_scene_type == ["combat", "narration", "dialogue", "camp", "exploration"]
+    assert reasked.calls == []
+
+
+def test_missing_options_are_reasked_with_scene_types(reasked):
+    reasked.answer = {
+        "user_options": ["Follow the river", "Climb the hill"],
+        "next_scene_type": ["exploration", "camp"],
+    }
+    response = repair_scene_update(scene(["Continue"], ["combat", "dialogue"]), [])
+
+    assert reasked.calls == [("narration", "user_options", "next_scene_type")]
+    assert response.user_options == ["Follow the river", "Climb the hill"]
+    assert response.next_scene_type == ["exploration", "camp"]
+
+
+def test_reasked_options_keep_their_scene_types(reasked):
+    reasked.answer = {
+        "user_options": ["Fight", "fight", "Flee", "Talk"],
+        "next_scene_type": ["combat", "combat", "narration"],
+    }
+    response = repair_scene_update(scene(["Fight", "FIGHT"], ["combat", "dialogue"]), [])
+
+    assert response.user_options == ["Fight", "Flee", "Talk"]
+    assert response.next_scene_type == ["combat", "narration", "narration"]
+
+
+def test_failed_reask_keeps_aligned_options(reasked, monkeypatch):
+    def fail(*args):
+        raise TimeoutError
+
+    monkeypatch.setattr(repair, "reask_fields", fail)
+    response = repair_scene_update(scene(["Fight", "fight"], ["dialogue", "combat"]), [])
+
+    assert response.user_options == ["Fight"]
+    assert response.next_scene_type == ["dialogue"]
+
+
+def test_options_fall_back_to_continue(reasked):
+    reasked.answer = {"user_options": [" "], "next_scene_type": ["combat"]}
+    response = repair_scene_update(scene([""], ["combat"]), [])
+
+    assert response.user_options == ["Continue"]
+    assert response.next_scene_type == ["narration"]
+
+
+def puzzle(correct: list[bool]) -> PuzzleUpdate:
+    options = [PuzzleOption(text=f"option {i}", correct=c, next_scene_type="narration") for i, c in enumerate(correct)]
+    return PuzzleUpdate(narrative="n", puzzle_prompt="p", summary="s", options=options)
+
+
+def test_puzzle_keeps_one_correct_option(reasked):
+    response = repair_puzzle_update(puzzle([False, True, True]), [])
+    assert [option.correct for option in response.options] == [False, True, False]
+    assert reasked.calls == []
+
+
+def test_puzzle_without_correct_option_is_reasked(reasked):
+    reasked.answer = puzzle([True, False]).options
+    response = repair_puzzle_update(puzzle([False, False, False]), [])
+    assert reasked.calls == [("puzzle", "options")]
+    assert [option.correct for option in response.options] == [True, False]
+
+
+def test_combat_stats_are_clamped():
+    enemy = Enemy(
+        name="Wolf",
+        description="d",
+        hp=-5,
+        attack_max=0,
+        attacks_per_turn=9,
+        critical_hit_chance=150,
+        escape_difficulty=40,
+        special_attacks=[SpecialAttack(name=f"bite {i}", description="d", chance=300, cooldown=0) for i in range(5)],
+    )
+    setup = repair_combat_setup(CombatSetup(narrative="n", enemy=enemy))
+
+    assert (enemy.hp, enemy.attack_max, enemy.attacks_per_turn) == (1, 1, 3)
+    assert (enemy.critical_hit_chance, enemy.escape_difficulty) == (100, 20)
+    assert len(setup.enemy.special_attacks) == 3
+    assert all(attack.chance == 100 and attack.cooldown == 1 for attack in setup.enemy.special_attacks)
+
+
+@pytest.mark.parametrize(
+    "fallback, repair_update",
+    [
+        (fallback_scene_update, repair_scene_update),
+        (fallback_exploration_update, repair_exploration_update),
+        (fallback_dialogue_update, repair_dialogue_update),
+        (fallback_camp_update, repair_camp_update),
+    ],
+)
+def test_fallback_scenes_are_playable(reasked, fallback, repair_update):
+    player = Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    state = GameState(player=player, world=World(location="Forest", quest="quest"), history=deque(["start"]))
+    response = fallback(state)
+    assert repair_update(response.model_copy(deep=True), []) == response
+    assert reasked.calls == []
+
+
+def test_fallback_puzzles_are_valid_and_not_repeated():
+    player = Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    state = GameState(player=player, world=World(location="Forest", quest="quest"), history=deque(["start"]))
+    for _ in FALLBACK_RIDDLES:
+        response = fallback_puzzle(state)
+        assert is_valid_puzzle(response, state)
+        state.append_history(f"puzzle: {response.puzzle_prompt}")
+    assert fallback_puzzle(state).puzzle_prompt == FALLBACK_RIDDLES[-1][0]
@@ -0,0 +1,71 @@
+import pytest
+
+from nodes import routing
+from nodes.routing import ModelRouter
+
+MODELS = {"quality": "big", "standard": "medium", "fast": "small"}
+
+
+@pytest.fixture(name="router")
+def router_fixture():
+    return ModelRouter(MODELS, {"narration": "quality", "lore": "fast"})
+
+
+@pytest.fixture(name="clock")
+def clock_fixture(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(routing.time, "monotonic", lambda: clock[0])
+    return clock
+
+
+def record(router: ModelRouter, tier: str, latency: float, clock: list[float], count: int = 5):
+    route = routing.Route("narration", tier, MODELS[tier], 0.9)
+    for _ in range(count):  # concurrent calls, all finishing at the same time
+        with router.measure(route):
+            clock[0] += latency
+        clock[0] -= latency
+    clock[0] += latency
+
+
+def test_default_tiers(router):
+    route = router.route("narration")
+    assert (route.tier, route.model, route.temperature) == ("quality", "big", 0.9)
+    assert router.route("lore").model == "small"
+    assert router.route("unknown").tier == "standard"
+
+
+def test_slow_tier_falls_back_and_recovers(router, clock):
+    record(router, "quality", 30.0, clock)
+    assert router.route("narration").tier == "standard"
+    assert router.stats["quality"].fallbacks == 1
+
+    clock[0] += 120  # the slow samples leave the latency window
+    assert router.route("narration").tier == "quality"
+
+
+def test_queued_tier_falls_back(router, monkeypatch):
+    depths = {"big": 10, "medium": 10, "small": 0}
+    monkeypatch.setattr(routing.get_scheduler(), "queue_depth", lambda model: depths[model])
+    assert router.route("narration").tier == "fast"
+
+    depths["small"] = 10  # the fastest tier serves the call when every tier is overloaded
+    assert router.route("narration").tier == "fast"
+
+
+def test_measure_records_calls_and_errors(router, clock):
+    record(router, "standard", 2.0, clock, count=6)
+    with pytest.raises(RuntimeError):
+        with router.measure(router.route("unknown")):
+            raise RuntimeError()
+
+    stats = router.stats["standard"]
+    assert (stats.calls, stats.errors) == (6, 1)
+    assert stats.recent_latency(clock[0]) == pytest.approx(2.0)
+    assert "standard (medium): 6 calls, 1 errors" in router.report()
+
+
+def test_fallback_to_faster_tier(router):
+    route = router.fallback(router.route("narration"))
+    assert (route.node, route.tier, route.model, route.temperature) == ("narration", "standard", "medium", 0.9)
+    assert router.fallback(router.fallback(route)) is None
+    assert router.stats["quality"].fallbacks == 1
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from nodes.scheduler import LLMScheduler, Priority, RateLimit, TokenBucket, is_retryable, request_priority
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+@pytest.fixture(name="scheduler")
+def scheduler_fixture():
+    limits = {"default": RateLimit(requests_per_minute=6000, tokens_per_minute=600_000, max_concurrency=1)}
+    return LLMScheduler(limits, max_retries=2, base_delay=0.001, max_delay=0.001)
+
+
+def test_token_bucket():
+    bucket = TokenBucket(per_minute=60, now=0.0)
+    assert bucket.wait_time(60, now=0.0) == 0
+    bucket.take(60, now=0.0)
+    assert bucket.wait_time(1, now=0.0) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now=0.5) == pytest.approx(0.5)
+    assert bucket.wait_time(1000, now=60.5) == 0  # requests above capacity wait for a full bucket only
+
+
+def test_is_retryable():
+    assert is_retryable(RateLimitError())
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(ValueError("bad schema"))
+
+
+def test_call_retries_transient_errors(scheduler):
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimitError()
+        return "scene"
+
+    assert scheduler.call("gpt", flaky) == "scene"
+    assert len(attempts) == 3
+
+
+def test_call_raises_permanent_and_exhausted_errors(scheduler):
+    attempts = []
+
+    def broken(error: Exception):
+        attempts.append(1)
+        raise error
+
+    with pytest.raises(ValueError):
+        scheduler.call("gpt", lambda: broken(ValueError()))
+    assert len(attempts) == 1
+
+    with pytest.raises(RateLimitError):
+        scheduler.call("gpt", lambda: broken(RateLimitError()))
+    assert len(attempts) == 1 + 3
+
+
+def test_waiting_requests_are_served_by_priority(scheduler):
+    order = []
+
+    def request(priority: Priority, name: str):
+        with request_priority(priority):
+            scheduler.call("gpt", lambda: order.append(name))
+
+    with scheduler.slot("gpt"):
+        background = threading.Thread(target=request, args=(Priority.BACKGROUND, "prefetch"))
+        background.start()
+        time.sleep(0.05)
+        interactive = threading.Thread(target=request, args=(Priority.INTERACTIVE, "narration"))
+        interactive.start()
+        time.sleep(0.05)
+        assert order == []
+    background.join()
+    interactive.join()
+
+    assert order == ["narration", "prefetch"]
+
+
+def test_stream_restarts_after_transient_error(scheduler):
+    attempts = []
+
+    def open_stream():
+        attempts.append(1)
+        yield "a"
+        if len(attempts) == 1:
+            raise RateLimitError()
+        yield "b"
+
+    assert list(scheduler.stream("gpt", open_stream)) == ["a", None, "a", "b"]
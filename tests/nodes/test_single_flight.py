@@ -0,0 +1,68 @@
+import threading
+import time
+
+from nodes.single_flight import SingleFlight
+
+
+def run_concurrently(flight: SingleFlight, key, fn, callers: int) -> tuple[list[threading.Thread], list]:
+    results = []
+
+    def caller():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as error:
+            results.append(error)
+
+    threads = [threading.Thread(target=caller) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_identical_calls_share_one_result():
+    flight = SingleFlight("lore")
+    release = threading.Event()
+    upstream = []
+
+    def fetch():
+        upstream.append(1)
+        release.wait(5)
+        return "lore"
+
+    threads, results = run_concurrently(flight, ("Emerald Forest", "Find the lost relic"), fetch, callers=5)
+    while flight.calls + flight.shared < 5:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["lore"] * 5
+    assert len(upstream) == 1
+    assert (flight.calls, flight.shared) == (1, 4)
+
+
+def test_errors_are_shared_and_not_cached():
+    flight = SingleFlight("lore")
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError("upstream down")
+
+    threads, results = run_concurrently(flight, "key", fail, callers=3)
+    while flight.calls + flight.shared < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 3 and all(isinstance(result, ValueError) for result in results)
+    assert flight.do("key", lambda: "recovered") == "recovered"
+    assert flight.calls == 2
+
+
+def test_different_keys_do_not_share():
+    flight = SingleFlight("lore_search")
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+    assert flight.calls == 2 and flight.shared == 0
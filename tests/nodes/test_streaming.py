@@ -0,0 +1,130 @@
+import json
+import time
+
+import pytest
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel
+from rich.console import Console
+
+from nodes import hedging
+from nodes.hedging import DeadlineExceeded
+from nodes.routing import Route
+from nodes.streaming import JsonFieldStream, StreamedField, stream_structured
+
+
+class Scene(BaseModel):
+    npc_name: str
+    narrative: str
+    options: list[str]
+
+
+@pytest.fixture(name="scene_json")
+def scene_json_fixture() -> str:
+    scene = Scene(npc_name='Old "Grey" Tom', narrative='He says:\n"Welcome" 🐉 to the inn\\', options=["a", "b"])
+    return json.dumps(scene.model_dump())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1000])
+def test_field_stream_decodes_across_chunk_boundaries(scene_json, chunk_size):
+    stream = JsonFieldStream("narrative")
+    parts = [stream.feed(scene_json[i : i + chunk_size]) for i in range(0, len(scene_json), chunk_size)]
+
+    assert "".join(parts) == 'He says:\n"Welcome" 🐉 to the inn\\'
+    assert stream.done
+
+
+def test_field_stream_waits_for_field():
+    stream = JsonFieldStream("narrative")
+    assert stream.feed('{"npc_name": "Tom", "narr') == ""
+    assert stream.feed('ative": "Hel') == "Hel"
+    assert not stream.done
+    assert stream.feed('lo", "options": []}') == "lo"
+    assert stream.done
+
+
+def test_stream_structured_renders_fields_while_streaming(scene_json):
+    model = GenericFakeChatModel(messages=iter([AIMessage(content=scene_json)]))
+    console = Console(record=True, width=200)
+    fields = [StreamedField("npc_name", end=": "), StreamedField("narrative")]
+
+    response = stream_structured("test", model, [], Scene, fields, console)
+
+    assert response.options == ["a", "b"]
+    assert console.export_text() == 'Old "Grey" Tom: He says:\n"Welcome" 🐉 to the inn\\\n\n'
+
+
+def test_stream_structured_without_streaming(scene_json):
+    console = Console(record=True, width=200)
+    model = GenericFakeChatModel(messages=iter([AIMessage(content=scene_json)]))
+
+    response = stream_structured("test", model, [], Scene, [StreamedField("narrative")], console, stream=False)
+
+    assert response.npc_name == 'Old "Grey" Tom'
+    assert console.export_text() == 'He says:\n"Welcome" 🐉 to the inn\\\n\n'
+
+
+class SlowModel:
+    """Chat model answering after a delay."""
+
+    def __init__(self, content: str, delay: float):
+        self.content = content
+        self.delay = delay
+
+    def stream(self, _):
+        time.sleep(self.delay)
+        yield AIMessage(content=self.content)
+
+
+@pytest.fixture(name="deadline")
+def deadline_fixture(monkeypatch):
+    monkeypatch.setitem(hedging.NODE_DEADLINES, "test", 0.1)
+
+
+def test_missed_deadline_falls_back_to_faster_tier(scene_json, deadline):
+    routes = []
+
+    def fallback(route: Route):
+        routes.append(route.tier)
+        return GenericFakeChatModel(messages=iter([AIMessage(content=scene_json)]))
+
+    route = Route("test", "quality", "big", 0.7)
+    console = Console(record=True, width=200)
+    model = SlowModel(scene_json, 1.0)
+
+    response = stream_structured(
+        "test", model, [], Scene, [StreamedField("narrative")], console, route=route, fallback=fallback
+    )
+
+    assert response.options == ["a", "b"]
+    assert routes == ["standard"]
+    assert console.export_text() == 'He says:\n"Welcome" 🐉 to the inn\\\n\n'
+
+
+def test_missed_deadline_on_fastest_tier_uses_fallback_response(scene_json, deadline):
+    route = Route("test", "fast", "small", 0.7)
+    model = SlowModel(scene_json, 1.0)
+    console = Console(record=True, width=200)
+    fallback = Scene(npc_name="Tom", narrative="Nothing happens.", options=["wait"])
+
+    start = time.monotonic()
+    response = stream_structured(
+        "test",
+        model,
+        [],
+        Scene,
+        [StreamedField("narrative")],
+        console,
+        route=route,
+        fallback=lambda route: model,
+        fallback_response=lambda: fallback,
+    )
+
+    assert response is fallback
+    assert time.monotonic() - start < 0.5
+    assert console.export_text() == "Nothing happens.\n\n"
+
+
+def test_missed_deadline_without_fallback_response_raises(scene_json, deadline):
+    with pytest.raises(DeadlineExceeded):
+        stream_structured("test", SlowModel(scene_json, 1.0), [], Scene, [StreamedField("narrative")], Console())
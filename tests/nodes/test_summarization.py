@@ -0,0 +1,84 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core import GameState
+from core.entities import Origin, Player, PlayerClass, Race, World
+from core.entities.constants import CHAPTER_LENGTH, HISTORY_VERBATIM_LENGTH
+from core.save import load_save
+from nodes import summarization
+from nodes.summarization import ChapterSummaries, compact_history
+
+
+@pytest.fixture(name="summaries")
+def summaries_fixture(monkeypatch) -> ChapterSummaries:
+    summaries = ChapterSummaries()
+    monkeypatch.setattr(summarization, "chapter_summaries", summaries)
+    monkeypatch.setattr(summarization, "summarize", lambda entries: f"summary of {len(entries)} events")
+    return summaries
+
+
+def test_summaries_reach_the_state_of_the_next_node(summaries):
+    from langgraph.graph import END, StateGraph
+
+    seen = []
+
+    def first(state: GameState) -> GameState:
+        for i in range(HISTORY_VERBATIM_LENGTH + CHAPTER_LENGTH):
+            state.append_history(f"player action: Turn {i}")
+        compact_history(state)
+        summarization.executor.submit(lambda: None).result()  # wait for the background summary
+        return state
+
+    def second(state: GameState) -> GameState:
+        compact_history(state)
+        seen.append(list(state.chapters))
+        return state
+
+    graph = StateGraph(GameState)
+    graph.add_node("first", first)
+    graph.add_node("second", second)
+    graph.set_entry_point("first")
+    graph.add_edge("first", "second")
+    graph.add_edge("second", END)
+
+    player = Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    state = GameState(player=player, world=World(location="Forest", quest="quest"), history=deque())
+    final = graph.compile().invoke(state)
+
+    assert seen == [[f"summary of {CHAPTER_LENGTH} events"]]
+    assert final["chapters"] == [f"summary of {CHAPTER_LENGTH} events"]
+    assert len(summaries) == 0
+
+
+def test_chapters_saved_raw_are_summarized_after_restart(summaries, monkeypatch):
+    player = Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    state = GameState(player=player, world=World(location="Forest", quest="quest"))
+    for i in range(HISTORY_VERBATIM_LENGTH + CHAPTER_LENGTH):
+        state.append_history(f"player action: Turn {i}")
+    schedule = summarization._schedule
+    monkeypatch.setattr(summarization, "_schedule", lambda provisional, entries: None)  # the game exits first
+    compact_history(state)
+    assert state.provisional_chapters == state.chapters
+    monkeypatch.setattr(summarization, "_schedule", schedule)
+
+    monkeypatch.setattr(summarization, "chapter_summaries", ChapterSummaries())  # a new process
+    monkeypatch.setattr(summarization, "executor", ThreadPoolExecutor(max_workers=1))
+    restored = load_save(state.model_dump_json().encode("utf-8"), None)
+    compact_history(restored)
+    summarization.executor.shutdown(wait=True)
+    compact_history(restored)
+    assert restored.chapters == ["summary of 1 events"]
+    assert restored.provisional_chapters == []
+
+
+def test_pending_summaries_are_bounded():
+    summaries = ChapterSummaries(size=2)
+    for i in range(3):
+        summaries.add(f"provisional {i}", f"summary {i}")
+    player = Player(name="player", player_class=PlayerClass.BARD, race=Race.ELF, origin=Origin.SAILOR)
+    state = GameState(player=player, world=World(location="Forest", quest="quest"))
+    state.chapters = ["provisional 0", "provisional 2"]
+    assert summaries.apply(state) == 1
+    assert state.chapters == ["provisional 0", "summary 2"]